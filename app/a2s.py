@@ -0,0 +1,281 @@
+"""
+Asyncio client for the Steam A2S server query protocol, multiplexing
+queries to any number of servers over one UDP socket per address family
+"""
+import asyncio
+import logging
+import struct
+from ipaddress import ip_address, IPv6Address
+
+from steam.player import Player
+
+logger = logging.getLogger(__name__)
+
+HEADER_NO_SPLIT = b'\xFF\xFF\xFF\xFF'
+HEADER_SPLIT = b'\xFF\xFF\xFF\xFE'
+NO_CHALLENGE = b'\xFF\xFF\xFF\xFF'
+CHALLENGE_RESPONSE = b'A'
+A2S_INFO_REQUEST = b'T'
+A2S_INFO_PAYLOAD = b'Source Engine Query\x00'
+A2S_INFO_RESPONSE = b'I'
+A2S_PLAYER_REQUEST = b'U'
+A2S_PLAYER_RESPONSE = b'D'
+
+# Responses expected for each request type
+_RESPONSES = {
+    A2S_INFO_REQUEST: A2S_INFO_RESPONSE,
+    A2S_PLAYER_REQUEST: A2S_PLAYER_RESPONSE,
+}
+
+# How many fresh challenges a server may hand out for one request
+# before it's considered broken
+MAX_CHALLENGES = 5
+
+
+def _address(host: str, port: int) -> tuple:
+    """
+    Normalises an address so replies can be matched to requests
+    regardless of how the IP was written
+    """
+    return str(ip_address(host)), int(port)
+
+
+def _family(addr) -> int:
+    """
+    Returns the IP version of a normalised address
+    """
+    return 6 if isinstance(ip_address(addr[0]), IPv6Address) else 4
+
+
+class _A2SProtocol(asyncio.DatagramProtocol):
+    """
+    Hands every datagram received on the shared socket to the client
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, addr):
+        self.client._datagram_received(data, _address(addr[0], addr[1]))
+
+    def error_received(self, exc):
+        logger.debug("A2S socket error: %r", exc)
+
+
+class A2SClient:
+    """
+    Sends A2S requests to many servers concurrently over a shared socket,
+    correlating replies by server address and caching each server's
+    challenge token so later queries skip the challenge round trip.
+    Split responses aren't supported, like the SteamQuery library.
+    """
+
+    def __init__(self, timeout: float = 1.0):
+        self.timeout = timeout
+        self._loop = None
+        self._transports = {}
+        self._challenges = {}
+        # (address, response type) ->
+        #   [future, request type, challenges seen, challenge last sent]
+        self._pending = {}
+
+    async def info(self, host: str, port: int) -> dict:
+        """
+        Queries a server with A2S_INFO and returns its details in the
+        same shape as SteamQuery.query_server_info
+        """
+        addr = _address(host, port)
+        data = await self._request(addr, A2S_INFO_REQUEST)
+        return _unpack_info(data, addr)
+
+    async def players(self, host: str, port: int) -> list:
+        """
+        Queries a server with A2S_PLAYER and returns a list of Players
+        """
+        addr = _address(host, port)
+        data = await self._request(addr, A2S_PLAYER_REQUEST)
+        return _unpack_players(data)
+
+    async def query(self, host: str, port: int) -> tuple[dict, list]:
+        """
+        Sends A2S_INFO and A2S_PLAYER to a server at once, sharing
+        one challenge, and returns both results
+        """
+        return await asyncio.gather(self.info(host, port), self.players(host, port))
+
+    def close(self):
+        """
+        Closes the sockets and fails any queries still waiting on them
+        """
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+        for pending in self._pending.values():
+            if not pending[0].done():
+                pending[0].set_exception(ConnectionError("A2S client closed"))
+        self._pending.clear()
+
+    def _bind_loop(self):
+        """
+        Drops sockets and requests left from an event loop that's no
+        longer running
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._transports.clear()
+            self._pending.clear()
+            self._loop = loop
+
+    async def _transport(self, addr) -> asyncio.DatagramTransport:
+        """
+        Returns the socket for the address family of addr, opening it on
+        first use or after the event loop it was bound to has changed
+        """
+        self._bind_loop()
+        family = _family(addr)
+        transport = self._transports.get(family)
+        if transport is None or transport.is_closing():
+            local_addr = ('::', 0) if family == 6 else ('0.0.0.0', 0)
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _A2SProtocol(self), local_addr=local_addr)
+            self._transports[family] = transport
+        return transport
+
+    async def _request(self, addr, request: bytes) -> bytes:
+        """
+        Sends a request and waits for its response, answering any
+        challenges along the way. An identical request already in flight
+        is shared rather than sent again, each caller waiting on it with
+        its own timeout.
+        """
+        self._bind_loop()
+        key = (addr, _RESPONSES[request])
+        pending = self._pending.get(key)
+        # Registered before anything is awaited, so concurrent identical
+        # requests always find it
+        owner = pending is None
+        if owner:
+            pending = self._pending[key] = [self._loop.create_future(), request, 0, None]
+        future = pending[0]
+        try:
+            if owner:
+                transport = await self._transport(addr)
+                if not future.done():
+                    pending[3] = self._send(transport, addr, request)
+            async with asyncio.timeout(self.timeout):
+                return await asyncio.shield(future)
+        except TimeoutError as error:
+            raise ConnectionError(f"A2S request to {addr[0]}:{addr[1]} timed out") from error
+        except ConnectionError:
+            raise
+        except OSError as error:
+            raise ConnectionError(f"Couldn't send A2S request to {addr[0]}:{addr[1]}") from error
+        finally:
+            if owner:
+                if self._pending.get(key, [None])[0] is future:
+                    del self._pending[key]
+                # Whoever shared the request gets an answer now, rather
+                # than a cancellation or waiting out their own timeout
+                if not future.done():
+                    future.set_exception(ConnectionError(
+                        f"A2S request to {addr[0]}:{addr[1]} got no answer"))
+                    future.exception()
+
+    def _send(self, transport, addr, request: bytes) -> bytes:
+        """
+        Sends a request with the server's cached challenge, returning
+        the challenge used
+        """
+        challenge = self._challenges.get(addr, NO_CHALLENGE)
+        if request == A2S_INFO_REQUEST:
+            # Servers that predate the challenge on A2S_INFO ignore the suffix
+            payload = A2S_INFO_REQUEST + A2S_INFO_PAYLOAD
+            if challenge != NO_CHALLENGE:
+                payload += challenge
+        else:
+            payload = request + challenge
+        transport.sendto(HEADER_NO_SPLIT + payload, addr)
+        return challenge
+
+    def _datagram_received(self, data: bytes, addr):
+        if data.startswith(HEADER_SPLIT):
+            logger.warning("Split A2S response from %s:%s isn't supported", *addr)
+            return
+        if not data.startswith(HEADER_NO_SPLIT) or len(data) < 5:
+            logger.debug("Ignoring malformed A2S datagram from %s:%s", *addr)
+            return
+        kind, body = data[4:5], data[4:]
+        if kind == CHALLENGE_RESPONSE:
+            self._challenge_received(addr, body[1:5])
+            return
+        pending = self._pending.pop((addr, kind), None)
+        if pending is not None and not pending[0].done():
+            pending[0].set_result(body)
+
+    def _challenge_received(self, addr, challenge: bytes):
+        """
+        Caches a server's new challenge and resends its waiting requests
+        with it, as the challenge reply doesn't say which one it's for
+        """
+        self._challenges[addr] = challenge
+        transport = self._transports.get(_family(addr))
+        for (pending_addr, _), pending in list(self._pending.items()):
+            # Pipelined requests each get a challenge reply, only resend
+            # those that haven't already gone out with this one
+            if pending_addr != addr or pending[0].done() or pending[3] == challenge:
+                continue
+            pending[2] += 1
+            if pending[2] > MAX_CHALLENGES:
+                pending[0].set_exception(ConnectionError(
+                    "Server keeps sending new challenges instead of accepting"))
+            elif transport is not None:
+                pending[3] = self._send(transport, addr, pending[1])
+
+
+def _unpack_info(data: bytes, addr) -> dict:
+    """
+    Parses an A2S_INFO response into a dict
+    """
+    try:
+        strings = data[2:].split(b'\x00', 4)
+        in_data = strings[4]
+        server_info = {
+            'online': True,
+            'ip': addr[0],
+            'port': addr[1],
+            'name': strings[0].decode(errors='replace'),
+            'map': strings[1].decode(errors='replace'),
+            'game': strings[2].decode(errors='replace'),
+            'description': strings[3].decode(errors='replace'),
+            'players': in_data[2],
+            'max_players': in_data[3],
+            'bots': in_data[4],
+            'password_required': bool(in_data[7]),
+            'vac_secure': bool(in_data[8]),
+        }
+    except IndexError as error:
+        raise ConnectionError("Truncated A2S_INFO response") from error
+    server_info['server_type'] = {'d': 'Dedicated', 'l': 'Non-Dedicated'}.get(
+        chr(in_data[5]), 'SourceTV')
+    server_info['os'] = {'w': 'Windows', 'l': 'Linux'}.get(chr(in_data[6]), 'Mac')
+    return server_info
+
+
+def _unpack_players(data: bytes) -> list:
+    """
+    Parses an A2S_PLAYER response into a list of Players
+    """
+    # The player count is a single byte, so it's ignored in favour of
+    # reading entries until the data runs out
+    player_data = data[2:]
+    players = []
+    try:
+        while player_data:
+            index = player_data[0]
+            name, _, player_data = player_data[1:].partition(b'\x00')
+            score, duration = struct.unpack('<if', player_data[:8])
+            player_data = player_data[8:]
+            players.append(Player(index, name.decode(errors='replace'), score, duration))
+    except struct.error as error:
+        raise ConnectionError("Truncated A2S_PLAYER response") from error
+    return players
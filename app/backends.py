@@ -0,0 +1,362 @@
+"""
+Query backends for each supported game server type, dispatched by
+ServerType through a registry
+"""
+import asyncio
+import logging
+import time
+from mcstatus import JavaServer #Minecraft Java
+from mcstatus import BedrockServer #Minecraft Bedrock
+import network
+from a2s import A2SClient #SteamQuery
+from vrage import VRageClient #SpaceEngineers
+from servers import Server, ServerType
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait on a Steam server's A2S reply, matching SteamQuery's default
+STEAM_TIMEOUT = 1.0
+
+# Seconds to wait on a Minecraft server, and for how long its resolved
+# endpoint is reused before it's looked up again
+MINECRAFT_TIMEOUT = 3.0
+MINECRAFT_ENDPOINT_TTL = 300.0
+
+# Seconds to wait on a TCP connection to a DCS server
+DCS_TIMEOUT = 3.0
+
+
+class Backend:
+    """
+    Queries one type of game server. A backend is long-lived and owns
+    whatever clients it keeps for its servers, and at most concurrency
+    of its queries run at once.
+
+    players() returns a dict of current_players and max_players,
+    player_details() a list of players and info() a dict of server
+    details. A backend that can't provide one raises NotImplementedError,
+    and one that can't reach its server raises ConnectionError.
+    """
+    server_type: ServerType = None
+    concurrency: int = 32
+
+    def __init__(self):
+        self._semaphore = None
+        self._loop = None
+
+    async def run(self, method, server: Server):
+        """
+        Runs one of the backend's query methods within its concurrency limit
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await method(server)
+
+    async def players(self, server: Server) -> dict:
+        raise NotImplementedError
+
+    async def player_details(self, server: Server) -> list:
+        raise NotImplementedError
+
+    async def info(self, server: Server) -> dict:
+        raise NotImplementedError
+
+    def forget(self, name: str):
+        """
+        Drops any client state kept for a server whose entry has changed
+        """
+
+    async def close(self):
+        """
+        Closes any clients the backend owns
+        """
+
+
+class SteamBackend(Backend):
+    """
+    Steam A2S servers, all queried over one shared A2SClient socket
+    """
+    server_type = ServerType.STEAM
+
+    def __init__(self, timeout: float = STEAM_TIMEOUT):
+        super().__init__()
+        self.client = A2SClient(timeout=timeout)
+
+    async def players(self, server: Server) -> dict:
+        server_state = await self.client.info(*_steam_address(server))
+        return {"current_players": server_state["players"],
+                "max_players": server_state["max_players"]}
+
+    async def player_details(self, server: Server) -> list:
+        return await self.client.players(*_steam_address(server))
+
+    async def info(self, server: Server) -> dict:
+        return await self.client.info(*_steam_address(server))
+
+    async def close(self):
+        self.client.close()
+
+
+class SpaceEngineersBackend(Backend):
+    """
+    Space Engineers servers, each with a VRageClient kept for as long as
+    its entry is unchanged
+    """
+    server_type = ServerType.SPACE_ENGINEERS
+
+    def __init__(self):
+        super().__init__()
+        self._clients = {}
+
+    def client(self, server: Server) -> VRageClient:
+        """
+        Returns the long-lived VRage API client for a server
+        """
+        client = self._clients.get(server['name'])
+        if client is None:
+            server_api_address = "http://" + \
+                str(server['ip_address']) + ":" + str(server['port'])
+            client = VRageClient(url=server_api_address, token=server['password'])
+            self._clients[server['name']] = client
+        return client
+
+    async def players(self, server: Server) -> dict:
+        # Only the count is needed, so the player list isn't fetched
+        status = await self.client(server).status()
+        if not status["live"]:
+            logger.warning("%s didn't answer its ping", server['name'])
+        return {"current_players": status["info"]["Players"], "max_players": 99}
+
+    async def player_details(self, server: Server) -> list:
+        return await self.client(server).players()
+
+    async def info(self, server: Server) -> dict:
+        info = await self.client(server).server_info()
+        return {"name": info.get("ServerName"), "map": info.get("WorldName"),
+                "players": info.get("Players"), "max_players": 99, **info}
+
+    def forget(self, name: str):
+        client = self._clients.pop(name, None)
+        if client is not None:
+            try:
+                asyncio.get_running_loop().create_task(client.close())
+            except RuntimeError:
+                # No loop running, its connections go with the session
+                pass
+
+    async def close(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.close()
+
+
+class _MinecraftBackend(Backend):
+    """
+    Shared endpoint handling for the Minecraft editions. Each server's
+    mcstatus instance, and with it the address it resolved to, is kept
+    for endpoint_ttl seconds so repeat queries skip the lookup.
+    """
+    server_class = None
+
+    def __init__(self, timeout: float = MINECRAFT_TIMEOUT,
+                 endpoint_ttl: float = MINECRAFT_ENDPOINT_TTL, clock=time.monotonic):
+        super().__init__()
+        self.timeout = timeout
+        self.endpoint_ttl = endpoint_ttl
+        self._clock = clock
+        self._endpoints = {}
+
+    def endpoint(self, server: Server):
+        """
+        Returns the cached mcstatus instance for a server, making a new
+        one once the cached one has expired
+        """
+        now = self._clock()
+        entry = self._endpoints.get(server['name'])
+        if entry is None or entry[1] <= now:
+            entry = (self.server_class(str(server['ip_address']), server['port'],
+                                       timeout=self.timeout),
+                     now + self.endpoint_ttl)
+            self._endpoints[server['name']] = entry
+        return entry[0]
+
+    async def status(self, server: Server):
+        """
+        Fetches a server's status, raises ConnectionError if it can't be reached
+        """
+        try:
+            return await self.endpoint(server).async_status()
+        except (OSError, EOFError) as error:
+            raise ConnectionError(f"Could not get status of {server['name']}") from error
+
+    async def players(self, server: Server) -> dict:
+        status = await self.status(server)
+        return {"current_players": status.players.online,
+                "max_players": status.players.max}
+
+    def forget(self, name: str):
+        self._endpoints.pop(name, None)
+
+
+class MinecraftJavaBackend(_MinecraftBackend):
+    """
+    Minecraft Java servers, queried with the server list ping. Details
+    also use the query protocol when the server has it enabled, sent at
+    the same time as the status request.
+    """
+    server_type = ServerType.MINECRAFT_JAVA
+    server_class = JavaServer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Servers with enable-query off, and when to try them again
+        self._query_disabled = {}
+
+    async def details(self, server: Server) -> dict:
+        """
+        Returns players, MOTD, version and latency from the status request,
+        plus map and player names from a concurrent query if enabled
+        """
+        #https://mcstatus.readthedocs.io/en/stable/api/basic/#mcstatus.querier.QueryResponse
+        status, query = await asyncio.gather(self.status(server), self._query(server))
+        details = {"name": status.motd.to_plain(), "map": None,
+                   "players": status.players.online,
+                   "max_players": status.players.max,
+                   "version": status.version.name, "latency": status.latency,
+                   "player_names": [player.name for player in status.players.sample or []]}
+        if query is not None:
+            details["map"] = query.map
+            details["player_names"] = query.players.names
+        return details
+
+    async def player_details(self, server: Server) -> list:
+        return (await self.details(server))["player_names"]
+
+    async def info(self, server: Server) -> dict:
+        return await self.details(server)
+
+    def forget(self, name: str):
+        super().forget(name)
+        self._query_disabled.pop(name, None)
+
+    async def _query(self, server: Server):
+        """
+        Runs a query, returning None rather than waiting out retries
+        again on a server that didn't answer the last one
+        """
+        name = server['name']
+        if self._query_disabled.get(name, 0) > self._clock():
+            return None
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await self.endpoint(server).async_query()
+        except (OSError, ValueError):
+            logger.info("%s didn't answer a query, it may have enable-query off", name)
+            self._query_disabled[name] = self._clock() + self.endpoint_ttl
+            return None
+
+
+class MinecraftBedrockBackend(_MinecraftBackend):
+    """
+    Minecraft Bedrock servers, queried with the RakNet unconnected ping
+    """
+    server_type = ServerType.MINECRAFT_BEDROCK
+    server_class = BedrockServer
+
+    async def info(self, server: Server) -> dict:
+        status = await self.status(server)
+        return {"name": status.motd.to_plain(), "map": status.map_name,
+                "players": status.players.online,
+                "max_players": status.players.max,
+                "version": status.version.name, "latency": status.latency}
+
+
+class DcsBackend(Backend):
+    """
+    DCS World servers. DCS has no public query protocol, so a server
+    counts as up when its game port accepts a TCP connection. Its players
+    can't be counted, so players() isn't supported and info() leaves
+    them as None rather than claiming nobody is on.
+    """
+    server_type = ServerType.DCS
+
+    def __init__(self, timeout: float = DCS_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    async def info(self, server: Server) -> dict:
+        latency = await self._probe(server)
+        return {"name": server['name'], "map": None, "players": None,
+                "max_players": None, "latency": latency}
+
+    async def _probe(self, server: Server) -> float:
+        """
+        Connects to the game port and returns how long that took in ms
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            async with asyncio.timeout(self.timeout):
+                _, writer = await asyncio.open_connection(
+                    str(server['ip_address']), server['port'])
+        except (OSError, TimeoutError) as error:
+            raise ConnectionError(f"DCS server {server['name']} is unreachable") from error
+        writer.close()
+        return (loop.time() - start) * 1000
+
+
+_registry = {}
+
+
+def register(backend: Backend):
+    """
+    Registers a backend for its server type, replacing any existing one
+    """
+    _registry[backend.server_type] = backend
+
+
+def get_backend(server_type: ServerType) -> Backend:
+    """
+    Returns the backend for a server type, raises KeyError if there's none
+    """
+    return _registry[server_type]
+
+
+def forget(name: str):
+    """
+    Drops any client state every backend keeps for a server
+    """
+    for backend in _registry.values():
+        backend.forget(name)
+
+
+async def close():
+    """
+    Closes every backend's clients
+    """
+    for backend in _registry.values():
+        await backend.close()
+
+
+def _steam_address(server: Server) -> tuple:
+    """
+    Validates a steam query server address and passes it back.
+    """
+    server_ip, port = str(server['ip_address']), server['port']
+    # Check if IP address is valid
+    if not network.valid_ip_address(server_ip):
+        raise ValueError("IP Address Invalid")
+
+    # Check if port is valid
+    if not network.valid_port(port):
+        raise ValueError("PORT environment variable is invalid")
+
+    return server_ip, port
+
+
+for _backend in (SteamBackend(), SpaceEngineersBackend(), MinecraftJavaBackend(),
+                 MinecraftBedrockBackend(), DcsBackend()):
+    register(_backend)
@@ -3,14 +3,32 @@ Discord bot that controls the power of a physical server
 """
 import os
 import sys
+import atexit
 import json
-import traceback
-from asyncio import TimeoutError as asyncTimeoutError
+import math
+import time
+import asyncio
+import logging
 from typing import List
-import requests
 import discord
 from discord.ext import commands
+from marshmallow import ValidationError
+import cooldown
+import dashboard
+import debounce
 import gamequery
+import history
+import hosts
+import idle
+import livestatus
+import logsetup
+import metrics
+import network
+import poller as gamepoller
+import readiness
+import servers
+import updates
+import watcher
 
 
 def env_defined(key):
@@ -20,18 +38,68 @@ def env_defined(key):
     return key in os.environ and len(os.environ[key]) > 0
 
 
-DISCORD_CHANNEL: List[str] = []
+# Logs go out as JSON lines to LOG_FILE, or stderr if unset, at LOG_LEVEL.
+# LOG_LEVELS overrides it per module, eg. gamequery=DEBUG,discord=WARNING
+if env_defined("LOG_LEVEL"):
+    LOG_LEVEL: str = os.environ["LOG_LEVEL"]
+else:
+    LOG_LEVEL: str = 'INFO'
+
+if env_defined("LOG_LEVELS"):
+    LOG_LEVELS: dict = logsetup.parse_levels(os.environ["LOG_LEVELS"])
+else:
+    LOG_LEVELS: dict = {}
+
+if env_defined("LOG_FILE"):
+    LOG_FILE = os.environ["LOG_FILE"]
+else:
+    LOG_FILE = None
+
+logsetup.setup_logging(level=LOG_LEVEL, levels=LOG_LEVELS, filename=LOG_FILE)
+logger = logging.getLogger('bot')
+
+# Name of the host made up from the power URLs in the environment
+DEFAULT_HOST = 'default'
 
 # env variables are defaults, if no config file exists it'll be created.
 # If no env is set, stop the bot
 try:
     DISCORD_TOKEN = os.environ["DISCORD_TOKEN"]
-    WOL_URL = os.environ["WOL_URL"]
-    SHUTDOWN_URL = os.environ["SHUTDOWN_URL"]
-    REBOOT_URL = os.environ["REBOOT_URL"]
-    LIVENESS_URL = os.environ["LIVENESS_URL"]
 except KeyError as e:
-    print(f"Missing {str(e)} token from .env.")
+    logger.error("Missing %s token from .env.", e)
+    sys.exit()
+
+# Hosts are read from hosts.json. The power URLs in the environment make
+# up the host named "default", which runs every game server unless
+# hosts.json says otherwise
+try:
+    hosts.load_hosts()
+except FileNotFoundError:
+    pass
+
+if any(env_defined(key) for key in ("WOL_URL", "SHUTDOWN_URL", "REBOOT_URL", "LIVENESS_URL")):
+    try:
+        existing = hosts.get_host(DEFAULT_HOST)
+        hosts.update_host(DEFAULT_HOST, {
+            'name': DEFAULT_HOST,
+            'wol_url': os.environ["WOL_URL"],
+            'shutdown_url': os.environ["SHUTDOWN_URL"],
+            'reboot_url': os.environ["REBOOT_URL"],
+            'liveness_url': os.environ["LIVENESS_URL"],
+            'servers': existing['servers'] if existing else [hosts.ALL_SERVERS]
+        })
+    except KeyError as e:
+        logger.error("Missing %s token from .env.", e)
+        sys.exit()
+
+# Changes to the game servers are journaled next to servers.json as they
+# happen, and saved into it in full once a burst of them is over
+journal_debouncer = debounce.Debouncer(servers.flush_journal)
+servers.journal_changes(schedule=journal_debouncer.trigger)
+atexit.register(servers.flush_journal)
+
+if not hosts.list_hosts():
+    logger.error("No hosts to control, set the power URLs in .env or add hosts to hosts.json")
     sys.exit()
 
 # Defaulting COOLDOWN to 300s unless set by the user
@@ -40,6 +108,119 @@ if env_defined("COOLDOWN"):
 else:
     COOLDOWN: int = 300
 
+# How many boot, shutdown and reboot commands each user may run in
+# USER_RATE_WINDOW seconds, 0 for no limit
+if env_defined("USER_RATE_LIMIT"):
+    USER_RATE_LIMIT: int = int(os.environ["USER_RATE_LIMIT"])
+else:
+    USER_RATE_LIMIT: int = 0
+
+if env_defined("USER_RATE_WINDOW"):
+    USER_RATE_WINDOW: float = float(os.environ["USER_RATE_WINDOW"])
+else:
+    USER_RATE_WINDOW: float = 3600
+
+# Retries and base backoff in seconds for requests to the power URLs
+if env_defined("HTTP_RETRIES"):
+    HTTP_RETRIES: int = int(os.environ["HTTP_RETRIES"])
+else:
+    HTTP_RETRIES: int = network.HTTP_RETRIES
+
+if env_defined("HTTP_BACKOFF"):
+    HTTP_BACKOFF: float = float(os.environ["HTTP_BACKOFF"])
+else:
+    HTTP_BACKOFF: float = network.HTTP_BACKOFF
+
+# How long in seconds game server player counts are served from cache,
+# and for how much longer a stale count is served while it's refreshed
+if env_defined("PLAYER_CACHE_TTL"):
+    gamequery.player_cache.ttl = float(os.environ["PLAYER_CACHE_TTL"])
+
+if env_defined("PLAYER_CACHE_STALE"):
+    gamequery.player_cache.stale_ttl = float(os.environ["PLAYER_CACHE_STALE"])
+
+# Seconds between background polls of the game servers while players are
+# online, while they're empty, and while none of them answer
+if env_defined("POLL_ACTIVE_INTERVAL"):
+    POLL_ACTIVE_INTERVAL: float = float(os.environ["POLL_ACTIVE_INTERVAL"])
+else:
+    POLL_ACTIVE_INTERVAL: float = gamepoller.ACTIVE_INTERVAL
+
+if env_defined("POLL_IDLE_INTERVAL"):
+    POLL_IDLE_INTERVAL: float = float(os.environ["POLL_IDLE_INTERVAL"])
+else:
+    POLL_IDLE_INTERVAL: float = gamepoller.IDLE_INTERVAL
+
+if env_defined("POLL_DOWN_INTERVAL"):
+    POLL_DOWN_INTERVAL: float = float(os.environ["POLL_DOWN_INTERVAL"])
+else:
+    POLL_DOWN_INTERVAL: float = gamepoller.DOWN_INTERVAL
+
+# Channels to announce automatic shutdowns and keep the live status in,
+# as a comma separated list of IDs
+if env_defined("DISCORD_CHANNEL"):
+    DISCORD_CHANNEL: List[int] = [int(channel) for channel
+                                  in os.environ["DISCORD_CHANNEL"].split(",")]
+else:
+    DISCORD_CHANNEL: List[int] = []
+
+# Least seconds between edits of the live status message kept pinned in
+# each channel in DISCORD_CHANNEL, 0 turns it off
+if env_defined("LIVE_STATUS_INTERVAL"):
+    LIVE_STATUS_INTERVAL: float = float(os.environ["LIVE_STATUS_INTERVAL"])
+else:
+    LIVE_STATUS_INTERVAL: float = 0
+
+# Minutes a host has to sit with nobody on any of its game servers before
+# it's shut down automatically, 0 turns it off
+if env_defined("IDLE_SHUTDOWN_MINUTES"):
+    IDLE_SHUTDOWN_MINUTES: float = float(os.environ["IDLE_SHUTDOWN_MINUTES"])
+else:
+    IDLE_SHUTDOWN_MINUTES: float = 0
+
+# Seconds to follow a booted host until its game servers answer, updating
+# the /boot response as they come up, 0 turns it off. Discord only allows
+# the response to be edited for 15 minutes.
+if env_defined("BOOT_READY_TIMEOUT"):
+    BOOT_READY_TIMEOUT: float = float(os.environ["BOOT_READY_TIMEOUT"])
+else:
+    BOOT_READY_TIMEOUT: float = readiness.READY_TIMEOUT
+
+# Seconds someone has to confirm a forced command with /sudo
+if env_defined("SUDO_CONFIRM_TIMEOUT"):
+    SUDO_CONFIRM_TIMEOUT: float = float(os.environ["SUDO_CONFIRM_TIMEOUT"])
+else:
+    SUDO_CONFIRM_TIMEOUT: float = 30
+
+# Days of player history to keep for /stats, in HISTORY_FILE, 0 turns it off
+if env_defined("HISTORY_DAYS"):
+    HISTORY_DAYS: float = float(os.environ["HISTORY_DAYS"])
+else:
+    HISTORY_DAYS: float = history.ROLLUP_RETENTION
+
+if env_defined("HISTORY_FILE"):
+    HISTORY_FILE = os.environ["HISTORY_FILE"]
+else:
+    HISTORY_FILE = 'history.db'
+
+# Seconds between checks of servers.json for edits to apply, 0 turns it off
+if env_defined("CONFIG_RELOAD_INTERVAL"):
+    CONFIG_RELOAD_INTERVAL: float = float(os.environ["CONFIG_RELOAD_INTERVAL"])
+else:
+    CONFIG_RELOAD_INTERVAL: float = watcher.RELOAD_INTERVAL
+
+# Port to serve Prometheus metrics on, off unless set. Binds to localhost
+# unless METRICS_HOST says otherwise
+if env_defined("METRICS_PORT"):
+    METRICS_PORT = int(os.environ["METRICS_PORT"])
+else:
+    METRICS_PORT = None
+
+if env_defined("METRICS_HOST"):
+    METRICS_HOST = os.environ["METRICS_HOST"]
+else:
+    METRICS_HOST = '127.0.0.1'
+
 # Defaulting POWERBOT_ROLE to "@everyone" unless set by the user
 if env_defined("POWERBOT_ROLE"):
     POWERBOT_ROLE = os.environ["POWERBOT_ROLE"].split(",")
@@ -65,62 +246,492 @@ DESC = "Bot to control the power to physical game server"
 bot = discord.Bot(description=DESC, intents=intents)
 
 
-def check_cooldown(ctx):
+async def power_request(url, endpoint, retries=None, idempotent=True) -> tuple[int, bytes]:
     """
-    Each of boot, shutdown, restart triggers a cooldown for itself.
-    This function is designed to link their cooldowns to avoid hangups.
+    Calls one of the power control URLs over the shared HTTP pool,
+    timing it under the given endpoint name. One that isn't idempotent
+    is only retried if it never reached the host.
     """
-    if ctx.command.name in ["boot", "reboot", "shutdown"]:
-        boot_cd = bot.get_application_command(name="boot").is_on_cooldown(ctx)
-        reboot_cd = bot.get_application_command(
-            name="reboot").is_on_cooldown(ctx)
-        shutdown_cd = bot.get_application_command(
-            name="shutdown").is_on_cooldown(ctx)
-        if boot_cd or reboot_cd or shutdown_cd:
-            return False
+    if retries is None:
+        retries = HTTP_RETRIES
+    with metrics.POWER_LATENCY.time(endpoint=endpoint):
+        return await network.http_get(url, timeout=2, retries=retries,
+                                      backoff=HTTP_BACKOFF, idempotent=idempotent)
+
+
+async def defer(ctx):
+    """
+    Acknowledges the interaction so retried power requests can outlast
+    Discord's 3s response window. Commands invoked via /sudo have
+    already been responded to.
+    """
+    if not ctx.interaction.response.is_done():
+        await ctx.defer()
+
+
+async def update_presence(snapshot):
+    """
+    Keeps the bot's presence in line with the latest poll of the game servers.
+    Set on every poll, so it's put back after a command changed it, as
+    presence_updates drops whatever matches what's already shown.
+    """
+    if not snapshot.players:
+        return
+    if snapshot.total_players > 0:
+        presence = (discord.Status.online, f"{snapshot.total_players} online")
+    elif snapshot.host_up:
+        presence = (discord.Status.online, "Server online")
+    else:
+        presence = (discord.Status.idle, "Server offline")
+    set_presence(*presence)
+
+
+async def send_presence(key, presence):
+    """
+    Sets the bot's presence to a status and what it's playing
+    """
+    status, name = presence
+    game = discord.Activity(name=name, type=discord.ActivityType.playing)
+    await bot.change_presence(status=status, activity=game)
+
+
+def set_presence(status: discord.Status, name: str):
+    """
+    Schedules the bot's presence to change, in the background and within
+    the gateway's rate limit
+    """
+    presence_updates.update('presence', (status, name))
+
+
+async def player_details(name: str):
+    """
+    Returns who's online on a game server as a dict of player name to
+    seconds connected, if known, or None if the server can't list them
+    """
+    server = servers.get_server(name)
+    if server is None:
+        return None
+    try:
+        players = await asyncio.wait_for(gamequery.get_players_details(server),
+                                         gamequery.QUERY_TIMEOUT)
+    except Exception:
+        logger.debug("Couldn't list the players on %s", name, exc_info=True)
+        return None
+    if players is None:
+        return None
+    return {history.player_name(player): getattr(player, 'duration', None)
+            for player in players if history.player_name(player)}
+
+
+async def record_history(snapshot):
+    """
+    Records a poll in the player history, with who's online on
+    the servers that have anyone on them
+    """
+    if player_history is None:
+        return
+    busy = [name for name, result in snapshot.players.items()
+            if result is not None and result['current_players'] > 0]
+    online = await asyncio.gather(*(player_details(name) for name in busy))
+    player_history.record(snapshot.players, {name: players for name, players in zip(busy, online)
+                                             if players is not None},
+                          taken_at=snapshot.taken_at)
+
+
+def live_status_message(snapshot) -> str:
+    """
+    Returns the live status message for a poll of the game servers,
+    which only changes when their players or availability do
+    """
+    lines = [f'**{snapshot.total_players}** players online']
+    for name, result in snapshot.players.items():
+        if result is None:
+            lines.append(f'`{name}`: not answering')
+        else:
+            lines.append(f'`{name}`: {result["current_players"]}/{result["max_players"]} players')
+    return capped_lines(lines)
+
+
+async def post_live_status(channel_id: int, content: str) -> int:
+    """
+    Posts and pins a new live status message in a channel, returns its ID
+    """
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        raise LookupError(f"The bot can't see channel {channel_id}")
+    message = await channel.send(content)
+    try:
+        await message.pin()
+    except discord.HTTPException:
+        logger.warning("Couldn't pin the live status in channel %s, "
+                       "the bot needs Manage Messages there", channel_id)
+    return message.id
+
+
+async def edit_live_status(channel_id: int, message_id: int, content: str) -> bool:
+    """
+    Edits the live status message in a channel,
+    returns False if it's been deleted
+    """
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        raise LookupError(f"The bot can't see channel {channel_id}")
+    try:
+        await channel.get_partial_message(message_id).edit(content=content)
+    except discord.NotFound:
+        return False
     return True
 
-def get_cooldown(ctx):
+
+async def on_poll(snapshot):
     """
-    Returns the shared cooldown in seconds
+    Publishes each poll of the game servers
     """
-    boot_cd = bot.get_application_command(
-        name="boot").get_cooldown_retry_after(ctx)
-    reboot_cd = bot.get_application_command(
-        name="reboot").get_cooldown_retry_after(ctx)
-    shutdown_cd = bot.get_application_command(
-        name="shutdown").get_cooldown_retry_after(ctx)
-    return round(boot_cd + reboot_cd + shutdown_cd)
+    await update_presence(snapshot)
+    if live_status is not None:
+        live_status.update(live_status_message(snapshot))
+    await record_history(snapshot)
 
 
-async def on_application_command_error(ctx, error):
+# Presence changes are rate limited, so they're sent in the background
+# and a burst of them only sends the last
+presence_updates = updates.UpdateScheduler(send_presence)
+player_history = history.History(HISTORY_FILE, rollup_retention=HISTORY_DAYS) \
+    if HISTORY_DAYS > 0 else None
+if player_history is not None:
+    atexit.register(player_history.close)
+metrics_runner = None
+# Interaction IDs of running commands and when they started
+command_started = {}
+poller = gamepoller.Poller(on_update=on_poll,
+                           active_interval=POLL_ACTIVE_INTERVAL,
+                           idle_interval=POLL_IDLE_INTERVAL,
+                           down_interval=POLL_DOWN_INTERVAL)
+config_watcher = watcher.ConfigWatcher(interval=CONFIG_RELOAD_INTERVAL)
+# Running follow-ups of power commands, kept so they aren't garbage collected
+follow_ups = set()
+
+
+# The pinned status message in each channel, kept across restarts
+live_status = livestatus.LiveStatus(DISCORD_CHANNEL, send=post_live_status,
+                                    edit=edit_live_status, path='livestatus.json',
+                                    interval=LIVE_STATUS_INTERVAL,
+                                    rate_limit=updates.RateLimit(updates.MESSAGE_LIMIT,
+                                                                 updates.MESSAGE_WINDOW)) \
+    if LIVE_STATUS_INTERVAL > 0 and DISCORD_CHANNEL else None
+if live_status is not None:
+    try:
+        live_status.load()
+    except FileNotFoundError:
+        pass
+
+
+# Each host's shared boot, shutdown and reboot cooldown and each user's
+# rate limit, kept across restarts
+cooldowns = cooldown.Cooldowns('cooldowns.json')
+try:
+    cooldowns.load()
+except FileNotFoundError:
+    pass
+
+
+def target_hosts(host) -> list:
+    """
+    Returns the named host, or every host if none is named.
+    Raises KeyError if there's no host of that name.
+    """
+    if host is None:
+        return list(hosts.list_hosts().values())
+    return [hosts.list_hosts()[host]]
+
+
+def host_option():
+    """
+    Slash command option for picking a host, acting on all of them if left empty
+    """
+    return discord.option(
+        "host",
+        description="Host to act on, all hosts if left empty.",
+        required=False,
+        default=None,
+        autocomplete=discord.utils.basic_autocomplete(lambda ctx: list(hosts.list_hosts()))
+    )
+
+
+async def anyone_active(host) -> tuple[bool, list]:
+    """
+    Answers straight from the poller's snapshot when it shows players online
+    on the host, as refusing on that is always safe. Otherwise confirms with
+    a sweep of the host's servers that only takes cached results younger
+    than the cache TTL and queries the rest, so it's never powered down on
+    stale data.
+    """
+    names = None if hosts.ALL_SERVERS in host['servers'] else host['servers']
+    snapshot = poller.snapshot
+    if snapshot is not None and names is not None:
+        snapshot = gamepoller.Snapshot(
+            {name: result for name, result in snapshot.players.items() if name in names},
+            snapshot.taken_at)
+    if snapshot is not None and snapshot.total_players > 0 \
+            and snapshot.age < poller.active_interval * 2:
+        return True, snapshot.failed
+    return await gamequery.is_anyone_active(names=names)
+
+
+def get_cooldown(host) -> int:
+    """
+    Returns the shared cooldown in seconds left on a host
+    """
+    return math.ceil(cooldowns.remaining(f'host:{host["name"]}'))
+
+
+def start_cooldown(host):
+    """
+    Puts boot, shutdown and reboot on cooldown for a host. They share one
+    cooldown so they can't be chained together and hang the machine.
+    """
+    cooldowns.start(f'host:{host["name"]}', COOLDOWN)
+
+
+def reset_cooldown(host):
+    """
+    Lifts the cooldown on a host
+    """
+    cooldowns.reset(f'host:{host["name"]}')
+
+
+def per_host_message(targets, outcomes) -> str:
+    """
+    Returns the outcome when acting on one host,
+    or a line per host when acting on several
+    """
+    if len(targets) == 1:
+        return outcomes[0]
+    return '\n'.join(f'`{host["name"]}`: {outcome}'
+                     for host, outcome in zip(targets, outcomes))
+
+
+async def respond_per_host(ctx, targets, outcomes):
+    """
+    Responds with the outcome on each host, returns the response
+    """
+    return await ctx.respond(per_host_message(targets, outcomes))
+
+
+async def edit_response(response, **fields):
+    """
+    Edits a response's content or embed, the response being the
+    interaction itself when it was the first response and a followup
+    message otherwise
+    """
+    if isinstance(response, discord.Interaction):
+        await response.edit_original_response(**fields)
+    else:
+        await response.edit(**fields)
+
+
+async def follow_up(response, targets, outcomes, follow, followed):
+    """
+    Keeps a response up to date as follow, an async iterator of new
+    outcomes for a host, yields them for each of the followed hosts
     """
-    Responds to a user calling a function that's currently on cooldown.
-    """
-    if isinstance(error, commands.CommandOnCooldown):
-        cooldown = round(ctx.command.get_cooldown_retry_after(ctx))
-        await ctx.respond(f'`/{ctx.command.name}` is currently on cooldown. '
-                          f'Please wait another {cooldown}s before retrying, '
-                          f'or retry with `/sudo {ctx.command.name}`.')
-
-    elif isinstance(error, discord.errors.CheckFailure):
-        # Since only one command can ever be on an individual cooldown,
-        # addition works. One could get a cooldown via ctx.command.name
-        # but we can't artificially set a cooldown, so this is the way
-        # to link all commands to a shared CD
-        cooldown = get_cooldown(ctx)
-        sudoer = False
-        for role in ctx.author.roles:
-            if role.id in SUDO_ROLE or str(role.name) in SUDO_ROLE:
-                sudoer = True
+    async def follow_host(index, target):
+        async for outcome in follow(target):
+            outcomes[index] = outcome
+            await edit_response(response, content=per_host_message(targets, outcomes))
+
+    try:
+        await asyncio.gather(*(follow_host(index, target)
+                               for index, target in enumerate(targets)
+                               if target['name'] in followed))
+    except discord.HTTPException:
+        logger.warning("Couldn't update the response any further", exc_info=True)
+    except Exception:
+        logger.exception("Following up on %s failed",
+                         ", ".join(target['name'] for target in targets))
+
+
+async def power_command(ctx, command, host, action, override: bool = False,
+                        follow=None) -> bool:
+    """
+    Runs a power action concurrently on the targeted hosts that aren't on
+    cooldown, and responds with how it went on each. action is awaited
+    with a host and returns a tuple of whether it succeeded and the
+    outcome to report. Returns whether it succeeded on any host.
+    override ignores cooldowns and rate limits.
+
+    follow, if given, is called with each host the action succeeded on
+    and returns an async iterator of outcomes to update the response
+    with, which runs on in the background.
+    """
+    try:
+        targets = target_hosts(host)
+    except KeyError:
+        await ctx.respond(f'There\'s no host called `{host}`.')
+        return False
+    ready = [target for target in targets if override or get_cooldown(target) == 0]
+    if not ready:
+        seconds_left = max(get_cooldown(target) for target in targets)
+        sudoer = any(role.id in SUDO_ROLE or str(role.name) in SUDO_ROLE
+                     for role in ctx.author.roles)
         if sudoer:
-            await _sudo(ctx, command=ctx.command.name)
+            await confirm_sudo(ctx, command, host)
         else:
-            await ctx.respond(f'`/{ctx.command.name}` is currently on cooldown. '
-                              f'Please wait another {cooldown}s before retrying.')
+            await ctx.respond(f'`/{command}` is currently on cooldown. '
+                              f'Please wait another {seconds_left}s before retrying.')
+        return False
+    if not override and USER_RATE_LIMIT > 0:
+        retry_after = cooldowns.hit(f'user:{ctx.author.id}', USER_RATE_LIMIT, USER_RATE_WINDOW)
+        if retry_after > 0:
+            await ctx.respond(f'You\'ve run {USER_RATE_LIMIT} power commands recently. '
+                              f'Please wait another {math.ceil(retry_after)}s before retrying.')
+            return False
+
+    await defer(ctx)
+    for target in ready:
+        start_cooldown(target)
+    results = dict(zip((target['name'] for target in ready),
+                       await asyncio.gather(*(action(target) for target in ready))))
+    outcomes = []
+    for target in targets:
+        if target['name'] in results:
+            outcomes.append(results[target['name']][1])
+        else:
+            outcomes.append(f'On cooldown for another {get_cooldown(target)}s.')
+    response = await respond_per_host(ctx, targets, outcomes)
+    followed = [name for name, (succeeded, _) in results.items() if succeeded]
+    if follow is not None and followed:
+        task = asyncio.ensure_future(follow_up(response, targets, outcomes, follow, followed))
+        follow_ups.add(task)
+        task.add_done_callback(follow_ups.discard)
+    return any(succeeded for succeeded, _ in results.values())
+
+
+async def boot_host(host) -> tuple[bool, str]:
+    """
+    Boots a host, returns whether it worked and the outcome to report
+    """
+    try:
+        _, body = await power_request(host['wol_url'], 'boot')
+        if json.loads(body.decode()).get('success') is True:
+            return True, 'Server booted!'
+    except Exception:
+        logger.exception("Boot of %s failed", host['name'])
+    return False, 'Something went wrong, have an adult check the logs'
+
+
+async def shutdown_host(host, override: bool) -> tuple[bool, str]:
+    """
+    Shuts down a host unless someone is online on one of its game servers,
+    returns whether it worked and the outcome to report
+    """
+    try:
+        #TODO:myles - Add failed server query feedback to user
+        is_anyone_active = await anyone_active(host)
+        if is_anyone_active[0] and not override:
+            return False, 'Server can\'t be shut down, someone is online!'
+        status_code, _ = await power_request(host['shutdown_url'], 'shutdown',
+                                             idempotent=False)
+        if status_code == 200:
+            return True, 'Server shut down!'
+    except Exception:
+        logger.exception("Shutdown of %s failed", host['name'])
+    return False, 'Server is already offline or gameservers are down'
+
+
+async def reboot_host(host, override: bool) -> tuple[bool, str]:
+    """
+    Reboots a host unless someone is online on one of its game servers,
+    returns whether it worked and the outcome to report
+    """
+    try:
+        #TODO:myles - Add failed server query feedback to user
+        is_anyone_active = await anyone_active(host)
+        if is_anyone_active[0] and not override:
+            return False, 'Server can\'t be rebooted, someone is online!'
+        status_code, _ = await power_request(host['reboot_url'], 'reboot',
+                                             idempotent=False)
+        if status_code == 200:
+            return True, 'Server rebooting!'
+    except Exception:
+        logger.exception("Reboot of %s failed", host['name'])
+    return False, 'Server is already offline'
 
-    elif isinstance(error, commands.errors.MissingAnyRole):
-        await ctx.respond(f'Sorry, you don\'t have the required role to use `/{ctx.command.name}`. '
+
+def host_server_names(host) -> list:
+    """
+    Returns the names of the game servers a host runs
+    """
+    if hosts.ALL_SERVERS in host['servers']:
+        return list(servers.list_servers())
+    return list(host['servers'])
+
+
+async def server_up(name: str) -> bool:
+    """
+    Checks whether a game server answers a details query, which every
+    backend supports, even those that can't count players. The query goes
+    ahead even if the server's breaker opened while it was down.
+    """
+    server = servers.get_server(name)
+    return server is not None \
+        and await gamequery.get_server_details(server, bypass_breaker=True) is not None
+
+
+def describe_boot(progress: readiness.BootProgress) -> str:
+    """
+    Returns the outcome to report for a booted host as it comes up
+    """
+    minutes = round(BOOT_READY_TIMEOUT / 60)
+    waiting_on = ', '.join(f'`{name}`' for name in progress.waiting_on)
+    if progress.ready:
+        return 'Server is up and all game servers are ready!'
+    if not progress.host_up:
+        if progress.finished:
+            return f'Server booted but didn\'t come up within {minutes} minutes, ' \
+                   f'have an adult check on it'
+        return 'Server booted! Waiting for it to come up...'
+    if progress.finished:
+        return f'Server is up but {waiting_on} didn\'t answer within {minutes} minutes'
+    ready = len(progress.servers) - len(progress.waiting_on)
+    return f'Server is up! {ready}/{len(progress.servers)} game servers ready, ' \
+           f'waiting on {waiting_on}...'
+
+
+async def follow_boot(host):
+    """
+    Yields the outcome of a boot each time the host or one of its game
+    servers comes up, until they all have or BOOT_READY_TIMEOUT runs out
+    """
+    probes = {name: (lambda name=name: server_up(name)) for name in host_server_names(host)}
+    async for progress in readiness.watch_boot(lambda: host_up(host), probes,
+                                               timeout=BOOT_READY_TIMEOUT):
+        yield describe_boot(progress)
+
+
+async def host_up(host) -> bool:
+    """
+    Checks whether a host answers on its liveness URL
+    """
+    try:
+        # A host that's down is an expected answer here, so don't retry
+        status_code, _ = await power_request(host['liveness_url'], 'liveness', retries=0)
+        return status_code == 200
+    except ConnectionError:
+        logger.info("Host %s is offline", host['name'], exc_info=True)
+        return False
+
+
+@bot.event
+async def on_application_command_error(ctx, error):
+    """
+    Responds to a user calling a function they lack the role for,
+    raises all further exceptions. Runs for every command that fails.
+    """
+    # Failed commands never complete, so stop timing them here
+    command_started.pop(ctx.interaction.id, None)
+    if isinstance(error, commands.errors.MissingAnyRole):
+        await ctx.respond(f'Sorry, you don\'t have the required role to use `/{ctx.command.qualified_name}`. '
                           f'Ask an adult to add you to one of these roles: '
                           f'`{", ".join(str(x) for x in POWERBOT_ROLE)}`'
                           f', or for `/sudo` commands: '
@@ -130,91 +741,225 @@ async def on_application_command_error(ctx, error):
         raise error  # Here we raise other errors to ensure they aren't ignored
 
 
+async def announce(message: str):
+    """
+    Posts a message in every channel in DISCORD_CHANNEL
+    """
+    for channel_id in DISCORD_CHANNEL:
+        channel = bot.get_channel(channel_id)
+        if channel is None:
+            logger.warning("Can't announce in channel %s, the bot can't see it", channel_id)
+            continue
+        await channel.send(message)
+
+
+def idle_hosts() -> list:
+    """
+    Returns the hosts running game servers, which are the ones whose
+    idleness can be told
+    """
+    return [host for host in hosts.list_hosts().values()
+            if host['servers'] and (hosts.ALL_SERVERS not in host['servers']
+                                    or servers.list_servers())]
+
+
+async def idle_shutdown_host(host) -> bool:
+    """
+    Shuts down an idle host unless it's on cooldown, sharing the cooldown
+    with /shutdown so the two can't chain. The cooldown only starts once
+    the host was shut down, so a shutdown refused because someone just
+    joined, or that failed, leaves the host free to /reboot. Returns
+    whether it was shut down.
+    """
+    if get_cooldown(host) > 0:
+        return False
+    shut_down, outcome = await shutdown_host(host, override=False)
+    if shut_down:
+        start_cooldown(host)
+        set_presence(discord.Status.do_not_disturb, "Powering down...")
+    else:
+        logger.warning("Idle shutdown of %s didn't go through: %s", host['name'], outcome)
+    return shut_down
+
+
+idle_shutdown = idle.IdleShutdown(hosts=idle_hosts, is_active=anyone_active,
+                                  shutdown=idle_shutdown_host, announce=announce,
+                                  idle_after=IDLE_SHUTDOWN_MINUTES * 60)
+
+
 @bot.event
 async def on_ready():
     """
     Runs on bot boot and updates the status of the bot in Discord
     """
-    game = discord.Activity(
-        name="Standing by...", type=discord.ActivityType.playing)
-    await bot.change_presence(status=discord.Status.idle, activity=game)
-    print('Connected to API')
+    set_presence(discord.Status.idle, "Standing by...")
+    logger.info('Connected to API')
+    # on_ready fires again on reconnects, start() ignores those
+    poller.start()
+    if CONFIG_RELOAD_INTERVAL > 0:
+        config_watcher.start()
+    if IDLE_SHUTDOWN_MINUTES > 0:
+        idle_shutdown.start()
+    global metrics_runner
+    if METRICS_PORT is not None and metrics_runner is None:
+        metrics_runner = await metrics.start_server(METRICS_PORT, METRICS_HOST)
+
+
+@bot.event
+async def on_application_command(ctx):
+    """
+    Notes when a slash command started, to time it end to end
+    """
+    command_started[ctx.interaction.id] = time.perf_counter()
+
+
+@bot.event
+async def on_application_command_completion(ctx):
+    """
+    Records how long a slash command took end to end
+    """
+    started = command_started.pop(ctx.interaction.id, None)
+    if started is not None:
+        metrics.COMMAND_LATENCY.observe(time.perf_counter() - started,
+                                        command=ctx.command.qualified_name)
+
+
+async def boot(ctx, host, override: bool = False):
+    """
+    Boots the host, or every host, then follows it until it's ready
+    """
+    follow = follow_boot if BOOT_READY_TIMEOUT > 0 else None
+    if await power_command(ctx, "boot", host, boot_host, override=override, follow=follow):
+        set_presence(discord.Status.online, "Booting...")
+
+
+async def shutdown(ctx, host, override: bool = False):
+    """
+    Shuts down the host, or every host, unless someone is online on it
+    and the check isn't overridden
+    """
+    if await power_command(ctx, "shutdown", host,
+                           lambda target: shutdown_host(target, override), override=override):
+        set_presence(discord.Status.do_not_disturb, "Powering down...")
+
+
+async def reboot(ctx, host, override: bool = False):
+    """
+    Reboots the host, or every host, unless someone is online on it
+    and the check isn't overridden
+    """
+    if await power_command(ctx, "reboot", host,
+                           lambda target: reboot_host(target, override), override=override):
+        set_presence(discord.Status.streaming, "Rebooting...")
+
+
+power_commands = {'boot': boot, 'shutdown': shutdown, 'reboot': reboot}
 
 
 @bot.slash_command(name="boot", description="Boots the game server")
-@commands.cooldown(rate=1, per=float(COOLDOWN), type=commands.BucketType.guild)
-@commands.check(check_cooldown)
 # https://github.com/Pycord-Development/pycord/issues/974
 @commands.has_any_role(*POWERBOT_ROLE)
-async def _boot(ctx):
+@host_option()
+async def _boot(ctx, host):
     """
-    Boots the server, returns an error message if any exception is caught
+    Boots the host, or every host, returns an error message if any exception is caught
     """
-    try:
-        response = requests.get(WOL_URL, timeout=2)
-        jsonresponse = json.loads(response.content.decode())
-        if jsonresponse.get('success') is True:
-            game = discord.Activity(
-                name="Booting...", type=discord.ActivityType.playing)
-            await bot.change_presence(status=discord.Status.online, activity=game)
-            await ctx.respond('Server booted!')
-    except Exception:
-        await ctx.respond('Something went wrong, have an adult check the logs')
-        traceback.print_exc()
+    await boot(ctx, host)
 
 
 @bot.slash_command(name="shutdown", description="Shuts down the game server")
-@commands.cooldown(rate=1, per=float(COOLDOWN), type=commands.BucketType.guild)
-@commands.check(check_cooldown)
 # https://github.com/Pycord-Development/pycord/issues/974
 @commands.has_any_role(*POWERBOT_ROLE)
-async def _shutdown(ctx):
+@host_option()
+async def _shutdown(ctx, host):
     """
-    Shuts down the server under the condition of no player being online and 
-    the function not being called via sudo
+    Shuts down the host, or every host, under the condition of no player
+    being online on it
     """
-    try:
-        #TODO:myles - Add failed server query feedback to user
-        is_anyone_active = gamequery.is_anyone_active()
-        if is_anyone_active[0] and not ctx.author == 'sudo':
-            await ctx.respond('Server can\'t be shut down, someone is online!')
-        else:
-            response = requests.get(SHUTDOWN_URL, timeout=2)
-            if response.status_code == 200:
-                game = discord.Activity(
-                    name="Powering down...", type=discord.ActivityType.playing)
-                await bot.change_presence(status=discord.Status.do_not_disturb, activity=game)
-                await ctx.respond('Server shut down!')
-    except Exception:
-        await ctx.respond('Server is already offline or gameservers are down')
-        traceback.print_exc()
+    await shutdown(ctx, host)
 
 
 @bot.slash_command(name="reboot", description="Reboots the game server")
-@commands.cooldown(rate=1, per=float(COOLDOWN), type=commands.BucketType.guild)
-@commands.check(check_cooldown)
 # https://github.com/Pycord-Development/pycord/issues/974
 @commands.has_any_role(*POWERBOT_ROLE)
-async def _reboot(ctx):
+@host_option()
+async def _reboot(ctx, host):
     """
-    reboots the server under the condition of no player being online and
-    the function not being called via sudo
+    reboots the host, or every host, under the condition of no player
+    being online on it
+    """
+    await reboot(ctx, host)
+
+
+class SudoConfirmation(discord.ui.View):
+    """
+    Buttons for whoever asked to force a power command to confirm or
+    cancel it with. Each request gets its own, so any number can be
+    pending at once, and it's disabled once answered or timed out.
+    """
+
+    def __init__(self, ctx, command: str, host, targets: list):
+        super().__init__(timeout=SUDO_CONFIRM_TIMEOUT, disable_on_timeout=True)
+        self.ctx = ctx
+        self.command = command
+        self.host = host
+        self.targets = targets
+
+    async def interaction_check(self, interaction) -> bool:
+        if interaction.user.id == self.ctx.author.id:
+            return True
+        await interaction.response.send_message(
+            f'Only {self.ctx.author.mention} can confirm this.', ephemeral=True)
+        return False
+
+    async def close(self, interaction):
+        """
+        Stops listening for clicks and disables the buttons
+        """
+        self.stop()
+        self.disable_all_items()
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(label="Force it", style=discord.ButtonStyle.danger, emoji='\N{Squared SOS}')
+    async def confirm(self, _, interaction):
+        """
+        Lifts the cooldown on the targeted hosts and runs the command,
+        overriding the check for players online
+        """
+        await self.close(interaction)
+        for target in self.targets:
+            reset_cooldown(target)
+        await power_commands[self.command](self.ctx, self.host, override=True)
+        await self.ctx.respond(f'`{self.command}` executed.')
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    async def cancel(self, _, interaction):
+        """
+        Leaves things as they are
+        """
+        await self.close(interaction)
+
+
+async def confirm_sudo(ctx, command, host):
+    """
+    Asks for confirmation before forcing a power command regardless of
+    cooldown and of anyone being online
     """
     try:
-        #TODO:myles - Add failed server query feedback to user
-        is_anyone_active = gamequery.is_anyone_active()
-        if is_anyone_active[0] and not ctx.author == 'sudo':
-            await ctx.respond('Server can\'t be rebooted, someone is online!')
-        else:
-            response = requests.get(REBOOT_URL, timeout=2)
-            if response.status_code == 200:
-                game = discord.Activity(
-                    name="Rebooting...", type=discord.ActivityType.playing)
-                await bot.change_presence(status=discord.Status.streaming, activity=game)
-                await ctx.respond('Server rebooting!')
-    except Exception:
-        await ctx.respond('Server is already offline')
-        traceback.print_exc()
+        targets = target_hosts(host)
+    except KeyError:
+        await ctx.respond(f'There\'s no host called `{host}`.')
+        return
+    embed = discord.Embed(type="rich", colour=discord.Colour.red())
+    embed.title = '<:warning:1043511363441537046>' \
+                  ' WARNING <:warning:1043511363441537046>'
+    seconds_left = max(get_cooldown(target) for target in targets)
+    if seconds_left > 0:
+        embed.description = f'Are you sure that you want to force `{command}`? ' \
+                            f'It\'s still on cooldown for another {seconds_left}s.'
+    else:
+        embed.description = f'Are you sure that you want to force `{command}`?'
+    await ctx.respond(embed=embed, view=SudoConfirmation(ctx, command, host, targets))
 
 
 @bot.slash_command(name="sudo", description="Use commands regardless of their cooldown")
@@ -225,72 +970,315 @@ async def _reboot(ctx):
     description="Command to be run ignoring any cooldown.",
     choices=["boot", "reboot", "shutdown"]
 )
-async def _sudo(ctx, command):
+@host_option()
+async def _sudo(ctx, command, host):
     """
     Allows to bypass cooldowns that are usually placed upon power functions
-    by resetting them all and then invoking the supplied command.
-    Sets the command author to override the online check.
+    by resetting them on the targeted hosts and then running the supplied
+    command, also overriding the online check, once confirmed.
     """
-    embed = discord.Embed(type="rich", colour=discord.Colour.red())
-    embed.title = '<:warning:1043511363441537046>' \
-                  ' WARNING <:warning:1043511363441537046>'
-    cooldown = get_cooldown(ctx)
-    if cooldown > 0:
-        embed.description = f'Are you sure that you want to force `{command}`? ' \
-                            f'It\'s still on cooldown for another {cooldown}s. ' \
-                            'If yes, react with <:sos:1043671788007211108>.'
+    await confirm_sudo(ctx, command, host)
+
+
+@bot.slash_command(name="status",
+                   description="Checks the power status of the hosts and how their game servers are doing")
+@host_option()
+async def _status(ctx, host):
+    """
+    Checks every host's power and queries all of their game servers at
+    once, responding within a second with whatever has answered and
+    editing the response as the rest do
+    """
+    try:
+        targets = target_hosts(host)
+    except KeyError:
+        await ctx.respond(f'There\'s no host called `{host}`.')
+        return
+    checks = {('host', target['name']): (lambda target=target: host_up(target))
+              for target in targets}
+    for target in targets:
+        for name in host_server_names(target):
+            server = servers.get_server(name)
+            if server is not None:
+                checks[('server', name)] = \
+                    lambda server=server: gamequery.get_server_details(server)
+    response = None
+    try:
+        async for progress in dashboard.watch_sweep(checks, timeout=gamequery.QUERY_TIMEOUT):
+            embed = status_embed(targets, progress)
+            if response is None:
+                response = await ctx.respond(embed=embed)
+            else:
+                await edit_response(response, embed=embed)
+    except discord.HTTPException:
+        logger.warning("Couldn't update the status response any further", exc_info=True)
+        return
+    up = [progress.results[('host', target['name'])] for target in targets]
+    if any(up):
+        set_presence(discord.Status.online, "Server online")
     else:
-        embed.description = f'Are you sure that you want to force `{command}`? ' \
-                            'If yes, react with <:sos:1043671788007211108>.'
-    res = await ctx.respond(embed=embed)
-    msg = await res.original_response()
-    # default emojis need to be unicode
-    await msg.add_reaction('\N{Squared SOS}')
-
-    def check(reaction, user):
-        return user == ctx.author and str(reaction.emoji) == '\N{Squared SOS}'
+        set_presence(discord.Status.idle, "Server offline")
+
+
+def describe_server_status(name: str, progress: dashboard.SweepProgress) -> str:
+    """
+    Returns a one line summary of how a game server answered the /status
+    sweep, with its game, players, map and latency
+    """
+    server = servers.get_server(name)
+    game = server['server_type'].value if server is not None else 'Unknown'
+    key = ('server', name)
+    if key not in progress.results:
+        return f'`{name}`: {game}, pending...'
+    details = progress.results[key]
+    if details is None:
+        unreachable = gamequery.breakers.unreachable()
+        if name in unreachable:
+            return f'`{name}`: {game}, not answering ' \
+                   f'(retrying in {math.ceil(unreachable[name])}s)'
+        return f'`{name}`: {game}, not answering'
+    if details.get('players') is None:
+        line = f'`{name}`: {game}, players unknown'
+    else:
+        line = f'`{name}`: {game}, {details["players"]}/{details.get("max_players")} players'
+    if details.get('map'):
+        line += f' on {details["map"]}'
+    return line + f', {progress.latencies[key] * 1000:.0f}ms'
+
+
+def status_embed(targets, progress: dashboard.SweepProgress) -> discord.Embed:
+    """
+    Returns the /status embed, each host's power state followed by
+    its game servers
+    """
+    lines = []
+    for target in targets:
+        key = ('host', target['name'])
+        if key not in progress.results:
+            lines.append(f'**{target["name"]}** is pending...')
+        else:
+            lines.append(f'**{target["name"]}** is {"up" if progress.results[key] else "offline"}')
+        lines.extend(describe_server_status(name, progress) for name in host_server_names(target)
+                     if ('server', name) in progress.checks)
+    embed = discord.Embed(title='Status', description=capped_lines(lines, 4000),
+                          colour=discord.Colour.blurple())
+    if not progress.finished:
+        embed.set_footer(text='Still waiting on some servers, this will update as they answer.')
+    return embed
+
+
+server_commands = bot.create_group("server", "Manages the game servers the bot watches")
+
+
+def server_option(description: str):
+    """
+    Slash command option for picking a game server by name
+    """
+    return discord.option(
+        "name",
+        description=description,
+        autocomplete=discord.utils.basic_autocomplete(lambda ctx: list(servers.list_servers()))
+    )
+
+
+def describe_server(server) -> str:
+    """
+    Returns a one line summary of a game server
+    """
+    return f'`{server["name"]}`: {server["server_type"].value} at ' \
+           f'{server["ip_address"]}:{server["port"]}'
+
+
+def capped_lines(lines: list, limit: int = 1900) -> str:
+    """
+    Joins lines into a message, cutting it short at limit to fit
+    Discord's cap of 2000 characters, or 4096 for an embed's description
+    """
+    message = ''
+    for shown, line in enumerate(lines):
+        if len(message) + len(line) > limit:
+            message += f'...and {len(lines) - shown} more.'
+            break
+        message += line + '\n'
+    return message
+
+
+def validation_message(error: ValidationError) -> str:
+    """
+    Returns a readable summary of what was wrong with a server entry
+    """
+    return ', '.join(f'{field} {" ".join(messages)}'.lower()
+                     for field, messages in error.normalized_messages().items())
+
+
+@server_commands.command(name="add", description="Adds a game server to watch")
+# https://github.com/Pycord-Development/pycord/issues/974
+@commands.has_any_role(*SUDO_ROLE)
+@discord.option("name", description="Name to show for the server.")
+@discord.option("ip_address", description="IPv4 or IPv6 address of the server.")
+@discord.option("port", int, description="Query port of the server.")
+@discord.option("server_type", description="Game the server runs.",
+                choices=[server_type.value for server_type in servers.ServerType])
+@discord.option("password", description="API token or password, if the game needs one.",
+                required=False, default="")
+async def _server_add(ctx, name, ip_address, port, server_type, password):
+    """
+    Adds a game server, which is saved and polled from then on
+    """
     try:
-        await bot.wait_for('reaction_add', timeout=5.0, check=check)
-    except asyncTimeoutError:
-        await msg.clear_reactions()
+        server = servers.add_server(name, ip_address, port, server_type, password)
+    except ValidationError as error:
+        await ctx.respond(f'Couldn\'t add `{name}`: {validation_message(error)}.')
+    except ValueError:
+        await ctx.respond(f'There\'s already a server called `{name}`.')
     else:
-        bot.get_application_command(name="boot").reset_cooldown(ctx)
-        bot.get_application_command(name="reboot").reset_cooldown(ctx)
-        bot.get_application_command(name="shutdown").reset_cooldown(ctx)
-        ctx.author = 'sudo'
-        await ctx.invoke(bot.get_application_command(command))
-        await ctx.respond(f'`{command}` executed.')
+        await ctx.respond(f'Added {describe_server(server)}.')
 
 
-@bot.slash_command(name="status",
-                   description="Checks current power status of game server")
-async def _status(ctx):
+@server_commands.command(name="remove", description="Stops watching a game server")
+# https://github.com/Pycord-Development/pycord/issues/974
+@commands.has_any_role(*SUDO_ROLE)
+@server_option("Server to remove.")
+async def _server_remove(ctx, name):
+    """
+    Removes a game server, dropping its cached state
+    """
+    try:
+        if name == '*':
+            # Which delete_server takes as every server
+            raise KeyError(name)
+        servers.delete_server(name)
+    except KeyError:
+        await ctx.respond(f'There\'s no server called `{name}`.')
+    else:
+        await ctx.respond(f'Removed `{name}`.')
+
+
+@server_commands.command(name="update", description="Changes a game server's details")
+# https://github.com/Pycord-Development/pycord/issues/974
+@commands.has_any_role(*SUDO_ROLE)
+@server_option("Server to change.")
+@discord.option("ip_address", description="New IPv4 or IPv6 address.",
+                required=False, default=None)
+@discord.option("port", int, description="New query port.", required=False, default=None)
+@discord.option("server_type", description="New game.", required=False, default=None,
+                choices=[server_type.value for server_type in servers.ServerType])
+@discord.option("password", description="New API token or password.",
+                required=False, default=None)
+async def _server_update(ctx, name, ip_address, port, server_type, password):
+    """
+    Changes the given details of a game server, keeping the rest
+    """
+    server = servers.get_server(name)
+    if server is None:
+        await ctx.respond(f'There\'s no server called `{name}`.')
+        return
+    server_info = dict(server, ip_address=str(server['ip_address']),
+                       server_type=server['server_type'].value)
+    changes = {'ip_address': ip_address, 'port': port,
+               'server_type': server_type, 'password': password}
+    server_info.update({key: value for key, value in changes.items() if value is not None})
     try:
-        response = requests.get(LIVENESS_URL, timeout=2)
-        if response.status_code == 200:
-            game = discord.Activity(
-                name="Server online", type=discord.ActivityType.playing)
-            await bot.change_presence(status=discord.Status.online, activity=game)
-            await ctx.respond('Server is up!')
-    except requests.exceptions.RequestException:
-        game = discord.Activity(
-            name="Server offline", type=discord.ActivityType.playing)
-        await bot.change_presence(status=discord.Status.idle, activity=game)
-        await ctx.respond('Server is offline')
-        print("Server host is offline")
-        traceback.print_exc()
-
-
-@_boot.error
-@_shutdown.error
-@_reboot.error
-@_sudo.error
-async def _error(ctx, error):
-    """
-    Combined function to handle failed role checks,
-    raises all further exceptions
-    """
-    await on_application_command_error(ctx, error)
+        servers.update_server(name, server_info)
+    except ValidationError as error:
+        await ctx.respond(f'Couldn\'t update `{name}`: {validation_message(error)}.')
+    else:
+        await ctx.respond(f'Updated {describe_server(servers.get_server(name))}.')
+
+
+@server_commands.command(name="list", description="Lists the game servers being watched")
+# https://github.com/Pycord-Development/pycord/issues/974
+@commands.has_any_role(*SUDO_ROLE)
+@discord.option("server_type", description="Only list servers of this game.",
+                required=False, default=None,
+                choices=[server_type.value for server_type in servers.ServerType])
+@discord.option("ip_address", description="Only list servers at this address.",
+                required=False, default=None,
+                autocomplete=discord.utils.basic_autocomplete(
+                    lambda ctx: sorted({str(server['ip_address'])
+                                        for server in servers.list_servers().values()})))
+async def _server_list(ctx, server_type, ip_address):
+    """
+    Lists the game servers, optionally only those of one game or at one address
+    """
+    if ip_address is not None:
+        try:
+            matches = servers.servers_on_host(ip_address)
+        except ValueError:
+            await ctx.respond(f'`{ip_address}` isn\'t an IP address.')
+            return
+        if server_type is not None:
+            matches = {name: server for name, server in matches.items()
+                       if server['server_type'] == server_type}
+    elif server_type is not None:
+        matches = servers.servers_of_type(server_type)
+    else:
+        matches = servers.list_servers()
+    if not matches:
+        await ctx.respond('No servers found.')
+        return
+    await ctx.respond(capped_lines([describe_server(server) for server in matches.values()]))
+
+
+@server_commands.command(name="test", description="Queries a game server once and times it")
+# https://github.com/Pycord-Development/pycord/issues/974
+@commands.has_any_role(*SUDO_ROLE)
+@server_option("Server to query.")
+async def _server_test(ctx, name):
+    """
+    Runs one details query against a game server, which every backend
+    answers, and reports how long it took. The query is sent even if the
+    server's breaker is open.
+    """
+    server = servers.get_server(name)
+    if server is None:
+        await ctx.respond(f'There\'s no server called `{name}`.')
+        return
+    await defer(ctx)
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(
+            gamequery.get_server_details(server, bypass_breaker=True), gamequery.QUERY_TIMEOUT)
+    except asyncio.TimeoutError:
+        result = None
+    except Exception:
+        logger.exception("Test query to %s failed", name)
+        result = None
+    latency = (time.perf_counter() - start) * 1000
+    if result is None:
+        await ctx.respond(f'`{name}` didn\'t answer, gave up after {latency:.0f}ms.')
+    elif result.get('players') is None:
+        await ctx.respond(f'`{name}` answered in {latency:.0f}ms, '
+                          f'its game doesn\'t say how many players are on.')
+    else:
+        await ctx.respond(f'`{name}` answered in {latency:.0f}ms with '
+                          f'{result["players"]}/{result.get("max_players")} players.')
+
+
+@bot.slash_command(name="stats", description="Shows how much the game servers get played")
+@discord.option("server", description="Server to show, all servers if left empty.",
+                required=False, default=None,
+                autocomplete=discord.utils.basic_autocomplete(lambda ctx: list(servers.list_servers())))
+@discord.option("days", int, description="Days to look back over.", required=False,
+                default=30, min_value=1)
+async def _stats(ctx, server, days):
+    """
+    Reports players, player hours and the busiest time of day
+    on each game server, from the hourly rollups
+    """
+    if player_history is None:
+        await ctx.respond('Player history is turned off.')
+        return
+    player_history.flush()
+    usage = player_history.stats(days, server)
+    if not usage:
+        await ctx.respond(f'There\'s no history from the last {days} days yet.')
+        return
+    await ctx.respond(capped_lines([
+        f'`{row["server"]}`: {row["player_hours"]:.1f} player hours, '
+        f'{row["average_players"]:.1f} players on average and {row["peak_players"]} at peak, '
+        f'busiest around {row["busiest_hour"]:02d}:00 UTC, '
+        f'{row["players"]} players over {row["sessions"]} sessions' for row in usage]))
 
 
 bot.run(DISCORD_TOKEN)
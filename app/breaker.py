@@ -0,0 +1,162 @@
+"""
+Per-server circuit breakers, so a game server that's down fails fast
+instead of making every query wait out its timeout
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Failed queries in a row that open a breaker, and the first and longest
+# waits in seconds before an open breaker lets a probe through
+FAILURE_THRESHOLD = 3
+RETRY_AFTER = 10.0
+MAX_RETRY_AFTER = 300.0
+
+
+class _Breaker:
+    __slots__ = ('state', 'failures', 'retry_after', 'retry_at', 'probing', 'timer')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.retry_after = 0.0
+        self.retry_at = 0.0
+        self.probing = False
+        self.timer = None
+
+
+class CircuitBreakers:
+    """
+    A circuit breaker per server name. A breaker opens after threshold
+    failures in a row, after which allow() refuses queries until its wait
+    is over. It's then half-open and lets one query through as a probe:
+    success closes it, failure opens it again for twice as long, up to
+    max_retry_after. If given, probe is awaited with a server's name when
+    its wait is over, so the server is retried in the background rather
+    than by whichever command comes next.
+    """
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, retry_after: float = RETRY_AFTER,
+                 max_retry_after: float = MAX_RETRY_AFTER, probe=None, clock=time.monotonic):
+        self.threshold = threshold
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+        self.probe = probe
+        self._clock = clock
+        self._breakers = {}
+        # Background probes, kept so they aren't garbage collected
+        self._probes = set()
+
+    def state(self, name: str) -> str:
+        """
+        Returns the state of a server's breaker
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            return CLOSED
+        if breaker.state == OPEN and self._clock() >= breaker.retry_at:
+            return HALF_OPEN
+        return breaker.state
+
+    def unreachable(self) -> dict:
+        """
+        Returns the servers whose breakers aren't closed, and the seconds
+        until each is next tried
+        """
+        now = self._clock()
+        return {name: max(0.0, breaker.retry_at - now)
+                for name, breaker in self._breakers.items() if breaker.state != CLOSED}
+
+    def allow(self, name: str) -> bool:
+        """
+        Returns whether a query to a server may go ahead. Once an open
+        breaker's wait is over, only the first query after is let through.
+        """
+        breaker = self._breakers.get(name)
+        if breaker is None or breaker.state == CLOSED:
+            return True
+        if breaker.state == OPEN and self._clock() >= breaker.retry_at:
+            breaker.state = HALF_OPEN
+        if breaker.state == HALF_OPEN and not breaker.probing:
+            breaker.probing = True
+            return True
+        return False
+
+    def success(self, name: str):
+        """
+        Records that a server answered, closing its breaker
+        """
+        breaker = self._breakers.pop(name, None)
+        if breaker is not None and breaker.state != CLOSED:
+            logger.info("%s is answering again, closing its breaker", name)
+            self._cancel_timer(breaker)
+
+    def failure(self, name: str):
+        """
+        Records that a server couldn't be reached, opening its breaker
+        once it has failed threshold times in a row or its probe failed
+        """
+        breaker = self._breakers.setdefault(name, _Breaker())
+        breaker.failures += 1
+        if breaker.state == HALF_OPEN:
+            self._open(name, breaker, min(breaker.retry_after * 2, self.max_retry_after))
+        elif breaker.state == CLOSED and breaker.failures >= self.threshold:
+            self._open(name, breaker, self.retry_after)
+
+    def release(self, name: str):
+        """
+        Lets another probe through a half-open breaker, for when a query
+        that was let through ended without telling success from failure
+        """
+        breaker = self._breakers.get(name)
+        if breaker is not None:
+            breaker.probing = False
+
+    def forget(self, name: str = None):
+        """
+        Drops a server's breaker, eg. when its entry changes, or every
+        breaker if no name is given
+        """
+        names = list(self._breakers) if name is None else [name]
+        for each in names:
+            breaker = self._breakers.pop(each, None)
+            if breaker is not None:
+                self._cancel_timer(breaker)
+
+    def _open(self, name: str, breaker: _Breaker, retry_after: float):
+        logger.warning("%s failed %s queries in a row, not querying it for %.0fs",
+                       name, breaker.failures, retry_after)
+        breaker.state = OPEN
+        breaker.probing = False
+        breaker.retry_after = retry_after
+        breaker.retry_at = self._clock() + retry_after
+        self._cancel_timer(breaker)
+        if self.probe is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            breaker.timer = loop.call_later(retry_after, self._start_probe, name)
+
+    def _start_probe(self, name: str):
+        task = asyncio.ensure_future(self._run_probe(name))
+        self._probes.add(task)
+        task.add_done_callback(self._probes.discard)
+
+    async def _run_probe(self, name: str):
+        try:
+            await self.probe(name)
+        except Exception:
+            logger.debug("Probe of %s failed", name, exc_info=True)
+
+    @staticmethod
+    def _cancel_timer(breaker: _Breaker):
+        if breaker.timer is not None:
+            breaker.timer.cancel()
+            breaker.timer = None
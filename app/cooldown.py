@@ -0,0 +1,92 @@
+"""
+Shared cooldowns for the power commands and per-user rate limits,
+kept on disk so a restart doesn't lift them
+"""
+import logging
+import time
+from collections import deque
+
+from settingsfile import SettingsFile
+
+logger = logging.getLogger(__name__)
+
+
+class Cooldowns:
+    """
+    Cooldowns by key, eg. one per host shared by boot, shutdown and
+    reboot, and rate limits by user. Times are wall clock so they still
+    mean something after a restart. Saved to path after every change
+    when one is given.
+    """
+
+    def __init__(self, path: str = None, clock=time.time):
+        self.settings_file = SettingsFile(path) if path is not None else None
+        # Key -> when its cooldown runs out
+        self._until = {}
+        # User -> times of their recent commands, oldest first
+        self._hits = {}
+        self._clock = clock
+
+    def remaining(self, key: str) -> float:
+        """
+        Returns the seconds of cooldown left on key
+        """
+        return max(0.0, self._until.get(key, 0) - self._clock())
+
+    def start(self, key: str, duration: float):
+        """
+        Puts key on cooldown for duration seconds
+        """
+        self._until[key] = self._clock() + duration
+        self.save()
+
+    def reset(self, key: str):
+        """
+        Lifts the cooldown on key
+        """
+        if self._until.pop(key, None) is not None:
+            self.save()
+
+    def hit(self, user: str, limit: int, window: float) -> float:
+        """
+        Counts a command by user if they've run fewer than limit in the
+        last window seconds and returns 0, otherwise returns the seconds
+        until they may run another
+        """
+        now = self._clock()
+        hits = self._hits.setdefault(user, deque())
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) >= limit:
+            return hits[0] + window - now
+        hits.append(now)
+        self.save()
+        return 0.0
+
+    def load(self):
+        """
+        Loads the cooldowns saved at path, dropping those already over.
+        Raises FileNotFoundError if nothing has been saved yet.
+        """
+        entries = self.settings_file.load(force=True)
+        now = self._clock()
+        self._until = {entry['name']: entry['until'] for entry in entries
+                       if 'until' in entry and entry['until'] > now}
+        self._hits = {entry['name']: deque(entry['hits']) for entry in entries
+                      if 'hits' in entry}
+
+    def save(self):
+        """
+        Saves the cooldowns that haven't run out to path
+        """
+        if self.settings_file is None:
+            return
+        now = self._clock()
+        entries = [{'name': key, 'until': until}
+                   for key, until in self._until.items() if until > now]
+        entries += [{'name': user, 'hits': list(hits)}
+                    for user, hits in self._hits.items() if hits]
+        try:
+            self.settings_file.save(entries)
+        except Exception:
+            logger.exception("Failed to save cooldowns to disk")
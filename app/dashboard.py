@@ -0,0 +1,88 @@
+"""
+Runs the checks behind /status as one concurrent sweep, reporting what's
+in once a short budget is spent and then again as the rest answer
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before the first report, so /status answers within a
+# second, how long the stragglers get, and the least time between reports
+# after the first so edits to the response don't hit Discord's rate limits
+BUDGET = 0.8
+TIMEOUT = 5.0
+REPORT_INTERVAL = 1.0
+
+
+@dataclass
+class SweepProgress:
+    """
+    How far a sweep has come. results maps each check that's done to its
+    result, None if it failed or ran out of time, and latencies to the
+    seconds it took.
+    """
+    checks: list
+    results: dict = field(default_factory=dict)
+    latencies: dict = field(default_factory=dict)
+    finished: bool = False
+
+    @property
+    def pending(self) -> list:
+        """
+        Checks that haven't finished yet
+        """
+        return [key for key in self.checks if key not in self.results]
+
+
+async def _timed(check, loop) -> tuple:
+    """
+    Awaits check, returning its result, or None if it raised, and how long it took
+    """
+    start = loop.time()
+    try:
+        result = await check()
+    except Exception:
+        logger.debug("Status check failed", exc_info=True)
+        result = None
+    return result, loop.time() - start
+
+
+async def watch_sweep(checks: dict, budget: float = BUDGET, timeout: float = TIMEOUT,
+                      report_interval: float = REPORT_INTERVAL):
+    """
+    Starts every one of checks, a dict of key to a coroutine function, at
+    once and yields a SweepProgress once budget runs out, then at most
+    every report_interval as more finish. The last one has finished set,
+    once every check is done or timeout runs out on those left. If they
+    all finish within budget, that's the only one.
+    """
+    loop = asyncio.get_running_loop()
+    progress = SweepProgress(checks=list(checks))
+    tasks = {asyncio.ensure_future(_timed(check, loop)): key for key, check in checks.items()}
+    deadline = loop.time() + timeout
+    next_report = loop.time() + budget
+    # The first report goes out at the budget even if nothing has finished
+    changed = True
+    try:
+        while tasks:
+            await asyncio.wait(tasks, timeout=max(0.0, min(next_report, deadline) - loop.time()))
+            for task in [task for task in tasks if task.done()]:
+                key = tasks.pop(task)
+                progress.results[key], progress.latencies[key] = task.result()
+                changed = True
+            if not tasks or loop.time() >= deadline:
+                break
+            if changed:
+                yield progress
+                changed = False
+            next_report = loop.time() + report_interval
+    finally:
+        for task in tasks:
+            task.cancel()
+    for key in progress.pending:
+        logger.info("Status check of %s didn't finish within %ss", key, timeout)
+        progress.results[key] = None
+    progress.finished = True
+    yield progress
@@ -0,0 +1,54 @@
+"""
+Coalesces bursts of calls into one, eg. one disk write for a run of edits
+"""
+import asyncio
+
+# Seconds to wait for a burst to end, and the most a call is held back
+DELAY = 1.0
+MAX_DELAY = 5.0
+
+
+class Debouncer:
+    """
+    Runs action once delay seconds after the last trigger(), or max_delay
+    seconds after the first trigger() of a burst that doesn't let up,
+    whichever comes first. action is a plain function run on the event loop.
+    """
+
+    def __init__(self, action, delay: float = DELAY, max_delay: float = MAX_DELAY):
+        self.action = action
+        self.delay = delay
+        self.max_delay = max_delay
+        self._handle = None
+        self._first = None
+
+    @property
+    def pending(self) -> bool:
+        """
+        Whether the action is waiting to run
+        """
+        return self._handle is not None
+
+    def trigger(self):
+        """
+        Schedules the action, pushing back one already scheduled
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._first is None:
+            self._first = now
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = loop.call_at(min(now + self.delay, self._first + self.max_delay),
+                                    self.flush)
+
+    def flush(self):
+        """
+        Runs the action now if it's waiting to run
+        """
+        if self._handle is None:
+            return
+        self._handle.cancel()
+        self._handle = None
+        self._first = None
+        self.action()
@@ -1,272 +1,227 @@
 """
 Queries SteamQuery, DCS, Minecraft and SpaceEngineers instances
 """
-import traceback
+import asyncio
 import logging
-from steam import SteamQuery #SteamQuery
-from mcstatus import JavaServer #Minecraft Java
-from mcstatus import BedrockServer #Minecraft Bedrock
-from vrage_api.vrage_api import VRageAPI #SpaceEngineers
-import network
-from servers import Server, ServerType, list_servers, load_servers, get_server
+import backends
+import metrics
+from breaker import CircuitBreakers
+from querycache import QueryCache
+from servers import Server, list_servers, load_servers, get_server, add_listener
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename='gamequery.log', level=logging.INFO)
-logger.setLevel(logging.DEBUG)
 
-def is_anyone_active() -> tuple[bool, list]:
+# Per-server and whole-sweep deadlines in seconds for is_anyone_active
+QUERY_TIMEOUT = 5.0
+SWEEP_TIMEOUT = 10.0
+
+# Player counts shared by every command, dropped when a server's entry changes
+player_cache = QueryCache()
+add_listener(player_cache.invalidate)
+# Backends keep clients per server, which must not outlive its entry
+add_listener(backends.forget)
+add_listener(lambda name: metrics.PLAYERS.remove(server=name))
+
+
+async def _probe(name: str):
     """
-    Checks all known servers for users currently logged in
-    returns a tuple of a bool and a list
+    Retries a server whose breaker is open with a details query, which
+    every backend answers, and drops its cached player count
+    """
+    server = get_server(name)
+    if server is not None:
+        player_cache.invalidate(name)
+        await asyncio.wait_for(_query(server, 'info'), QUERY_TIMEOUT)
+
+
+# Servers that keep failing are answered as unreachable straight away,
+# and retried in the background until they answer again
+breakers = CircuitBreakers(probe=_probe)
+add_listener(breakers.forget)
+
+
+async def is_anyone_active(query_timeout: float = QUERY_TIMEOUT,
+                           sweep_timeout: float = SWEEP_TIMEOUT,
+                           names: list = None) -> tuple[bool, list]:
+    """
+    Checks all known servers, or only those named, for users currently
+    logged in returns a tuple of a bool and a list of the servers that
+    couldn't be checked: those that failed, can't count their players,
+    or that were named but don't exist
+
+    Servers are queried concurrently, each with its own deadline and
+    the whole sweep with an overall deadline. The sweep stops as soon
+    as any server reports players, as that already decides the answer.
+    Only cached results within the cache's ttl are used, never stale
+    ones, as the answer decides whether a host can be powered down.
     """
     try:
-        player_count = 0
         if list_servers() == {}:
             load_servers()
+        loop = asyncio.get_running_loop()
         failed_queries = []
-        for server in list_servers():
-            try:
-                server = get_server(server)
-                player_count += get_players(server).get('current_players')
-            except AttributeError:
-                logger.warning("No result, couldn't connect to %s, moving on...", server['name'])
-                failed_queries.append(server['name'])
-            except Exception:
-                traceback.print_exc()
-        if player_count > 0:
-            return True, failed_queries
+        if names is None:
+            targets = list_servers().values()
         else:
-            return False, failed_queries
+            targets = []
+            for name in names:
+                server = get_server(name)
+                if server is None:
+                    # Nothing can be known about a server that doesn't exist
+                    logger.warning("No server called %s to check for players", name)
+                    failed_queries.append(name)
+                else:
+                    targets.append(server)
+        pending = {}
+        for server in targets:
+            task = asyncio.ensure_future(
+                asyncio.wait_for(fetch_players(server, allow_stale=False), query_timeout))
+            pending[task] = server['name']
+        deadline = loop.time() + sweep_timeout
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=deadline - loop.time(),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.warning("Sweep deadline of %ss reached, giving up on %s",
+                                   sweep_timeout, ", ".join(pending.values()))
+                    failed_queries.extend(pending.values())
+                    break
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        if task.result().get('current_players') > 0:
+                            return True, failed_queries
+                    except AttributeError:
+                        logger.warning("No result, couldn't connect to %s, moving on...", name)
+                        failed_queries.append(name)
+                    except asyncio.TimeoutError:
+                        logger.warning("Query to %s timed out after %ss, moving on...",
+                                       name, query_timeout)
+                        failed_queries.append(name)
+                    except Exception:
+                        failed_queries.append(name)
+                        logger.exception("Query to %s failed, moving on...", name)
+        finally:
+            for task in pending:
+                task.cancel()
+        return False, failed_queries
     except:
-        logger.error("Couldn't query servers for active players")
-        traceback.print_exc()
+        logger.exception("Couldn't query servers for active players")
         raise
 
 
-def get_players(server: Server) -> dict:
+async def get_all_players(query_timeout: float = QUERY_TIMEOUT,
+                          sweep_timeout: float = SWEEP_TIMEOUT) -> dict:
     """
-    Returns a dict with the current number of players connected
-    to the server as well as the max players supported
+    Queries all known servers concurrently for their player counts
+    returns a dict of server name to the get_players result, which is
+    None for servers that failed or didn't answer within the deadlines
     """
-    if server['server_type'] is ServerType.STEAM:
-        logger.info("Querying ArmA server: %s", server['name'])
-        try:
-            steamquery = _steam_server_connection(
-                server_ip=str(server['ip_address']), port=server['port'])
-            server_state = _lint_steamquery_output(
-                steamquery.query_server_info())
-            logger.info("%s has %s/%s players active", server['name'], server_state['players'], server_state['max_players'])
-            return {"current_players": server_state["players"],
-                    "max_players": server_state["max_players"]}
-        except ConnectionError:
-            logger.error("Could not connect to %s, connection error", server['name'])
-        except Exception:
-            logger.error("Could not get %s player info", server['name'])
-            traceback.print_exc()
-            raise
-
-    elif server['server_type'] is ServerType.SPACE_ENGINEERS:
-        logger.info("Querying Space Engineers server: %s", server['name'])
-        try:
-            server_api_address = "http://" + \
-                str(server['ip_address']) + ":" + str(server['port'])
-            api = VRageAPI(url=server_api_address, token=server['password'])
-            server_ping = api.get_server_ping()
-            players = api.get_players()
-            server_info = api.get_server_info()
-
-            if server_ping["data"]["Result"] == "Pong":
-                server_live = True
-            else:
-                server_live = False
-
-            print(f"Server live: {server_live}")
-            print(server_info["data"])
-            # Saves the current session state
-            # api.query('/vrageremote/v1/session','patch')
-            player_count = server_info["data"]["Players"]
-
-            for player in players["data"]["Players"]:
-                print(player["SteamID"], player["DisplayName"])
-
-            logger.info("%s has %s/%s players active", str(server['name']), player_count, "99")
-            return {"current_players": player_count, "max_players": 99}
-        except ConnectionError:
-            logger.error("Could not connect to %s, connection error", server['name'])
-        except Exception:
-            logger.error("Could not get %s player info", server['name'])
-            traceback.print_exc()
-            raise
+    if list_servers() == {}:
+        load_servers()
+    tasks = {}
+    # A snapshot, so servers changed mid-sweep don't upset the loop
+    for name, server in list_servers().items():
+        tasks[name] = asyncio.ensure_future(
+            asyncio.wait_for(fetch_players(server), query_timeout))
+    if not tasks:
+        return {}
+    await asyncio.wait(tasks.values(), timeout=sweep_timeout)
+    results = {}
+    for name, task in tasks.items():
+        if not task.done():
+            logger.warning("Sweep deadline of %ss reached, giving up on %s",
+                           sweep_timeout, name)
+            task.cancel()
+            results[name] = None
+        elif task.cancelled() or task.exception() is not None:
+            logger.warning("Couldn't get players for %s: %r", name,
+                           None if task.cancelled() else task.exception())
+            results[name] = None
+        else:
+            results[name] = task.result()
+    return results
 
-    elif server['server_type'] is ServerType.MINECRAFT_JAVA:
-        logger.info("Querying Minecraft Java server: %s", server['name'])
-        try:
-            serverinstance = JavaServer(str(server['ip_address']), server['port'])
-            status = serverinstance.status()
-            logger.info("%s has %s/%s players active", str(server['name']), status.players.online, status.players.max)
-            return {"current_players": status.players.online,
-                    "max_players": status.players.max}
-        except ConnectionError:
-            logger.error("Could not connect to %s, connection error", server['name'])
-        except Exception:
-            logger.error("Could not get %s player info", server['name'])
-            traceback.print_exc()
-            raise
 
-    elif server['server_type'] is ServerType.MINECRAFT_BEDROCK:
-        logger.info("Querying Minecraft Bedrock server: %s", server['name'])
-        try:
-            serverinstance = BedrockServer(str(server['ip_address']), server['port'])
-            status = serverinstance.status()
-            logger.info("%s has %s/%s players active", str(server['name']), status.players.online, status.players.max)
-            return {"current_players": status.players.online,
-                    "max_players": status.players.max}
-        except ConnectionError:
-            logger.error("Could not connect to %s, connection error", server['name'])
-        except Exception:
-            logger.error("Could not get %s player info", server['name'])
-            traceback.print_exc()
-            raise
+async def fetch_players(server: Server, allow_stale: bool = True) -> dict:
+    """
+    Returns the current and max players for a server like get_players,
+    served from player_cache when a recent enough result exists. Without
+    allow_stale only results younger than the cache's ttl count.
+    """
+    return await player_cache.get(server, get_players, allow_stale)
 
-    elif server['server_type'] is ServerType.DCS:
-        logger.info("Querying DCS server: %s", server['name'])
-        ##TODO myles
-        logger.info("%s has 0/0 players active", server['name'])
-        return {"current_players": 0,
-                "max_players": 0}
 
-    else:
-        logger.error('Cannot query unrecognised server type %s', server_type)
+async def get_players(server: Server) -> dict:
+    """
+    Returns a dict with the current number of players connected
+    to the server as well as the max players supported
+    """
+    logger.debug("Querying server: %s", server['name'])
+    result = await _query(server, 'players')
+    if result is not None:
+        logger.debug("%s has %s/%s players active", server['name'],
+                    result['current_players'], result['max_players'])
+        metrics.PLAYERS.set(result['current_players'], server=server['name'])
+    return result
 
 
-def get_players_details(server: Server) -> list:
+async def get_players_details(server: Server) -> list:
     """
     Returns a list with all current player objects containing
     names, scores and durations on the server
     """
-    logger.info("Getting player details for %s", server['name'])
-    if server['server_type'] is ServerType.STEAM:
-        try:
-            steamquery = _steam_server_connection(
-                server_ip=str(server['ip_address']), port=server['port'])
-            player_info = _lint_steamquery_output(
-                steamquery.query_player_info())
-            return player_info
-        except Exception:
-            logger.warning("Could not get player info")
-            traceback.print_exc()
-            raise
-
-    elif server['server_type'] is ServerType.SPACE_ENGINEERS:
-        pass
-
-    elif server['server_type'] is ServerType.DCS:
-        pass
+    logger.debug("Getting player details for %s", server['name'])
+    return await _query(server, 'player_details')
 
-    elif server['server_type'] is ServerType.MINECRAFT_JAVA:
-        #https://mcstatus.readthedocs.io/en/stable/api/basic/#mcstatus.status_response.JavaStatusPlayer
-        #https://mcstatus.readthedocs.io/en/stable/api/basic/#mcstatus.querier.QueryResponse
-        pass
 
-    elif server['server_type'] is ServerType.MINECRAFT_BEDROCK:
-        pass
-
-    else:
-        logger.error('Cannot query unrecognised server type %s', server_type)
-
-def get_server_details(server: Server) -> list:
+async def get_server_details(server: Server, bypass_breaker: bool = False) -> dict:
     """
-    Returns a list with all relevant server config
+    Returns a dict with all relevant server config. With bypass_breaker
+    the server is queried even if its breaker is open, eg. to check
+    whether it's come up.
     """
-    logger.info("Getting server details for %s", server['name'])
-    if server['server_type'] is ServerType.STEAM:
-        try:
-            steamquery = _steam_server_connection(
-                server_ip=str(server['ip_address']), port=server['port'])
-            server_info = _lint_steamquery_output(
-                steamquery.query_server_info())
-            return server_info
-
-        except Exception:
-            logger.warning("Could not get server info for %s", server['name'])
-            traceback.print_exc()
-            raise
-    elif server['server_type'] is ServerType.SPACE_ENGINEERS:
-        pass
-
-    elif server['server_type'] is ServerType.DCS:
-        pass
-
-    elif server['server_type'] is ServerType.MINECRAFT_JAVA:
-        #https://mcstatus.readthedocs.io/en/stable/api/basic/#mcstatus.status_response.JavaStatusPlayer
-        #https://mcstatus.readthedocs.io/en/stable/api/basic/#mcstatus.querier.QueryResponse
-        try:
-            serverinstance = JavaServer(str(server['ip_address']), server['port'])
-            query = serverinstance.query()
-            print(query)
-        except TimeoutError:
-            logger.error("Could not query server info for %s, timed out", server['name'])
-        except Exception as error:
-            logger.error("Could not query server info for %s, %s", server['name'], error)
-            traceback.print_exc()
-            raise
-
-    elif server['server_type'] is ServerType.MINECRAFT_BEDROCK:
-        pass
-
-    else:
-        logger.error('Cannot query unrecognised server type %s', server_type)
+    logger.debug("Getting server details for %s", server['name'])
+    return await _query(server, 'info', bypass_breaker)
 
 
-def _steam_server_connection(server_ip: str, port: int) -> object:
+async def _query(server: Server, method: str, bypass_breaker: bool = False):
     """
-    Creates a steam query server connection object and passes it back.
+    Dispatches a query to the backend for the server's type. Returns None
+    if the server can't be reached, its breaker is open or its backend
+    doesn't support the query. With bypass_breaker the query goes ahead
+    whatever the breaker's state, and only an answer is recorded on it,
+    closing it, as failing is what's expected of a server being waited on.
     """
-    logger.info("Connecting to SteamQuery...")
     try:
-        # Check if IP address is valid
-        if not network.valid_ip_address(server_ip):
-            raise ValueError("IP Address Invalid")
-
-        # Check if port is valid
-        if not network.valid_port(port):
-            raise ValueError("PORT environment variable is invalid")
-
-        # Construct SteamQuery session
-        logger.info('Connecting to %s:%s',server_ip , port)
-        server = SteamQuery(server_ip, port)
-        return server
-
+        backend = backends.get_backend(server['server_type'])
+    except KeyError:
+        logger.error('Cannot query unrecognised server type %s', server['server_type'])
+        return None
+    labels = {'backend': backend.server_type.value, 'server': server['name'], 'query': method}
+    if not bypass_breaker and not breakers.allow(server['name']):
+        logger.debug("%s is unreachable, not querying it", server['name'])
+        metrics.QUERY_SHORT_CIRCUITS.inc(**labels)
+        return None
+    try:
+        with metrics.QUERY_LATENCY.time(**labels):
+            result = await backend.run(getattr(backend, method), server)
+        breakers.success(server['name'])
+        return result
+    except NotImplementedError:
+        logger.debug("%s servers don't support %s queries",
+                    backend.server_type.value, method)
+    except (ConnectionError, TimeoutError):
+        logger.warning("Could not connect to %s, connection error", server['name'])
+        metrics.QUERY_FAILURES.inc(**labels)
+        if not bypass_breaker:
+            breakers.failure(server['name'])
     except Exception:
-        logger.warning("Unable to connect to server")
-        traceback.print_exc()
+        metrics.QUERY_FAILURES.inc(**labels)
+        logger.exception("Could not get %s %s", server['name'], method)
         raise
-
-
-def _lint_steamquery_output(query) -> object:
-    """
-    Checks if SteamQuery output should have been an exception
-    and if so raises one, kill me
-    """
-    # SteamQuery lib returns errors as strings, so need to
-    # check if "error" key is present to detect exceptions
-    # when errored, it is always passed back as a dict
-    #
-    # If the query is a list, then it is a valid response
-    # in any case
-    logger.info("Linting SteamQuery ouput")
-    if isinstance(query, list):
-        return query
-    else:
-        try:
-            if "error" in query.keys():
-                raise ConnectionError(str(query))
-            else:
-                return query
-        except ConnectionError:
-            logger.error("Connection error: server may be down")
-            raise
-        except Exception:
-            logger.error("Error passed back from SteamQuery")
-            traceback.print_exc()
-            raise
+    finally:
+        if not bypass_breaker:
+            breakers.release(server['name'])
+    return None
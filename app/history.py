@@ -0,0 +1,232 @@
+"""
+Keeps a history of player counts and play sessions on each game server
+in SQLite, rolled up by the day so usage over a year can be summed up
+in milliseconds
+"""
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+# Days raw samples, and daily rollups and sessions, are kept for
+RAW_RETENTION = 7
+ROLLUP_RETENTION = 365
+
+# Seconds and rows buffered before they're written in one transaction,
+# and seconds between drops of what's past its retention
+FLUSH_INTERVAL = 60.0
+FLUSH_ROWS = 500
+PRUNE_INTERVAL = 3600.0
+
+HOURS = range(24)
+
+# A daily rollup has, for each hour of the day, the number of samples
+# taken in it (s0-s23) and the players they counted (p0-p23), and the
+# player hours as the sum of each hour's average players
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS samples (
+    taken_at INTEGER NOT NULL,
+    server TEXT NOT NULL,
+    players INTEGER NOT NULL,
+    PRIMARY KEY (taken_at, server)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily (
+    server TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    players_max INTEGER NOT NULL DEFAULT 0,
+    player_hours REAL NOT NULL DEFAULT 0,
+    {', '.join(f's{hour} INTEGER NOT NULL DEFAULT 0, p{hour} INTEGER NOT NULL DEFAULT 0'
+               for hour in HOURS)},
+    PRIMARY KEY (server, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_by_day ON daily (day);
+CREATE TABLE IF NOT EXISTS sessions (
+    server TEXT NOT NULL,
+    player TEXT NOT NULL,
+    started INTEGER NOT NULL,
+    ended INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_end ON sessions (ended);
+"""
+
+# Adds one hour's samples to a daily rollup, swapping the hour's old
+# average for its new one in the player hours
+_UPSERT = ['INSERT INTO daily (server, day, players_max, player_hours, s{0}, p{0}) '
+           'VALUES (?, ?, ?, ?, ?, ?) '
+           'ON CONFLICT (server, day) DO UPDATE SET '
+           'player_hours = player_hours - COALESCE(p{0} * 1.0 / NULLIF(s{0}, 0), 0) '
+           '+ (p{0} + excluded.p{0}) * 1.0 / (s{0} + excluded.s{0}), '
+           's{0} = s{0} + excluded.s{0}, p{0} = p{0} + excluded.p{0}, '
+           'players_max = MAX(players_max, excluded.players_max)'.format(hour)
+           for hour in HOURS]
+
+# Per server, the peak, player hours and hours with samples, then the
+# samples and players in each hour of the day
+_STATS = (f'SELECT server, MAX(players_max), SUM(player_hours), '
+          f'SUM({" + ".join(f"(s{hour} > 0)" for hour in HOURS)}), '
+          f'{", ".join(f"SUM(s{hour}), SUM(p{hour})" for hour in HOURS)} '
+          'FROM daily {} GROUP BY server ORDER BY server')
+
+
+def player_name(player) -> str:
+    """
+    Returns the name of a player as given by any backend's player details,
+    a Steam Player, a plain name or a dict
+    """
+    if isinstance(player, str):
+        return player
+    if isinstance(player, dict):
+        return player.get('name') or player.get('DisplayName')
+    return getattr(player, 'name', None)
+
+
+def _filter(column: str, since: float, server: str = None) -> tuple:
+    """
+    Returns a WHERE clause and its parameters for rows from since on,
+    of one server if given
+    """
+    if server is None:
+        return f'WHERE {column} >= ?', [since]
+    return f'WHERE {column} >= ? AND server = ?', [since, server]
+
+
+class History:
+    """
+    Player counts of every server at each poll and the sessions of the
+    players seen on them, stored at path. Records are buffered and
+    written in batches, each sample also summed into a daily rollup
+    that outlives the raw samples and answers stats().
+    """
+
+    def __init__(self, path: str, raw_retention: float = RAW_RETENTION,
+                 rollup_retention: float = ROLLUP_RETENTION,
+                 flush_interval: float = FLUSH_INTERVAL, flush_rows: int = FLUSH_ROWS,
+                 clock=time.time):
+        self.raw_retention = raw_retention
+        self.rollup_retention = rollup_retention
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self._clock = clock
+        self._connection = sqlite3.connect(path)
+        # WAL lets stats() read while a batch is being written, and only
+        # needs a sync at checkpoints rather than every commit
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+        self._samples = []
+        self._sessions = []
+        self._last_flush = clock()
+        self._last_prune = None
+        # Server -> player name -> when their session started
+        self.open_sessions = {}
+
+    def record(self, players: dict, sessions: dict = None, taken_at: float = None):
+        """
+        Buffers a poll's player counts, a dict of server name to a result
+        like gamequery.get_players or None if it failed. sessions maps
+        server names to who's online on them, as a dict of player name
+        to seconds connected or None if unknown. Players no longer online
+        have their sessions ended.
+        """
+        taken_at = int(self._clock() if taken_at is None else taken_at)
+        for server, result in players.items():
+            if result is not None:
+                self._samples.append((taken_at, server, result['current_players']))
+                if result['current_players'] == 0:
+                    self._update_sessions(server, {}, taken_at)
+        for server, online in (sessions or {}).items():
+            self._update_sessions(server, online, taken_at)
+        if len(self._samples) + len(self._sessions) >= self.flush_rows \
+                or self._clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _update_sessions(self, server: str, online: dict, taken_at: int):
+        open_sessions = self.open_sessions.setdefault(server, {})
+        for player in list(open_sessions):
+            if player not in online:
+                self._sessions.append((server, player, open_sessions.pop(player), taken_at))
+        for player, connected in online.items():
+            if player not in open_sessions:
+                open_sessions[player] = taken_at - int(connected or 0)
+
+    def flush(self):
+        """
+        Writes everything buffered in one transaction, and every
+        PRUNE_INTERVAL drops what's past its retention
+        """
+        self._last_flush = self._clock()
+        if not self._samples and not self._sessions:
+            return
+        # (server, day) -> hour of the day -> samples, players and peak
+        rollups = {}
+        for taken_at, server, players in self._samples:
+            day, second = divmod(taken_at, 86400)
+            hourly = rollups.setdefault((server, day * 86400), {})
+            samples, players_sum, players_max = hourly.get(second // 3600, (0, 0, 0))
+            hourly[second // 3600] = (samples + 1, players_sum + players,
+                                      max(players_max, players))
+        try:
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO samples VALUES (?, ?, ?)', self._samples)
+                for (server, day), hourly in rollups.items():
+                    for hour, (samples, players_sum, players_max) in hourly.items():
+                        self._connection.execute(
+                            _UPSERT[hour], (server, day, players_max, players_sum / samples,
+                                            samples, players_sum))
+                self._connection.executemany(
+                    'INSERT INTO sessions VALUES (?, ?, ?, ?)', self._sessions)
+                if self._last_prune is None \
+                        or self._last_flush - self._last_prune >= PRUNE_INTERVAL:
+                    self._prune()
+        except sqlite3.Error:
+            logger.exception("Failed to write player history")
+        self._samples.clear()
+        self._sessions.clear()
+
+    def _prune(self):
+        now = self._last_prune = self._clock()
+        self._connection.execute('DELETE FROM samples WHERE taken_at < ?',
+                                 (now - self.raw_retention * 86400,))
+        self._connection.execute('DELETE FROM daily WHERE day < ?',
+                                 (now - self.rollup_retention * 86400,))
+        self._connection.execute('DELETE FROM sessions WHERE ended < ?',
+                                 (now - self.rollup_retention * 86400,))
+
+    def stats(self, days: int, server: str = None) -> list:
+        """
+        Returns usage over the last days, counting today, for every server
+        or the one named, as a dict per server with the average and peak
+        players, player hours, the busiest hour of the day in UTC, and the
+        number of sessions and players seen
+        """
+        since = self._clock() // 86400 * 86400 - (days - 1) * 86400
+        where, params = _filter('day', since, server)
+        usage = []
+        for name, peak, player_hours, hours, *columns in self._connection.execute(
+                _STATS.format(where), params):
+            samples, players = columns[0::2], columns[1::2]
+            averages = [players[hour] / samples[hour] if samples[hour] else 0 for hour in HOURS]
+            # Over the hours polled rather than the samples, as the poller
+            # samples faster while anyone's playing
+            usage.append({'server': name, 'average_players': player_hours / max(hours, 1),
+                          'peak_players': peak, 'player_hours': player_hours,
+                          'busiest_hour': max(HOURS, key=averages.__getitem__)})
+        where, params = _filter('ended', since, server)
+        sessions = {name: (count, players) for name, count, players in self._connection.execute(
+            f'SELECT server, COUNT(*), COUNT(DISTINCT player) FROM sessions {where} '
+            'GROUP BY server', params)}
+        for row in usage:
+            row['sessions'], row['players'] = sessions.get(row['server'], (0, 0))
+        return usage
+
+    def close(self):
+        """
+        Ends every open session, writes out what's buffered and closes the file
+        """
+        now = int(self._clock())
+        for server in list(self.open_sessions):
+            self._update_sessions(server, {}, now)
+        self.flush()
+        self._connection.close()
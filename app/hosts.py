@@ -0,0 +1,131 @@
+"""
+Provides Host data class type for storing the physical machines
+the bot controls, their power URLs and the game servers they run
+"""
+import logging
+from marshmallow import Schema, fields
+
+from settingsfile import SettingsFile
+
+logger = logging.getLogger(__name__)
+
+# Server name that stands for every game server the bot knows of
+ALL_SERVERS = '*'
+
+
+class Host(Schema):
+    """
+    Object that stores a physical machine's power control
+    URLs and the names of the game servers it runs
+    """
+    name = fields.Str(required=True)
+    wol_url = fields.Str(required=True)
+    shutdown_url = fields.Str(required=True)
+    reboot_url = fields.Str(required=True)
+    liveness_url = fields.Str(required=True)
+    servers = fields.List(fields.Str(), load_default=list)
+
+
+host_list = {}
+
+# hosts.json, replaced atomically on save
+settings_file = SettingsFile('hosts.json')
+
+
+def add_host(name: str, wol_url: str, shutdown_url: str, reboot_url: str,
+             liveness_url: str, servers: list = None) -> Host:
+    """
+    Adds a host to the list of machines the bot controls
+    """
+    try:
+        if not name in host_list:
+            return update_host(name, {
+                'name': name,
+                'wol_url': wol_url,
+                'shutdown_url': shutdown_url,
+                'reboot_url': reboot_url,
+                'liveness_url': liveness_url,
+                'servers': servers or []
+            })
+        raise ValueError("Host name already taken")
+    except Exception:
+        logger.exception("Failed to add host")
+        raise
+
+
+def delete_host(name):
+    """
+    Deletes a host from the list of machines the bot controls
+    """
+    if name == '*':
+        host_list.clear()
+    else:
+        host_list.pop(name)
+
+
+def update_host(name: str, host_info: dict) -> Host:
+    """
+    Updates a host entry, overwriting any existing one of the same name
+    """
+    host = Host().load(host_info)
+    host_list[name] = host
+    return host
+
+
+def get_host(name):
+    """
+    Returns host object based on host name
+    """
+    return host_list.get(name)
+
+
+def list_hosts() -> dict:
+    """
+    Lists hosts currently controlled by the bot
+    """
+    return host_list
+
+
+def save_hosts():
+    """
+    Saves out host config to disk as json
+    """
+    schema = Host()
+    _save_settings([schema.dump(host) for host in host_list.values()])
+
+
+def load_hosts():
+    """
+    Loads hosts from disk, overwrites any existing entries of the same name
+    """
+    hosts = _load_settings()
+    try:
+        for host in hosts:
+            update_host(host['name'], host)
+    except Exception:
+        logger.exception("Couldn't load hosts into bot")
+        raise
+
+
+def _save_settings(jsonstring):
+    """
+    Writes out host config settings to disk in json
+    """
+    try:
+        settings_file.save(jsonstring)
+    except Exception:
+        logger.exception("Failed to save hosts to disk")
+
+
+def _load_settings() -> list:
+    """
+    Reads host config settings from disk in json
+    """
+    try:
+        return settings_file.load(force=True)
+    except FileNotFoundError:
+        logger.info("Hosts file not found")
+        raise
+    except Exception:
+        logger.exception("Failed to load hosts from disk")
+        raise
@@ -0,0 +1,93 @@
+"""
+Shuts hosts down once nobody has played on any of their game servers
+for a while, to save the power they draw sitting idle
+"""
+import asyncio
+import logging
+import time
+
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Seconds every server on a host has to be empty before it's shut down,
+# and between checks
+IDLE_AFTER = 1800.0
+CHECK_INTERVAL = 60.0
+
+
+class IdleShutdown(PeriodicTask):
+    """
+    Background task that checks every host on a schedule and shuts down
+    those that have had no players for idle_after seconds. A host only
+    counts as idle while every one of its servers answers with nobody
+    online, so one that's down, unreachable, can't count its players or
+    lists a server that doesn't exist is never shut down.
+
+    hosts returns the hosts to watch. is_active is awaited with a host
+    and returns whether anyone is online and the servers that failed,
+    like gamequery.is_anyone_active. shutdown is awaited with a host and
+    returns whether it was shut down, eg. False while it's on cooldown.
+    announce, if given, is awaited with a message for each shutdown.
+    """
+
+    failure_message = "Checking for idle hosts failed"
+
+    def __init__(self, hosts, is_active, shutdown, announce=None,
+                 idle_after: float = IDLE_AFTER, interval: float = CHECK_INTERVAL,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        super().__init__(sleep)
+        self.hosts = hosts
+        self.is_active = is_active
+        self.shutdown = shutdown
+        self.announce = announce
+        self.idle_after = idle_after
+        self.interval = interval
+        # Host name -> when it was first seen idle
+        self.idle_since = {}
+        self._clock = clock
+
+    async def check_once(self) -> list:
+        """
+        Checks every host once, shutting down those idle for long enough.
+        Returns the names of the hosts shut down.
+        """
+        hosts = list(self.hosts())
+        watched = {host['name'] for host in hosts}
+        for name in list(self.idle_since):
+            if name not in watched:
+                del self.idle_since[name]
+        results = await asyncio.gather(*(self._check_host(host) for host in hosts))
+        return [host['name'] for host, shut_down in zip(hosts, results) if shut_down]
+
+    async def _check_host(self, host) -> bool:
+        name = host['name']
+        try:
+            active, failed = await self.is_active(host)
+        except Exception:
+            logger.exception("Couldn't check %s for players", name)
+            self.idle_since.pop(name, None)
+            return False
+        if active or failed:
+            self.idle_since.pop(name, None)
+            return False
+        now = self._clock()
+        since = self.idle_since.setdefault(name, now)
+        if now - since < self.idle_after:
+            return False
+        logger.info("Nobody has played on %s for %.0fs, shutting it down", name, now - since)
+        if not await self.shutdown(host):
+            return False
+        del self.idle_since[name]
+        if self.announce is not None:
+            minutes = round((now - since) / 60)
+            try:
+                await self.announce(f'Nobody has played on `{name}` for {minutes} minutes, '
+                                    f'so it\'s been shut down to save power.')
+            except Exception:
+                logger.exception("Couldn't announce shutdown of %s", name)
+        return True
+
+    async def _tick(self) -> float:
+        await self.check_once()
+        return self.interval
@@ -0,0 +1,133 @@
+"""
+Keeps one status message per channel up to date in place, rather than
+answering every command with a new one
+"""
+import asyncio
+import logging
+import time
+
+from settingsfile import SettingsFile
+
+logger = logging.getLogger(__name__)
+
+# Least seconds between edits of one channel's message. Discord allows
+# a handful of edits in a channel every few seconds, so this stays well
+# clear of that while the poller's own interval is longer anyway
+EDIT_INTERVAL = 10.0
+
+
+class _Channel:
+    __slots__ = ('channel', 'message', 'published', 'wanted', 'last_edit', 'task')
+
+    def __init__(self, channel: int, message: int = None):
+        self.channel = channel
+        self.message = message
+        self.published = None
+        self.wanted = None
+        self.last_edit = None
+        self.task = None
+
+
+class LiveStatus:
+    """
+    A status message in each of channels, edited whenever update() is
+    given content that differs from what's shown. Edits to a channel are
+    at least interval seconds apart: content given in between replaces
+    whatever was waiting, so only the latest goes out.
+
+    send is awaited with a channel and content to post a new message,
+    and returns its ID. edit is awaited with a channel, message ID and
+    content, and returns False if the message is gone so a new one is
+    posted. The message IDs are saved to path, if given, so a restart
+    keeps editing the same messages. If given, rate_limit is an
+    updates.RateLimit shared by every channel's edits.
+    """
+
+    def __init__(self, channels: list, send, edit, path: str = None,
+                 interval: float = EDIT_INTERVAL, rate_limit=None,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        self.send = send
+        self.edit = edit
+        self.interval = interval
+        self.rate_limit = rate_limit
+        self.settings_file = SettingsFile(path) if path is not None else None
+        self._channels = {channel: _Channel(channel) for channel in channels}
+        self._clock = clock
+        self._sleep = sleep
+
+    @property
+    def pending(self) -> bool:
+        """
+        Whether any channel has an edit waiting or under way
+        """
+        return any(state.task is not None for state in self._channels.values())
+
+    def messages(self) -> dict:
+        """
+        Returns the ID of the status message in each channel that has one
+        """
+        return {channel: state.message for channel, state in self._channels.items()
+                if state.message is not None}
+
+    def update(self, content: str):
+        """
+        Shows content in every channel, editing only those where it's
+        changed and no sooner than interval after their last edit
+        """
+        for state in self._channels.values():
+            state.wanted = content
+            if state.task is None and state.wanted != state.published:
+                state.task = asyncio.ensure_future(self._publish(state))
+
+    async def _publish(self, state: _Channel):
+        try:
+            while state.wanted != state.published:
+                if state.last_edit is not None:
+                    wait = state.last_edit + self.interval - self._clock()
+                    if wait > 0:
+                        await self._sleep(wait)
+                if self.rate_limit is not None:
+                    await self.rate_limit.acquire(self._sleep)
+                content = state.wanted
+                state.last_edit = self._clock()
+                if state.message is None or not await self.edit(state.channel, state.message,
+                                                                content):
+                    state.message = await self.send(state.channel, content)
+                    self.save()
+                state.published = content
+        except Exception:
+            # Left for the next update to try again
+            logger.exception("Couldn't update the status message in channel %s", state.channel)
+        finally:
+            state.task = None
+
+    async def stop(self):
+        """
+        Cancels any edits waiting to go out
+        """
+        tasks = [state.task for state in self._channels.values() if state.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def load(self):
+        """
+        Loads the saved message IDs of the channels still configured.
+        Raises FileNotFoundError if nothing has been saved yet.
+        """
+        for entry in self.settings_file.load(force=True):
+            state = self._channels.get(int(entry['name']))
+            if state is not None:
+                state.message = entry['message']
+
+    def save(self):
+        """
+        Saves the message ID of each channel to path
+        """
+        if self.settings_file is None:
+            return
+        try:
+            self.settings_file.save([{'name': str(channel), 'message': message}
+                                     for channel, message in self.messages().items()])
+        except Exception:
+            logger.exception("Failed to save the status message IDs to disk")
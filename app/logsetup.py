@@ -0,0 +1,121 @@
+"""
+Logging setup for the bot. Records are handed to a queue on the calling
+thread and written out as JSON lines by a listener thread, so a slow disk
+never blocks the event loop.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has, anything else was passed in extra
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) \
+    | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one line of JSON with its time, level, logger and
+    message, plus any fields passed in extra and the traceback if any
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc)
+                            .isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records with their message merged and traceback rendered, like
+    the stock handler, but keeps the traceback apart from the message so
+    it lands in its own JSON field
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> dict:
+    """
+    Parses per-module levels written as module=LEVEL,module=LEVEL
+    """
+    levels = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        name, _, level = item.partition('=')
+        if not level:
+            raise ValueError(f"Log level '{item}' isn't in the form module=LEVEL")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level: str = 'INFO', levels: dict = None,
+                  filename: str = None) -> logging.handlers.QueueListener:
+    """
+    Routes every logger through a queue to a JSON lines handler writing to
+    filename, or stderr if none is given. levels maps logger names to
+    their own level, eg. {'gamequery': 'DEBUG'}. Calling it again replaces
+    the previous setup.
+    """
+    global _listener
+    stop_logging()
+    if filename:
+        handler = logging.handlers.WatchedFileHandler(filename, encoding='utf8')
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level.upper())
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, handler,
+                                               respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """
+    Writes out any queued records and stops the listener thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
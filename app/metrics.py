@@ -0,0 +1,225 @@
+"""
+Minimal Prometheus/OpenMetrics instrumentation for the bot: counters,
+gauges and histograms kept in memory and served over HTTP as text
+"""
+import logging
+import math
+import time
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Seconds, suited to network round trips from LAN pings up to timeouts
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Base for a metric family with a fixed set of label names, one
+    series per combination of label values
+    """
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def remove(self, **labels):
+        """
+        Drops the series for a set of label values, eg. for a deleted server
+        """
+        self._series.pop(self._key(labels), None)
+
+    def clear(self):
+        """
+        Drops every series
+        """
+        self._series.clear()
+
+    def render(self) -> list:
+        """
+        Returns the family's lines in the OpenMetrics text format
+        """
+        lines = [f'# TYPE {self.name} {self.kind}', f'# HELP {self.name} {self.documentation}']
+        for key, value in sorted(self._series.items()):
+            lines.extend(self._render_series(dict(zip(self.labelnames, key)), value))
+        return lines
+
+    def _render_series(self, labels: dict, value) -> list:
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """
+    A count that only goes up
+    """
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+    def _render_series(self, labels: dict, value) -> list:
+        return [f'{self.name}_total{_format_labels(labels)} {_format_value(value)}']
+
+
+class Gauge(_Metric):
+    """
+    A value that can go up and down
+    """
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        self._series[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+
+class _Timer:
+    """
+    Context manager observing the time spent in its block
+    """
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into cumulative buckets
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # Per-bucket counts, then the sum and count of observations
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][index] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def time(self, **labels) -> _Timer:
+        """
+        Returns a context manager observing how long its block takes
+        """
+        self._key(labels)
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return 0 if series is None else series[2]
+
+    def _render_series(self, labels: dict, value) -> list:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            bucket_labels = {**labels, 'le': _format_value(bound)}
+            lines.append(f'{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+def render() -> str:
+    """
+    Returns every registered metric in the OpenMetrics text format
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+async def _handle_metrics(request):
+    return web.Response(body=render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+
+async def start_server(port: int, host: str = '127.0.0.1') -> web.AppRunner:
+    """
+    Serves the metrics at /metrics on the given port, returning the runner
+    """
+    app = web.Application()
+    app.router.add_get('/metrics', _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Serving metrics on %s:%s", host, port)
+    return runner
+
+
+QUERY_LATENCY = Histogram(
+    'gamequery_query_seconds', "Time taken by game server queries",
+    ['backend', 'server', 'query'])
+QUERY_FAILURES = Counter(
+    'gamequery_query_failures', "Game server queries that got no answer",
+    ['backend', 'server', 'query'])
+QUERY_SHORT_CIRCUITS = Counter(
+    'gamequery_query_short_circuits', "Game server queries skipped as the server's breaker is open",
+    ['backend', 'server', 'query'])
+PLAYERS = Gauge(
+    'gamequery_players', "Players online per game server as of its last query",
+    ['server'])
+CACHE_REQUESTS = Counter(
+    'gamequery_cache_requests', "Player count cache lookups by outcome",
+    ['result'])
+POWER_LATENCY = Histogram(
+    'power_request_seconds', "Time taken by requests to the power control URLs",
+    ['endpoint'])
+COMMAND_LATENCY = Histogram(
+    'command_seconds', "End to end time taken by slash commands",
+    ['command'])
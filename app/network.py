@@ -2,14 +2,22 @@
 Provides functions for establishing network locations and
 communications, port and IP verification
 """
-import traceback
+import asyncio
 import logging
 from ipaddress import ip_address, IPv6Address, IPv4Address
 
+import aiohttp
 import requests
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename='network.log', level=logging.INFO)
+
+# Defaults for requests made over the shared async HTTP pool
+HTTP_TIMEOUT = 2
+HTTP_RETRIES = 2
+HTTP_BACKOFF = 0.5
+HTTP_POOL_SIZE = 8
+
+_session = None
 
 # Gets the external IP address where the server is running
 # this assumes that the outbound IP after NAT and inbound IP
@@ -29,12 +37,11 @@ def get_external_ip() -> str:
     try:
         response = requests.get('https://ifconfig.me/ip', timeout=5)
         server_ip = response.content.decode()
-        logger.info(f'Discovered IP address is {server_ip}')
+        logger.info("Discovered IP address is %s", server_ip)
         return str(server_ip)
 
     except Exception:
-        logger.error("External IP could not be found, ifconfig.me may be down or blocked")
-        traceback.print_exc()
+        logger.exception("External IP could not be found, ifconfig.me may be down or blocked")
         raise
 
 # Validates if the IP address given is valid
@@ -51,8 +58,7 @@ def valid_ip_address(ipaddress: int) -> int:
             return False
 
     except ValueError:
-        logger.error("IP address is invalid")
-        traceback.print_exc()
+        logger.exception("IP address %s is invalid", ipaddress)
         raise
 
 # Validates if the given port is in valid range
@@ -65,11 +71,66 @@ def valid_port(port: int) -> bool:
     try:
         port = int(port)
         if port > 0 and port <= 65535:
-            logger.info(f'PORT {port} is valid')
+            logger.debug("PORT %s is valid", port)
             return True
         raise ValueError(f'PORT {port} is not in valid range 1-65535')
 
     except Exception:
-        logger.warning("PORT is not valid")
-        traceback.print_exc()
+        logger.warning("PORT %s is not valid", port, exc_info=True)
         raise
+
+
+# Async HTTP client shared by the power control endpoints. Connections are
+# kept alive between calls so repeated requests to the same host skip the
+# TCP handshake, and none of the calls block the event loop.
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared client session, creating it on first use
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit_per_host=HTTP_POOL_SIZE,
+                                         keepalive_timeout=60)
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+
+async def close_session():
+    """
+    Closes the shared client session and its pooled connections
+    """
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def http_get(url: str, timeout: float = HTTP_TIMEOUT,
+                   retries: int = HTTP_RETRIES,
+                   backoff: float = HTTP_BACKOFF,
+                   idempotent: bool = True) -> tuple[int, bytes]:
+    """
+    GETs a URL over the shared connection pool and returns the status code
+    and body. Connection errors, timeouts and 5xx responses are retried with
+    exponential backoff, raises ConnectionError once retries are exhausted.
+    A request that isn't idempotent, eg. one that reboots a machine, is only
+    retried if it never reached the host, as one that timed out or was cut
+    off may well have been acted on already.
+    """
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    for attempt in range(retries + 1):
+        try:
+            async with _get_session().get(url, timeout=client_timeout) as response:
+                body = await response.read()
+                if response.status < 500 or attempt == retries or not idempotent:
+                    return response.status, body
+                logger.warning("%s returned %s, retrying", url, response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            unsent = isinstance(error, aiohttp.ClientConnectorError)
+            if attempt == retries or not (idempotent or unsent):
+                logger.error("Request to %s failed after %s attempts", url, attempt + 1)
+                raise ConnectionError(f"Request to {url} failed: {error!r}") from error
+            logger.warning("Request to %s failed, retrying: %r", url, error)
+        await asyncio.sleep(backoff * 2 ** attempt)
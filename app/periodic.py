@@ -0,0 +1,65 @@
+"""
+Runs a step of work over and over in the background, the scaffolding
+shared by the poller, the idle shutdown and the config watcher
+"""
+import asyncio
+import logging
+
+
+class PeriodicTask:
+    """
+    Base for background tasks that await _tick() until stopped, sleeping
+    in between for the seconds it returns. A _tick() that raises is
+    logged with failure_message, under the subclass's module so its log
+    level applies, and tried again after _retry_delay().
+    """
+
+    # Logged when a tick raises
+    failure_message = "Background task failed"
+
+    def __init__(self, sleep=asyncio.sleep):
+        self._sleep = sleep
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the background task is running
+        """
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """
+        Starts running in the background unless already running
+        """
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        """
+        Stops running
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self) -> float:
+        """
+        Does one round of work and returns the seconds until the next
+        """
+        raise NotImplementedError
+
+    def _retry_delay(self) -> float:
+        """
+        Returns the seconds to wait after a tick that raised
+        """
+        return self.interval
+
+    async def _run(self):
+        while True:
+            try:
+                delay = await self._tick()
+            except Exception:
+                logging.getLogger(type(self).__module__).exception(self.failure_message)
+                delay = self._retry_delay()
+            await self._sleep(delay)
@@ -0,0 +1,111 @@
+"""
+Polls every configured game server in the background and keeps
+the latest player counts in memory for commands to read
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+import gamequery
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls when players are online, when the servers are
+# up but empty, and when none of them answer
+ACTIVE_INTERVAL = 15.0
+IDLE_INTERVAL = 60.0
+DOWN_INTERVAL = 300.0
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Player counts of every server as of one poll, a server's entry is
+    None when it couldn't be queried
+    """
+    players: dict = field(default_factory=dict)
+    taken_at: float = field(default_factory=time.time)
+
+    @property
+    def total_players(self) -> int:
+        """
+        Players online across all servers that answered
+        """
+        return sum(result['current_players'] for result in self.players.values()
+                   if result is not None)
+
+    @property
+    def failed(self) -> list:
+        """
+        Names of the servers that couldn't be queried
+        """
+        return [name for name, result in self.players.items() if result is None]
+
+    @property
+    def host_up(self) -> bool:
+        """
+        Whether any server answered, which is the best guess available
+        for whether the machine running them is up
+        """
+        return any(result is not None for result in self.players.values())
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the snapshot was taken
+        """
+        return time.time() - self.taken_at
+
+
+class Poller(PeriodicTask):
+    """
+    Background task that queries all servers on a schedule, polling more
+    often while players are online and backing off while the host is down.
+    on_update is awaited with each new Snapshot.
+    """
+
+    failure_message = "Polling game servers failed"
+
+    def __init__(self, query=gamequery.get_all_players, on_update=None,
+                 active_interval: float = ACTIVE_INTERVAL,
+                 idle_interval: float = IDLE_INTERVAL,
+                 down_interval: float = DOWN_INTERVAL,
+                 sleep=asyncio.sleep):
+        super().__init__(sleep)
+        self.query = query
+        self.on_update = on_update
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.down_interval = down_interval
+        self.snapshot = None
+
+    def interval(self, snapshot: Snapshot) -> float:
+        """
+        Returns how long to wait after a given snapshot before polling again
+        """
+        if snapshot.total_players > 0:
+            return self.active_interval
+        if snapshot.players and not snapshot.host_up:
+            return self.down_interval
+        return self.idle_interval
+
+    async def poll_once(self) -> Snapshot:
+        """
+        Queries all servers once and publishes the result
+        """
+        snapshot = Snapshot(players=await self.query())
+        self.snapshot = snapshot
+        logger.debug("Polled %s servers, %s players online, %s failed",
+                     len(snapshot.players), snapshot.total_players,
+                     len(snapshot.failed))
+        if self.on_update is not None:
+            await self.on_update(snapshot)
+        return snapshot
+
+    async def _tick(self) -> float:
+        return self.interval(await self.poll_once())
+
+    def _retry_delay(self) -> float:
+        return self.idle_interval
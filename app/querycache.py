@@ -0,0 +1,93 @@
+"""
+Provides a per-server TTL cache for game server query results, with
+stale-while-revalidate and coalescing of concurrent queries
+"""
+import asyncio
+import logging
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    Caches one query result per server, keyed on the server's name and
+    only valid for the exact Server entry it was fetched for.
+
+    Results younger than ttl are served as is. Results younger than
+    ttl + stale_ttl are served immediately while a single refresh runs
+    in the background, unless the caller asks for fresh results only.
+    Anything older is fetched, with concurrent callers for the same
+    server sharing the one query.
+    """
+
+    def __init__(self, ttl: float = 10.0, stale_ttl: float = 50.0,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries = {}
+        self._inflight = {}
+
+    async def get(self, server, fetch, allow_stale: bool = True):
+        """
+        Returns the cached result for server, calling the coroutine
+        function fetch(server) when there isn't a usable one. Results
+        older than ttl are only usable if allow_stale.
+        """
+        name = server['name']
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] is server:
+            age = self._clock() - entry[2]
+            if age < self.ttl:
+                logger.debug("Cache hit for %s", name)
+                metrics.CACHE_REQUESTS.inc(result='hit')
+                return entry[1]
+            if allow_stale and age < self.ttl + self.stale_ttl:
+                logger.debug("Serving stale result for %s, revalidating", name)
+                metrics.CACHE_REQUESTS.inc(result='stale')
+                self._refresh(server, fetch)
+                return entry[1]
+        logger.debug("Cache miss for %s", name)
+        metrics.CACHE_REQUESTS.inc(result='miss')
+        # Shielded so a caller timing out doesn't cancel the query
+        # for everyone else waiting on it
+        return await asyncio.shield(self._refresh(server, fetch))
+
+    def invalidate(self, name: str = None):
+        """
+        Drops the cached result for a server, or for all servers if
+        no name is given
+        """
+        if name is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._entries.pop(name, None)
+            self._inflight.pop(name, None)
+
+    def _refresh(self, server, fetch) -> asyncio.Task:
+        """
+        Starts a query for server unless one is already running
+        """
+        name = server['name']
+        task = self._inflight.get(name)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._fetch(server, fetch))
+            self._inflight[name] = task
+        return task
+
+    async def _fetch(self, server, fetch):
+        name = server['name']
+        try:
+            result = await fetch(server)
+            # Failed queries aren't cached so the next caller retries,
+            # nor are results for an entry invalidated while in flight
+            if result is not None and self._inflight.get(name) is asyncio.current_task():
+                self._entries[name] = (server, result, self._clock())
+            return result
+        finally:
+            if self._inflight.get(name) is asyncio.current_task():
+                del self._inflight[name]
@@ -0,0 +1,111 @@
+"""
+Follows a host after it's been booted until it and its game servers
+are actually joinable, backing off between checks
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Seconds to give a booted host and its game servers to come up, the
+# first and longest waits between checks, and how much each wait is
+# randomised either way so hosts booted together don't check in lockstep
+READY_TIMEOUT = 600.0
+INITIAL_DELAY = 5.0
+MAX_DELAY = 60.0
+JITTER = 0.25
+
+
+@dataclass
+class BootProgress:
+    """
+    How far a booted host has come. servers maps each game server's
+    name to whether it has answered a query yet.
+    """
+    host_up: bool = False
+    servers: dict = field(default_factory=dict)
+    finished: bool = False
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the host and every one of its game servers are up
+        """
+        return self.host_up and all(self.servers.values())
+
+    @property
+    def waiting_on(self) -> list:
+        """
+        Names of the game servers that haven't answered yet
+        """
+        return [name for name, up in self.servers.items() if not up]
+
+
+def backoff(initial: float = INITIAL_DELAY, maximum: float = MAX_DELAY,
+            jitter: float = JITTER, rand=random.random):
+    """
+    Yields waits that double from initial up to maximum, each moved
+    by up to jitter of itself either way
+    """
+    delay = initial
+    while True:
+        yield delay * (1 + jitter * (2 * rand() - 1))
+        delay = min(delay * 2, maximum)
+
+
+async def _poll(check, deadline: float, delays, clock, sleep) -> bool:
+    """
+    Awaits check until it returns True or deadline passes, waiting the
+    next of delays in between. Returns whether check ever passed.
+    """
+    while True:
+        try:
+            if await check():
+                return True
+        except Exception:
+            logger.debug("Readiness check failed", exc_info=True)
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return False
+        await sleep(min(next(delays), remaining))
+
+
+async def watch_boot(is_up, probes: dict, timeout: float = READY_TIMEOUT,
+                     initial_delay: float = INITIAL_DELAY, max_delay: float = MAX_DELAY,
+                     clock=time.monotonic, sleep=asyncio.sleep, rand=random.random):
+    """
+    Yields a BootProgress each time a booted host gets closer to ready,
+    the last one with finished set once everything is up or timeout
+    runs out. is_up is awaited until the host answers, then each of
+    probes, a dict of game server name to a check like is_up, is polled
+    concurrently on its own backoff until its server answers.
+    """
+    progress = BootProgress(servers=dict.fromkeys(probes, False))
+    deadline = clock() + timeout
+    if await _poll(is_up, deadline, backoff(initial_delay, max_delay, rand=rand), clock, sleep):
+        progress.host_up = True
+        if probes:
+            yield progress
+        tasks = {asyncio.ensure_future(_poll(probe, deadline,
+                                             backoff(initial_delay, max_delay, rand=rand),
+                                             clock, sleep)): name
+                 for name, probe in probes.items()}
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                came_up = False
+                for task in done:
+                    name = tasks.pop(task)
+                    if task.result():
+                        progress.servers[name] = True
+                        came_up = True
+                if came_up and tasks:
+                    yield progress
+        finally:
+            for task in tasks:
+                task.cancel()
+    progress.finished = True
+    yield progress
@@ -2,13 +2,15 @@
 Provides Server data class type for storing game
 server config info
 """
-import traceback
-import json
 import logging
+from collections.abc import Mapping
 from enum import Enum
-from marshmallow import Schema, fields, validate
+import ipaddress
+from types import MappingProxyType
+from marshmallow import Schema, ValidationError, fields, validate, post_load
+from settingsfile import SettingsFile, COMPACT_AFTER
 
-logging.basicConfig(level=logging.WARN)
+logger = logging.getLogger(__name__)
 
 
 class ServerType(str, Enum):
@@ -22,6 +24,36 @@ class ServerType(str, Enum):
     MINECRAFT_BEDROCK = 'MINECRAFT_BEDROCK'
 
 
+class ServerRecord(Mapping):
+    """
+    A loaded server entry. Fields are read like a dict (server['name']),
+    but stored in slots rather than a dict per server. Fields left out
+    of the config, like an unset password, are missing as with a dict.
+    """
+    __slots__ = ('name', 'ip_address', 'port', 'password', 'server_type')
+
+    def __init__(self, **server_info):
+        for key, value in server_info.items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        try:
+            if key in self.__slots__:
+                return getattr(self, key)
+        except AttributeError:
+            pass
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (key for key in self.__slots__ if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f'ServerRecord({dict(self)!r})'
+
+
 class Server(Schema):
     """
     Object that stores a given game server
@@ -33,8 +65,156 @@ class Server(Schema):
     password = fields.Str()
     server_type = fields.Enum(ServerType)
 
+    @post_load
+    def make_record(self, data, **kwargs) -> ServerRecord:
+        return ServerRecord(**data)
+
+
+_EMPTY = MappingProxyType({})
+
+
+class ServerRegistry:
+    """
+    Servers by name, indexed by type and by host IP address.
+
+    Lookups hand out read-only views rather than copies, and a view never
+    changes underneath whoever holds it: the registry only copies a table
+    when it's changed while a view of it is out. The poller can then
+    iterate a snapshot while commands add and remove servers.
+    """
+
+    def __init__(self):
+        # None for the table of all servers, (kind, key) for an index
+        self._tables = {None: {}}
+        # Tables with views out, which are copied before being changed
+        self._shared = set()
+
+    def __contains__(self, name) -> bool:
+        return name in self._tables[None]
+
+    def __iter__(self):
+        return iter(self.snapshot())
 
-server_list = {}
+    def __len__(self) -> int:
+        return len(self._tables[None])
+
+    def get(self, name: str):
+        """
+        Returns a server by name, or None
+        """
+        return self._tables[None].get(name)
+
+    def snapshot(self) -> Mapping:
+        """
+        Returns a read-only view of every server by name
+        """
+        return self._view(None)
+
+    def of_type(self, server_type: ServerType) -> Mapping:
+        """
+        Returns a read-only view of the servers of a type by name
+        """
+        return self._view(('type', ServerType(server_type)))
+
+    def on_host(self, host) -> Mapping:
+        """
+        Returns a read-only view of the servers at an IP address by name
+        """
+        return self._view(('host', str(ipaddress.ip_address(str(host)))))
+
+    def put(self, server: ServerRecord):
+        """
+        Adds a server, replacing any existing one of the same name
+        """
+        name = server['name']
+        existing = self._tables[None].get(name)
+        if existing is not None:
+            self._unindex(existing)
+        self._writable(None)[name] = server
+        for key in self._index_keys(server):
+            self._writable(key)[name] = server
+
+    def remove(self, name: str) -> ServerRecord:
+        """
+        Removes a server and returns it, raises KeyError if there's none
+        """
+        server = self._tables[None][name]
+        del self._writable(None)[name]
+        self._unindex(server)
+        return server
+
+    def clear(self):
+        """
+        Removes every server, leaving any views out unchanged
+        """
+        self._tables = {None: {}}
+        self._shared = set()
+
+    def _index_keys(self, server: ServerRecord) -> list:
+        keys = []
+        if 'server_type' in server:
+            keys.append(('type', server['server_type']))
+        if 'ip_address' in server:
+            keys.append(('host', str(server['ip_address'])))
+        return keys
+
+    def _unindex(self, server: ServerRecord):
+        for key in self._index_keys(server):
+            table = self._writable(key)
+            table.pop(server['name'], None)
+            if not table:
+                del self._tables[key]
+
+    def _writable(self, key) -> dict:
+        """
+        Returns a table to change, copying it first if a view of it is out
+        """
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = {}
+        elif key in self._shared:
+            table = self._tables[key] = dict(table)
+            self._shared.discard(key)
+        return table
+
+    def _view(self, key) -> Mapping:
+        table = self._tables.get(key)
+        if table is None:
+            return _EMPTY
+        self._shared.add(key)
+        return MappingProxyType(table)
+
+
+# Schemas are reused rather than built for every load and dump
+_schema = Server()
+
+server_list = ServerRegistry()
+
+# servers.json, with changes made since its last full save in a journal
+settings_file = SettingsFile('servers.json')
+_journal_enabled = False
+_schedule_flush = None
+# Whether changes were journaled since servers.json was last saved in full
+_unsaved = False
+
+# Callbacks run with a server's name whenever its entry changes or is removed
+_listeners = []
+
+
+def add_listener(callback):
+    """
+    Registers a callback to be called with a server's name
+    whenever that server is updated or deleted
+    """
+    _listeners.append(callback)
+
+
+def _notify(name):
+    """
+    Tells every registered listener that a server has changed
+    """
+    for callback in _listeners:
+        callback(name)
 
 
 def add_server(name: str, ip_address: str, port: int, server_type: str,
@@ -51,13 +231,13 @@ def add_server(name: str, ip_address: str, port: int, server_type: str,
                 'server_type': server_type,
                 'password': password
             }
-            server = Server().load(server_info)
-            server_list[name] = server
+            server = _schema.load(server_info)
+            server_list.put(server)
+            _journal({'op': 'put', 'entry': _schema.dump(server)})
             return server
         raise ValueError("Server name already taken")
     except Exception:
-        logging.error("Failed to add server")
-        traceback.print_exc()
+        logger.exception("Failed to add server")
         raise
 
 
@@ -66,9 +246,15 @@ def delete_server(name):
     Deletes a server from the actively monitored list
     """
     if name == '*':
+        names = list(server_list.snapshot())
         server_list.clear()
+        _journal({'op': 'clear'})
+        for server_name in names:
+            _notify(server_name)
     else:
-        server_list.pop(name)
+        server_list.remove(name)
+        _journal({'op': 'delete', 'name': name})
+        _notify(name)
 
 
 def update_server(name: str, server_info: dict):
@@ -78,12 +264,63 @@ def update_server(name: str, server_info: dict):
     but without the duplicate key check to allow for overwrites
     """
     try:
-        schema = Server()
-        server = schema.load(server_info)
-        server_list[name] = server
+        server = _put(name, server_info)
+        _journal({'op': 'put', 'entry': _schema.dump(server)})
     except ValueError:
-        logging.error("Failed to update server")
-        traceback.print_exc()
+        logger.exception("Failed to update server")
+
+
+def _put(name: str, server_info: dict) -> ServerRecord:
+    """
+    Validates and stores a server entry, telling listeners it changed
+    """
+    server = _schema.load(server_info)
+    server_list.put(server)
+    _notify(name)
+    return server
+
+
+def journal_changes(enabled: bool = True, schedule=None):
+    """
+    Turns on recording every add, update and delete in the servers.json
+    journal as it happens, so changes survive a restart or crash without
+    rewriting the whole file each time. Without schedule, the journal is
+    folded into servers.json every COMPACT_AFTER changes. With it, schedule
+    is called after each change and must see that flush_journal() is called
+    soon after, which saves servers.json in full: a burst of changes costs
+    one rewrite, servers.json always shows the live config within moments,
+    and the journal only has to cover the time in between.
+    """
+    global _journal_enabled, _schedule_flush
+    _journal_enabled = enabled
+    _schedule_flush = schedule
+
+
+def _journal(change: dict):
+    """
+    Appends a change to the journal if enabled
+    """
+    global _unsaved
+    if not _journal_enabled:
+        return
+    _unsaved = True
+    try:
+        settings_file.append(change)
+    except Exception:
+        logger.exception("Failed to journal change to disk")
+    if _schedule_flush is not None:
+        _schedule_flush()
+    elif settings_file.journal_length >= COMPACT_AFTER:
+        save_servers()
+
+
+def flush_journal():
+    """
+    Saves servers.json in full if changes were journaled since it was last
+    saved, folding the journal into it
+    """
+    if _unsaved:
+        save_servers()
 
 
 def get_server(name):
@@ -93,66 +330,113 @@ def get_server(name):
     return server_list.get(name)
 
 
-def list_servers() -> dict:
+def list_servers() -> Mapping:
+    """
+    Lists servers currently monitored by the bot, as a read-only
+    view that isn't changed by later updates
+    """
+    return server_list.snapshot()
+
+
+def servers_of_type(server_type: ServerType) -> Mapping:
+    """
+    Lists servers of one type currently monitored by the bot
+    """
+    return server_list.of_type(server_type)
+
+
+def servers_on_host(host) -> Mapping:
     """
-    Lists servers currently monitored by the bot
+    Lists servers at one IP address currently monitored by the bot
     """
-    return server_list
+    return server_list.on_host(host)
 
 
 def save_servers():
     """
-    Saves out server config to disk as json
+    Saves out server config to disk as json, replacing
+    the file atomically and emptying its journal
     """
-    server_serialised = []
-    schema = Server()
-    for server in server_list.values():
-        server_serialised.append(schema.dump(server))
-    _save_settings(server_serialised)
+    global _unsaved
+    _unsaved = not _save_settings(_schema.dump(server_list.snapshot().values(), many=True))
 
 
-def load_servers():
+def load_servers(force: bool = False):
     """
-    Loads servers from disk, overwrites any existing entries of the same name
+    Loads servers from disk, overwrites any existing entries of the same name.
+    Does nothing if servers.json and its journal haven't changed since they
+    were last loaded or saved, unless forced.
     """
-    servers = _load_settings()
+    servers = _load_settings(force)
+    if servers is None:
+        return
     try:
         for server in servers:
             if not server['server_type'] in ServerType.__members__:
                 raise TypeError(
                     f"Server type: '{server['server_type']}' \
                        for server '{server['name']}' is invalid")
-            update_server(server['name'], server)
+            _put(server['name'], server)
     except Exception:
-        logging.error("Couldn't load settings into bot")
-        traceback.print_exc()
+        logger.exception("Couldn't load settings into bot")
         raise
 
 
-def _save_settings(jsonstring):
+def reload_servers() -> tuple[list, list, list]:
+    """
+    Applies edits made to servers.json since it was last read, leaving
+    servers whose entries are unchanged alone so their caches and clients
+    are kept. Returns the names of the added, removed and changed servers,
+    all empty if the file hasn't changed.
+    """
+    entries = _load_settings()
+    if entries is None:
+        return [], [], []
+    added, changed, seen = [], [], set()
+    for entry in entries:
+        name = entry.get('name')
+        seen.add(name)
+        try:
+            server = _schema.load(entry)
+        except ValidationError:
+            # The entry as it was is kept until it's fixed
+            logger.exception("Ignoring invalid entry for server %s", name)
+            continue
+        existing = server_list.get(name)
+        if existing == server:
+            continue
+        (added if existing is None else changed).append(name)
+        server_list.put(server)
+        _notify(name)
+    removed = [name for name in server_list.snapshot() if name not in seen]
+    for name in removed:
+        server_list.remove(name)
+        _notify(name)
+    return added, removed, changed
+
+
+def _save_settings(jsonstring) -> bool:
     """
-    Writes out server config settings to disk in json
+    Writes out server config settings to disk in json, returns whether it worked
     """
     try:
-        with open('servers.json', 'w', encoding='utf8') as configfile:
-            json.dump(jsonstring, configfile, indent=4, sort_keys=True)
+        settings_file.save(jsonstring)
+        return True
     except Exception:
-        logging.error("Failed to save settings to disk")
-        traceback.print_exc()
+        logger.exception("Failed to save settings to disk")
+        return False
 
 
-def _load_settings() -> dict:
+def _load_settings(force: bool = False) -> list:
     """
-    Writes out server config settings to disk in json
+    Reads server config settings from disk in json with the journal
+    replayed, or None if they're unchanged since last read
     """
     try:
-        with open('servers.json', 'r', encoding='utf8') as configfile:
-            jsonstring = json.load(configfile)
-            return jsonstring
+        return settings_file.load(force)
     except FileNotFoundError:
-        logging.error("Settings file not found")
+        logger.error("Settings file not found")
         raise
     except Exception:
-        logging.error("Failed to load settings from disk")
-        traceback.print_exc()
+        logger.exception("Failed to load settings from disk")
         raise
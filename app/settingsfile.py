@@ -0,0 +1,242 @@
+"""
+Crash-safe storage for a JSON list of named entries, eg. servers.json.
+Full saves replace the file atomically, and single changes in between
+are appended to a journal next to it that's folded back in on the next
+full save.
+"""
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Journaled changes after which the owner should compact with a full save
+COMPACT_AFTER = 100
+
+
+def _hash(data: bytes, journal: bytes):
+    contents_hash = hashlib.blake2b(data)
+    contents_hash.update(b'\0')
+    contents_hash.update(journal)
+    return contents_hash
+
+
+class SettingsFile:
+    """
+    A JSON list of dicts keyed by their 'name', stored at path with its
+    journal at path + '.journal'. Each journal line is one change:
+    {"op": "put", "entry": {...}}, {"op": "delete", "name": ...} or
+    {"op": "clear"}.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.journal_length = 0
+        # (mtime, size) of the file and journal, and a running hash of their
+        # contents, as of the last load or write
+        self._stat = None
+        self._hash = None
+        # Entries of the file alone, by name, as last loaded or written, to
+        # tell which of them were edited by hand since
+        self._base = None
+
+    def changed(self) -> bool:
+        """
+        Returns whether the file or journal were changed by anyone else
+        since they were last loaded or written
+        """
+        return self._current_stat() != self._stat
+
+    def load(self, force: bool = False):
+        """
+        Returns the entries in the file with the journal replayed over them,
+        or None if the contents are the same as when last loaded or written.
+        A missing file is taken as empty if there's a journal, eg. of changes
+        made before the file was first saved, and this process never read
+        the file. Otherwise raises FileNotFoundError if there's no file, the
+        first time it's missing.
+        """
+        if not force and not self.changed():
+            return None
+        stat = self._current_stat()
+        journal = self._read_journal()
+        try:
+            with open(self.path, 'rb') as settings:
+                data = settings.read()
+        except FileNotFoundError:
+            if not journal or self._base is not None:
+                # Reported once, not again until the file appears
+                self._stat = stat
+                raise
+            data = b'[]'
+        contents_hash = _hash(data, journal)
+        if not force and self._hash is not None \
+                and contents_hash.digest() == self._hash.digest():
+            # Touched but not changed, eg. by a copy that kept the contents
+            self._stat = stat
+            return None
+        entries = {entry['name']: entry for entry in json.loads(data)}
+        base = dict(entries) if stat[0] is not None else None
+        # Entries edited by hand since the file was last read or written.
+        # The journal is older than the edit, so it's replayed over every
+        # other entry but not over those
+        edited = set()
+        if self._base is not None:
+            edited = {name for name in entries.keys() | self._base.keys()
+                      if entries.get(name) != self._base.get(name)}
+        self.journal_length = skipped = 0
+        for line in journal.splitlines():
+            try:
+                change = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-append, the change was lost
+                logger.warning("Skipping unreadable line in %s", self.journal_path)
+                continue
+            if not self._replay(entries, change, edited):
+                skipped += 1
+            self.journal_length += 1
+        if not (edited and journal):
+            self._stat, self._hash, self._base = stat, contents_hash, base
+            return list(entries.values())
+        if skipped:
+            logger.warning("%s was edited, dropping %s journaled changes to %s made before that",
+                           self.path, skipped, ", ".join(sorted(edited)))
+        try:
+            # Folded into the file, so the journal can't be replayed over
+            # the edit once it's no longer known to be one
+            self.save(list(entries.values()))
+        except OSError:
+            logger.exception("Couldn't fold the journal into %s", self.path)
+            self._stat, self._hash = stat, contents_hash
+        return list(entries.values())
+
+    def save(self, entries: list):
+        """
+        Replaces the file with entries and empties the journal
+        """
+        data = json.dumps(entries, indent=4, sort_keys=True).encode('utf8')
+        self._write_atomic(data)
+        self._remove_journal()
+        self._stat, self._hash = self._current_stat(), _hash(data, b'')
+        self._base = {entry['name']: entry for entry in json.loads(data)}
+
+    def _remove_journal(self):
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_length = 0
+
+    def append(self, *changes: dict):
+        """
+        Appends changes to the journal in one write and flushes it to disk
+        """
+        lines = b''.join(json.dumps(change, sort_keys=True).encode('utf8') + b'\n'
+                         for change in changes)
+        stat = self._current_stat()
+        with open(self.journal_path, 'ab') as journal:
+            journal.write(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.journal_length += len(changes)
+        if self._hash is not None and self._stat == stat:
+            # Nobody else wrote since, so this process still knows the contents
+            self._hash.update(lines)
+            self._stat = self._current_stat()
+
+    def _current_stat(self) -> tuple:
+        stats = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _read_journal(self) -> bytes:
+        try:
+            with open(self.journal_path, 'rb') as journal:
+                return journal.read()
+        except FileNotFoundError:
+            return b''
+
+    def _write_atomic(self, data: bytes):
+        """
+        Writes to a temporary file next to path, syncs it and renames it
+        over path, so a crash leaves either the old or the new file
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=os.path.basename(self.path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as temp:
+                temp.write(data)
+                temp.flush()
+                os.fsync(temp.fileno())
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, temp_path)
+            try:
+                os.replace(temp_path, self.path)
+            except OSError as error:
+                if error.errno not in (errno.EBUSY, errno.EXDEV, errno.EPERM):
+                    raise
+                # A file bind mounted on its own, as with Docker, can't be
+                # renamed over, so it's overwritten in place instead
+                logger.warning("Can't replace %s atomically (%s), overwriting it",
+                               self.path, error.strerror)
+                self._write_in_place(data)
+            else:
+                self._sync_directory(directory)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _write_in_place(self, data: bytes):
+        with open(self.path, 'r+b' if os.path.exists(self.path) else 'wb') as settings:
+            settings.write(data)
+            settings.truncate()
+            settings.flush()
+            os.fsync(settings.fileno())
+
+    @staticmethod
+    def _sync_directory(directory: str):
+        """
+        Syncs the directory so the rename itself survives a crash
+        """
+        try:
+            descriptor = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        except OSError:
+            pass
+        finally:
+            os.close(descriptor)
+
+    @staticmethod
+    def _replay(entries: dict, change: dict, edited: set = frozenset()) -> bool:
+        """
+        Applies a journaled change to entries, leaving those named in edited
+        alone. Returns False if the change was to an edited entry.
+        """
+        if change['op'] == 'put':
+            name = change['entry']['name']
+            if name in edited:
+                return False
+            entries[name] = change['entry']
+        elif change['op'] == 'delete':
+            if change['name'] in edited:
+                return False
+            entries.pop(change['name'], None)
+        elif change['op'] == 'clear':
+            for name in list(entries):
+                if name not in edited:
+                    del entries[name]
+        else:
+            logger.warning("Skipping unknown journal change %s", change['op'])
+        return True
@@ -0,0 +1,133 @@
+"""
+Sends the bot's low priority updates to Discord, like its presence,
+within Discord's rate limits rather than getting throttled by them
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Presence updates allowed per window seconds. The gateway allows 120
+# events a minute for everything, heartbeats included, and presence is
+# limited further, so this leaves plenty of room
+PRESENCE_LIMIT = 5
+PRESENCE_WINDOW = 60.0
+
+# Message edits allowed per window seconds, Discord's bucket for
+# messages in one channel
+MESSAGE_LIMIT = 5
+MESSAGE_WINDOW = 5.0
+
+_UNSET = object()
+
+
+class RateLimit:
+    """
+    Allows at most limit actions in any window seconds
+    """
+
+    def __init__(self, limit: int, window: float, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        # Times of the recent actions, oldest first
+        self._hits = deque()
+
+    def wait(self) -> float:
+        """
+        Returns the seconds until another action is allowed, 0 if it is now
+        """
+        now = self._clock()
+        while self._hits and self._hits[0] <= now - self.window:
+            self._hits.popleft()
+        if len(self._hits) < self.limit:
+            return 0.0
+        return self._hits[0] + self.window - now
+
+    def hit(self):
+        """
+        Counts an action
+        """
+        self._hits.append(self._clock())
+
+    async def acquire(self, sleep=asyncio.sleep):
+        """
+        Waits until another action is allowed and counts it
+        """
+        while (wait := self.wait()) > 0:
+            await sleep(wait)
+        self.hit()
+
+
+class UpdateScheduler:
+    """
+    Keeps the latest value for each key, eg. the bot's presence, and
+    awaits send with the key and value in the background within the rate
+    limit. A value the same as the one last sent for its key is dropped,
+    and one set while an earlier value is still waiting replaces it, so
+    a burst of changes only sends the last. Nothing waits on the sends,
+    so commands never queue behind them.
+    """
+
+    def __init__(self, send, limit: int = PRESENCE_LIMIT, window: float = PRESENCE_WINDOW,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        self.send = send
+        self.rate_limit = RateLimit(limit, window, clock)
+        self._sleep = sleep
+        # Key -> value last sent, or being sent
+        self._sent = {}
+        # Key -> latest value waiting to be sent, in the order they came in
+        self._waiting = {}
+        self._task = None
+
+    @property
+    def pending(self) -> bool:
+        """
+        Whether updates are waiting or being sent
+        """
+        return self._task is not None
+
+    def update(self, key, value):
+        """
+        Schedules value to be sent for key, unless it's already been sent
+        """
+        if self._sent.get(key, _UNSET) == value:
+            # Changed back before the waiting value went out
+            self._waiting.pop(key, None)
+            return
+        self._waiting[key] = value
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            while self._waiting:
+                await self.rate_limit.acquire(self._sleep)
+                if not self._waiting:
+                    break
+                key = next(iter(self._waiting))
+                value = self._waiting.pop(key)
+                previous = self._sent.get(key, _UNSET)
+                self._sent[key] = value
+                try:
+                    await self.send(key, value)
+                except Exception:
+                    logger.exception("Couldn't send the update to %s", key)
+                    if previous is _UNSET:
+                        self._sent.pop(key, None)
+                    else:
+                        self._sent[key] = previous
+        finally:
+            self._task = None
+
+    async def stop(self):
+        """
+        Drops the updates still waiting and stops sending
+        """
+        self._waiting.clear()
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,125 @@
+"""
+Asyncio client for the Space Engineers VRage Remote API
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import uuid
+from datetime import datetime, timezone
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+API_ENDPOINT = "/vrageremote/v1"
+
+
+class VRageClient:
+    """
+    Long-lived client for one Space Engineers server. Requests share a
+    keep-alive connection pool, and the HMAC keyed with the server's
+    token is set up once and copied for each request's signature.
+
+    Arguments:
+        url:        Base URL (eg. http://<your-ip>:8080)
+        token:      API Token found in the configuration GUI/XML
+    """
+
+    def __init__(self, url: str, token: str, api_endpoint: str = API_ENDPOINT,
+                 timeout: float = 5.0):
+        self.url = url
+        self.token = token
+        self.api_endpoint = api_endpoint
+        self.timeout = timeout
+        self._mac = hmac.new(base64.b64decode(token), digestmod=hashlib.sha1)
+        self._session = None
+        self._loop = None
+
+    def build_headers(self, endpoint: str) -> dict:
+        """
+        Returns the signed headers the VRage API requires for a request
+        to endpoint (eg. /vrageremote/v1/server)
+        """
+        nonce = uuid.uuid4().hex + uuid.uuid1().hex
+        date = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S")
+        mac = self._mac.copy()
+        mac.update(f"{endpoint}\r\n{nonce}\r\n{date}\r\n".encode("utf-8"))
+        return {
+            "Content-Type": "application/json",
+            "Date": date,
+            "Authorization": f"{nonce}:{base64.b64encode(mac.digest()).decode()}",
+        }
+
+    async def query(self, endpoint: str) -> dict:
+        """
+        GETs an API endpoint (eg. /server/ping) and returns the decoded JSON.
+        Raises ConnectionError if the server can't be reached and ValueError
+        if it refuses the request.
+        """
+        path = self.api_endpoint + endpoint
+        try:
+            async with self._get_session().get(self.url + path,
+                                               headers=self.build_headers(path)) as response:
+                if response.status != 200:
+                    raise ValueError(f"{path} returned status {response.status}")
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise ConnectionError(f"Could not reach {self.url}: {error!r}") from error
+
+    async def ping(self) -> bool:
+        """
+        Returns whether the server answers its ping endpoint
+        """
+        response = await self.query("/server/ping")
+        return response["data"]["Result"] == "Pong"
+
+    async def server_info(self) -> dict:
+        """
+        Returns server info like player count, PCU use, name and CPU load
+        """
+        response = await self.query("/server")
+        return response["data"]
+
+    async def players(self) -> list:
+        """
+        Returns the players in the current session
+        """
+        response = await self.query("/session/players")
+        return response["data"]["Players"]
+
+    async def status(self, details: bool = False) -> dict:
+        """
+        Pings the server and fetches its info concurrently, along with
+        the player list if details are wanted
+        """
+        calls = [self.ping(), self.server_info()]
+        if details:
+            calls.append(self.players())
+        results = await asyncio.gather(*calls)
+        status = {"live": results[0], "info": results[1]}
+        if details:
+            status["players"] = results[2]
+        return status
+
+    async def close(self):
+        """
+        Closes the client's pooled connections
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the client's session, opening it on first use or after
+        the event loop it was bound to has changed
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or loop is not self._loop:
+            self._loop = loop
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
@@ -0,0 +1,49 @@
+"""
+Watches servers.json for edits in the background and applies them
+to the running bot, so config changes don't need a restart
+"""
+import asyncio
+import logging
+
+import servers
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of servers.json for edits
+RELOAD_INTERVAL = 5.0
+
+
+class ConfigWatcher(PeriodicTask):
+    """
+    Background task that checks servers.json for edits every interval
+    seconds and applies only the entries that changed. Each check is a
+    stat of the file and its journal unless they've changed, which also
+    works on the bind mounts and network filesystems inotify misses.
+    """
+
+    failure_message = "Reloading servers.json failed"
+
+    def __init__(self, reload=servers.reload_servers,
+                 interval: float = RELOAD_INTERVAL, sleep=asyncio.sleep):
+        super().__init__(sleep)
+        self.reload = reload
+        self.interval = interval
+
+    def check_once(self) -> tuple[list, list, list]:
+        """
+        Applies any edits and returns the added, removed and changed servers
+        """
+        added, removed, changed = self.reload()
+        if added or removed or changed:
+            logger.info("Reloaded servers.json: added %s, removed %s, changed %s",
+                        added, removed, changed)
+        return added, removed, changed
+
+    async def _tick(self) -> float:
+        try:
+            self.check_once()
+        except FileNotFoundError:
+            # Logged when it's read, and picked up once it's back
+            pass
+        return self.interval
@@ -0,0 +1,9 @@
+"""
+Benchmarks for the bot's hot paths, run from the repository root with
+python -m benchmarks.<name>. The bot modules import each other by bare
+name as they are run from within app/, so make them importable that way
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'app'))
@@ -0,0 +1,164 @@
+"""
+Benchmarks gamequery against local stand-ins for every query backend,
+reporting latency percentiles and throughput from 1 to 1000 servers.
+
+Each server is a fake on loopback with the given latency, packet loss and
+players: an A2S responder for Steam, a server list ping and query server
+for Minecraft Java, a RakNet ping responder for Minecraft Bedrock and a
+VRage Remote API stub for Space Engineers. The player count cache is
+off, so every call goes to the servers.
+
+    python -m benchmarks.bench_gamequery --servers 1,10,100,1000 --backend mixed \\
+        --latency 0.005 --loss 0.01 --iterations 20
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import backends
+import gamequery
+import servers
+from servers import ServerType
+from tests.fakes import (FakeA2SServer, FakeBedrockServer, FakeMinecraftJavaServer,
+                         FakeVRageServer)
+
+BACKENDS = [ServerType.STEAM, ServerType.MINECRAFT_JAVA,
+            ServerType.MINECRAFT_BEDROCK, ServerType.SPACE_ENGINEERS]
+
+
+async def _start_fake(server_type: ServerType, latency: float, loss: float, players: int):
+    """
+    Starts a fake server, returns it and the servers.json entry pointing at it
+    """
+    names = [f'Player {index}' for index in range(players)]
+    entry = {'server_type': server_type.value, 'password': ''}
+    if server_type == ServerType.STEAM:
+        fake = FakeA2SServer(players=[(name, 0, 60.0) for name in names],
+                             latency=latency, loss=loss)
+        entry['ip_address'], entry['port'] = await fake.start()
+    elif server_type == ServerType.MINECRAFT_JAVA:
+        fake = FakeMinecraftJavaServer(players=names, latency=latency, loss=loss)
+        entry['ip_address'], entry['port'] = await fake.start()
+    elif server_type == ServerType.MINECRAFT_BEDROCK:
+        fake = FakeBedrockServer(players=players, latency=latency, loss=loss)
+        entry['ip_address'], entry['port'] = await fake.start()
+    else:
+        fake = FakeVRageServer(players=names, latency=latency, loss=loss)
+        await fake.start()
+        entry['ip_address'], entry['port'] = fake.runner.addresses[0][:2]
+        entry['password'] = fake.token
+    return fake, entry
+
+
+async def _close_fake(fake):
+    closed = fake.close()
+    if asyncio.iscoroutine(closed):
+        await closed
+
+
+def _percentile(timings: list, percent: float) -> float:
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * percent / 100))]
+
+
+def _report(label: str, timings: list, queries: int, failures: int, elapsed: float):
+    print(f"  {label:<20} p50 {statistics.median(timings) * 1000:8.2f}ms  "
+          f"p99 {_percentile(timings, 99) * 1000:8.2f}ms  "
+          f"{queries / elapsed:9.0f} queries/s  {failures} failed")
+
+
+async def _each_server(query, targets: list, iterations: int):
+    """
+    Queries every server concurrently, iterations times, timing each query
+    """
+    timings, failures = [], 0
+
+    async def timed(server):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(query(server), gamequery.QUERY_TIMEOUT)
+        except Exception:
+            result = None
+        timings.append(time.perf_counter() - start)
+        if result is None:
+            failures += 1
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await asyncio.gather(*(timed(server) for server in targets))
+    return timings, failures, time.perf_counter() - start
+
+
+async def _sweeps(iterations: int):
+    """
+    Runs is_anyone_active over every server, iterations times, timing each sweep
+    """
+    timings, failures = [], 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        sweep_start = time.perf_counter()
+        _, failed = await gamequery.is_anyone_active()
+        timings.append(time.perf_counter() - sweep_start)
+        failures += len(failed)
+    return timings, failures, time.perf_counter() - start
+
+
+async def run(count: int, server_types: list, latency: float, loss: float,
+              players: int, iterations: int):
+    """
+    Benchmarks the queries against count fake servers of the given types
+    """
+    fakes = []
+    try:
+        for index in range(count):
+            fake, entry = await _start_fake(server_types[index % len(server_types)],
+                                            latency, loss, players)
+            fakes.append(fake)
+            servers.update_server(f'Server {index}', dict(entry, name=f'Server {index}'))
+        targets = list(servers.list_servers().values())
+        print(f"{count} servers, {', '.join(t.value for t in server_types[:count])}, "
+              f"{latency * 1000:.1f}ms latency, {loss:.0%} loss, {players} players")
+        timings, failures, elapsed = await _sweeps(iterations)
+        _report("is_anyone_active", timings, count * iterations, failures, elapsed)
+        for label, query in (("get_players", gamequery.get_players),
+                             ("get_server_details", gamequery.get_server_details)):
+            timings, failures, elapsed = await _each_server(query, targets, iterations)
+            _report(label, timings, count * iterations, failures, elapsed)
+    finally:
+        servers.server_list.clear()
+        await backends.close()
+        for fake in fakes:
+            await _close_fake(fake)
+
+
+async def main(counts: list, server_types: list, latency: float, loss: float,
+               players: int, iterations: int):
+    # Every query that fails would otherwise log a warning
+    logging.basicConfig(level=logging.ERROR)
+    gamequery.player_cache.ttl = 0
+    gamequery.player_cache.stale_ttl = 0
+    for count in counts:
+        await run(count, server_types, latency, loss, players, iterations)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--servers', default='1,10,100,1000',
+                        help="comma separated numbers of servers to run with")
+    parser.add_argument('--backend', default='mixed',
+                        choices=['mixed'] + [server_type.value.lower() for server_type in BACKENDS],
+                        help="game to fake, mixed for an even spread of all of them")
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help="seconds each fake waits before answering")
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help="share of requests each fake ignores")
+    parser.add_argument('--players', type=int, default=0,
+                        help="players on each server, 0 makes is_anyone_active ask them all")
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main([int(count) for count in args.servers.split(',')],
+                     BACKENDS if args.backend == 'mixed' else [ServerType(args.backend.upper())],
+                     args.latency, args.loss, args.players, args.iterations))
@@ -0,0 +1,60 @@
+"""
+Benchmarks /stats against a year of player history, answered from the
+daily rollups, and how long recording that year took in batches.
+
+    python -m benchmarks.bench_history --servers 20 --days 365 --interval 900
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from history import History
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def main(server_count: int, days: int, interval: int):
+    names = [f'Server {index}' for index in range(server_count)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.db')
+        clock = _Clock(time.time() - days * 86400)
+        player_history = History(path, clock=clock)
+        polls = days * 86400 // interval
+        start = time.perf_counter()
+        for _ in range(polls):
+            player_history.record({name: {'current_players': random.randint(0, 32),
+                                          'max_players': 32} for name in names})
+            clock.now += interval
+        player_history.flush()
+        recording = time.perf_counter() - start
+        print(f"Recorded {polls} polls of {server_count} servers over {days} days "
+              f"in {recording:.1f}s, {recording / polls * 1e6:.0f}us per poll, "
+              f"{os.path.getsize(path) / 1024:.0f}KiB on disk")
+        for label, server in (("all servers", None), ("one server", names[0])):
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                player_history.stats(days, server)
+                timings.append(time.perf_counter() - start)
+            print(f"stats, {label:<12} p50 {statistics.median(timings) * 1000:7.2f}ms  "
+                  f"max {max(timings) * 1000:7.2f}ms")
+        player_history.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--servers', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--interval', type=int, default=900,
+                        help="seconds between polls")
+    args = parser.parse_args()
+    main(args.servers, args.days, args.interval)
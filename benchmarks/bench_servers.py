@@ -0,0 +1,118 @@
+"""
+Benchmarks the server registry with thousands of entries, before and
+after the switch to ServerRegistry.
+
+Before: a plain dict of marshmallow-loaded dicts, a new Server schema
+for every load and dump, lookups by type or host scanning every entry
+and a copy of the dict for anything iterating it while it may change.
+After: slotted records in a ServerRegistry indexed by type and host,
+with cached schemas and read-only snapshot views.
+
+    python -m benchmarks.bench_servers --servers 10000 --hosts 100 --lookups 1000
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from marshmallow import Schema, fields, validate
+
+from servers import Server, ServerRegistry, ServerType
+
+
+class _DictServer(Schema):
+    """
+    The Server schema as it was, loading plain dicts
+    """
+    name = fields.Str()
+    ip_address = fields.IP()
+    port = fields.Int(validate=validate.Range(1, 65535))
+    password = fields.Str()
+    server_type = fields.Enum(ServerType)
+
+
+def _entries(count: int, hosts: int) -> list:
+    types = list(ServerType)
+    return [{'name': f'Server {index}',
+             'ip_address': f'10.0.{index % hosts // 256}.{index % hosts % 256}',
+             'port': 1024 + index // hosts,
+             'server_type': types[index % len(types)].value,
+             'password': 'password'} for index in range(count)]
+
+
+def _time(operation, repeat: int = 5) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _memory(build) -> int:
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def _report(label: str, before: list, after: list):
+    before, after = statistics.median(before), statistics.median(after)
+    print(f"{label:<22} before {before * 1000:9.3f}ms  after {after * 1000:9.3f}ms  "
+          f"x{before / after:8.1f}")
+
+
+def main(count: int, hosts: int, lookups: int):
+    entries = _entries(count, hosts)
+    addresses = [entry['ip_address'] for entry in entries[:lookups]]
+
+    def load_before():
+        server_list = {}
+        for entry in entries:
+            server_list[entry['name']] = _DictServer().load(entry)
+        return server_list
+
+    schema = Server()
+
+    def load_after():
+        registry = ServerRegistry()
+        for entry in entries:
+            registry.put(schema.load(entry))
+        return registry
+
+    server_list, registry = load_before(), load_after()
+    print(f"Server registry, {count} servers on {hosts} hosts, {lookups} lookups")
+    _report("load", _time(load_before, 3), _time(load_after, 3))
+    _report("lookups by type", _time(lambda: [
+        [server for server in server_list.values()
+         if server['server_type'] == ServerType.STEAM] for _ in range(lookups // 100)]),
+            _time(lambda: [list(registry.of_type(ServerType.STEAM).values())
+                           for _ in range(lookups // 100)]))
+    _report("lookups by host", _time(lambda: [
+        [server for server in server_list.values() if str(server['ip_address']) == host]
+        for host in addresses[:lookups // 100]]),
+            _time(lambda: [list(registry.on_host(host).values())
+                           for host in addresses[:lookups // 100]]))
+    _report("lookups by name", _time(lambda: [server_list.get(entry['name'])
+                                              for entry in entries[:lookups]]),
+            _time(lambda: [registry.get(entry['name']) for entry in entries[:lookups]]))
+    _report("snapshot and update", _time(lambda: (dict(server_list), server_list.update(
+        {'Server 0': _DictServer().load(entries[0])}))),
+            _time(lambda: (registry.snapshot(), registry.put(schema.load(entries[0])))))
+    _report("dump", _time(lambda: [_DictServer().dump(server)
+                                   for server in server_list.values()], 3),
+            _time(lambda: schema.dump(registry.snapshot().values(), many=True), 3))
+    before, after = _memory(load_before), _memory(load_after)
+    print(f"{'memory':<22} before {before / 1024:9.0f}KiB after {after / 1024:9.0f}KiB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--servers', type=int, default=10000)
+    parser.add_argument('--hosts', type=int, default=100,
+                        help="machines the servers are spread over")
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+    main(args.servers, args.hosts, args.lookups)
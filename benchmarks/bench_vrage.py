@@ -0,0 +1,72 @@
+"""
+Benchmarks one Space Engineers player count query against a local stub
+VRage API, before and after the switch to VRageClient.
+
+Before: a new VRageAPI per query, with ping, players and server info
+fetched one after the other over fresh connections.
+After: one long-lived VRageClient per server, with ping and server info
+fetched concurrently over pooled connections and no player list.
+
+    python -m benchmarks.bench_vrage --latency 0.005 --iterations 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from loguru import logger
+from vrage_api.vrage_api import VRageAPI
+
+from vrage import VRageClient
+from tests.fakes import FakeVRageServer
+
+
+def _before(url: str, token: str) -> int:
+    api = VRageAPI(url=url, token=token)
+    api.get_server_ping()
+    api.get_players()
+    return api.get_server_info()["data"]["Players"]
+
+
+async def _measure(query, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await query()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(label: str, timings: list):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{label:<8} mean {statistics.mean(timings) * 1000:7.2f}ms  "
+          f"p50 {statistics.median(timings) * 1000:7.2f}ms  p99 {p99 * 1000:7.2f}ms")
+
+
+async def main(latency: float, iterations: int):
+    logger.disable('vrage_api')
+    fake = FakeVRageServer(players=['Myles', 'Kharms'], latency=latency)
+    url = await fake.start()
+    client = VRageClient(url=url, token=fake.token)
+    try:
+        # The old client blocks, so it runs off the loop serving the stub
+        before = await _measure(lambda: asyncio.to_thread(_before, url, fake.token),
+                                iterations)
+        after = await _measure(client.status, iterations)
+    finally:
+        await client.close()
+        await fake.close()
+    print(f"Space Engineers player count, {iterations} queries, "
+          f"{latency * 1000:.1f}ms server latency")
+    _report("before", before)
+    _report("after", after)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help="seconds the stub waits before each response")
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.iterations))
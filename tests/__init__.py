@@ -0,0 +1,8 @@
+"""
+The bot modules import each other by bare name as they are run from
+within app/, so make them importable the same way under test
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'app'))
@@ -0,0 +1,401 @@
+"""
+Local stand-ins for game servers, and a clock, used by the tests
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import struct
+
+from aiohttp import web
+
+A2S_INFO_PAYLOAD = b'Source Engine Query\x00'
+
+
+class FakeA2SServer(asyncio.DatagramProtocol):
+    """
+    Answers A2S_INFO and A2S_PLAYER requests on loopback like a Steam
+    game server that requires challenges for both, with optional added
+    latency and packet loss
+    """
+
+    def __init__(self, name='Fake Server', map_name='Altis', players=(),
+                 max_players=32, challenge=b'\x0A\x0B\x0C\x0D',
+                 latency=0.0, loss=0.0):
+        self.name = name
+        self.map_name = map_name
+        self.players = list(players)
+        self.max_players = max_players
+        self.challenge = challenge
+        self.latency = latency
+        self.loss = loss
+        self.received = []
+        self.transport = None
+        self.address = None
+
+    async def start(self, host='127.0.0.1', port=0) -> tuple:
+        """
+        Starts listening and returns the (host, port) being served on
+        """
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=(host, port))
+        self.address = self.transport.get_extra_info('sockname')[:2]
+        return self.address
+
+    def close(self):
+        """
+        Stops listening
+        """
+        if self.transport is not None:
+            self.transport.close()
+
+    def datagram_received(self, data, addr):
+        self.received.append(data)
+        if self.loss and random.random() < self.loss:
+            return
+        response = self.respond(data)
+        if response is None:
+            return
+        if self.latency:
+            asyncio.get_running_loop().call_later(
+                self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+    def respond(self, data: bytes):
+        """
+        Builds the reply to a request, or None to ignore it
+        """
+        if not data.startswith(b'\xFF\xFF\xFF\xFF'):
+            return None
+        kind, payload = data[4:5], data[5:]
+        if kind == b'T':
+            if payload[len(A2S_INFO_PAYLOAD):] != self.challenge:
+                return b'\xFF\xFF\xFF\xFFA' + self.challenge
+            return self.info_response()
+        if kind == b'U':
+            if payload != self.challenge:
+                return b'\xFF\xFF\xFF\xFFA' + self.challenge
+            return self.player_response()
+        return None
+
+    def info_response(self) -> bytes:
+        """
+        Builds an A2S_INFO response
+        """
+        return (b'\xFF\xFF\xFF\xFFI\x11'
+                + self.name.encode() + b'\x00'
+                + self.map_name.encode() + b'\x00'
+                + b'arma3\x00' + b'Arma 3\x00'
+                + struct.pack('<H', 0)
+                + bytes([len(self.players), self.max_players, 0,
+                         ord('d'), ord('l'), 0, 1])
+                + b'1.0\x00')
+
+    def player_response(self) -> bytes:
+        """
+        Builds an A2S_PLAYER response
+        """
+        response = b'\xFF\xFF\xFF\xFFD' + bytes([len(self.players)])
+        for index, (name, score, duration) in enumerate(self.players):
+            response += (bytes([index]) + name.encode() + b'\x00'
+                         + struct.pack('<if', score, duration))
+        return response
+
+
+class FakeVRageServer:
+    """
+    Serves the VRage Remote API endpoints the bot uses on loopback,
+    checking each request's HMAC signature like a Space Engineers server,
+    with optional added latency and lost requests, which drop the connection
+    """
+
+    def __init__(self, token=None, players=(), latency=0.0, loss=0.0):
+        self.token = token or base64.b64encode(b'fake vrage key').decode()
+        self.players = list(players)
+        self.latency = latency
+        self.loss = loss
+        self.requests = []
+        self.peers = set()
+        self.runner = None
+        self.url = None
+
+    async def start(self, host='127.0.0.1', port=0) -> str:
+        """
+        Starts serving and returns the base URL
+        """
+        app = web.Application()
+        app.router.add_get('/vrageremote/v1/server/ping', self._ping)
+        app.router.add_get('/vrageremote/v1/server', self._server)
+        app.router.add_get('/vrageremote/v1/session/players', self._players)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        port = self.runner.addresses[0][1]
+        self.url = f'http://{host}:{port}'
+        return self.url
+
+    async def close(self):
+        """
+        Stops serving
+        """
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    def _authorised(self, request) -> bool:
+        nonce, _, signature = request.headers.get('Authorization', '').partition(':')
+        message = f"{request.path}\r\n{nonce}\r\n{request.headers.get('Date')}\r\n"
+        expected = hmac.new(base64.b64decode(self.token), message.encode(), hashlib.sha1)
+        return hmac.compare_digest(base64.b64encode(expected.digest()).decode(), signature)
+
+    async def _respond(self, request, data):
+        self.requests.append(request.path)
+        self.peers.add(request.transport.get_extra_info('peername'))
+        if self.loss and random.random() < self.loss:
+            request.transport.close()
+            return web.Response()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not self._authorised(request):
+            return web.Response(status=403)
+        return web.json_response({'data': data})
+
+    async def _ping(self, request):
+        return await self._respond(request, {'Result': 'Pong'})
+
+    async def _server(self, request):
+        return await self._respond(request, {
+            'Game': 'SpaceEngineers', 'IsReady': True, 'Players': len(self.players),
+            'ServerName': 'Fake Space Engineers', 'WorldName': 'Star System'})
+
+    async def _players(self, request):
+        return await self._respond(request, {'Players': [
+            {'SteamID': 76561190000000000 + index, 'DisplayName': name}
+            for index, name in enumerate(self.players)]})
+
+
+def _varint(value: int) -> bytes:
+    out = b''
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out += bytes([byte | 0x80])
+        else:
+            return out + bytes([byte])
+
+
+async def _read_varint(reader) -> int:
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value
+    raise ValueError("VarInt too long")
+
+
+class FakeMinecraftJavaServer:
+    """
+    Answers the Minecraft Java server list ping over TCP and, unless
+    query is disabled, the query protocol over UDP on the same port,
+    with optional added latency and lost requests, which drop the
+    connection or datagram
+    """
+
+    def __init__(self, motd='A Minecraft Server', players=(), max_players=20,
+                 version='1.20.4', map_name='world', query=True, latency=0.0, loss=0.0):
+        self.motd = motd
+        self.players = list(players)
+        self.max_players = max_players
+        self.version = version
+        self.map_name = map_name
+        self.query = query
+        self.latency = latency
+        self.loss = loss
+        self.connections = 0
+        self.queries = 0
+        self.server = None
+        self.transport = None
+        self.address = None
+
+    async def start(self, host='127.0.0.1', port=0) -> tuple:
+        """
+        Starts listening and returns the (host, port) being served on
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            self.server = await asyncio.start_server(self._handle, host, port)
+            self.address = self.server.sockets[0].getsockname()[:2]
+            try:
+                self.transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _FakeMinecraftQuery(self), local_addr=self.address)
+                return self.address
+            except OSError:
+                # The UDP side of a free TCP port can be taken, try another
+                self.server.close()
+                if port:
+                    raise
+
+    def close(self):
+        """
+        Stops listening
+        """
+        if self.server is not None:
+            self.server.close()
+        if self.transport is not None:
+            self.transport.close()
+
+    def status(self) -> dict:
+        """
+        Builds the server list ping status JSON
+        """
+        return {
+            'version': {'name': self.version, 'protocol': 765},
+            'players': {'online': len(self.players), 'max': self.max_players,
+                        'sample': [{'name': name, 'id': f'00000000-0000-0000-0000-{n:012d}'}
+                                   for n, name in enumerate(self.players)]},
+            'description': {'text': self.motd},
+        }
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                length = await _read_varint(reader)
+                packet = await reader.readexactly(length)
+                if packet[0] != 0 or len(packet) > 1:
+                    # Handshake, or a ping to echo back
+                    if packet[0] == 1:
+                        writer.write(_varint(len(packet)) + packet)
+                    continue
+                if self.loss and random.random() < self.loss:
+                    break
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                body = json.dumps(self.status()).encode()
+                payload = b'\x00' + _varint(len(body)) + body
+                writer.write(_varint(len(payload)) + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class _FakeMinecraftQuery(asyncio.DatagramProtocol):
+    """
+    Query protocol half of FakeMinecraftJavaServer
+    """
+    CHALLENGE = 9513307
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not self.fake.query or not data.startswith(b'\xFE\xFD'):
+            return
+        if self.fake.loss and random.random() < self.fake.loss:
+            return
+        self.fake.queries += 1
+        kind, session = data[2], data[3:7]
+        if kind == 9:
+            response = b'\x09' + session + str(self.CHALLENGE).encode() + b'\x00'
+        else:
+            fields = {'hostname': self.fake.motd, 'gametype': 'SMP', 'game_id': 'MINECRAFT',
+                      'version': self.fake.version, 'plugins': '', 'map': self.fake.map_name,
+                      'numplayers': str(len(self.fake.players)),
+                      'maxplayers': str(self.fake.max_players),
+                      'hostport': str(self.fake.address[1]), 'hostip': self.fake.address[0]}
+            response = b'\x00' + session + b'splitnum\x00\x80\x00'
+            for key, value in fields.items():
+                response += key.encode() + b'\x00' + value.encode() + b'\x00'
+            response += b'\x00\x01player_\x00\x00'
+            for name in self.fake.players:
+                response += name.encode() + b'\x00'
+            response += b'\x00'
+        if self.fake.latency:
+            asyncio.get_running_loop().call_later(
+                self.fake.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+
+class FakeBedrockServer(asyncio.DatagramProtocol):
+    """
+    Answers RakNet unconnected pings on loopback like a Minecraft Bedrock
+    server, with optional added latency and packet loss
+    """
+    MAGIC = bytes.fromhex('00ffff00fefefefefdfdfdfd12345678')
+
+    def __init__(self, motd='A Bedrock Server', players=0, max_players=10,
+                 version='1.20.50', map_name='Bedrock level', latency=0.0, loss=0.0):
+        self.motd = motd
+        self.players = players
+        self.max_players = max_players
+        self.version = version
+        self.map_name = map_name
+        self.latency = latency
+        self.loss = loss
+        self.pings = 0
+        self.transport = None
+        self.address = None
+
+    async def start(self, host='127.0.0.1', port=0) -> tuple:
+        """
+        Starts listening and returns the (host, port) being served on
+        """
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=(host, port))
+        self.address = self.transport.get_extra_info('sockname')[:2]
+        return self.address
+
+    def close(self):
+        """
+        Stops listening
+        """
+        if self.transport is not None:
+            self.transport.close()
+
+    def datagram_received(self, data, addr):
+        if data[:1] != b'\x01' or data[9:25] != self.MAGIC:
+            return
+        self.pings += 1
+        if self.loss and random.random() < self.loss:
+            return
+        status = ';'.join(['MCPE', self.motd, '622', self.version, str(self.players),
+                           str(self.max_players), '1234567890', self.map_name,
+                           'Survival', '1', str(self.address[1]), str(self.address[1])])
+        response = (b'\x1C' + data[1:9] + struct.pack('>Q', 1234567890) + self.MAGIC
+                    + struct.pack('>H', len(status)) + status.encode())
+        if self.latency:
+            asyncio.get_running_loop().call_later(
+                self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+
+class FakeClock:
+    """
+    Clock that only moves when told to, or slept on
+    """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+        await asyncio.sleep(0)
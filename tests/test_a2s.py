@@ -0,0 +1,148 @@
+"""
+Tests for a2s module, run against local fake A2S servers
+"""
+import asyncio
+import time
+import unittest
+
+import a2s
+from tests.fakes import FakeA2SServer
+
+
+class A2SClientTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for A2SClient tests
+    """
+
+    async def asyncSetUp(self):
+        self.client = a2s.A2SClient(timeout=0.5)
+        self.fakes = []
+
+    async def asyncTearDown(self):
+        self.client.close()
+        for fake in self.fakes:
+            fake.close()
+
+    async def start_fake(self, **kwargs):
+        fake = FakeA2SServer(**kwargs)
+        self.fakes.append(fake)
+        return fake, await fake.start()
+
+    async def test_info_positive(self):
+        """
+        Tests that A2S_INFO is parsed into the SteamQuery result shape
+        """
+        _, (host, port) = await self.start_fake(
+            name='Antistasi', players=[('a', 1, 1.0), ('b', 2, 2.0)], max_players=40)
+        info = await self.client.info(host, port)
+
+        self.assertEqual(info['name'], 'Antistasi')
+        self.assertEqual(info['map'], 'Altis')
+        self.assertEqual(info['players'], 2)
+        self.assertEqual(info['max_players'], 40)
+        self.assertEqual(info['server_type'], 'Dedicated')
+        self.assertEqual(info['os'], 'Linux')
+        self.assertEqual((info['ip'], info['port']), (host, port))
+
+    async def test_players_positive(self):
+        """
+        Tests that A2S_PLAYER is parsed into Players
+        """
+        _, (host, port) = await self.start_fake(players=[('Myles', 12, 34.5)])
+        players = await self.client.players(host, port)
+
+        self.assertEqual(len(players), 1)
+        self.assertEqual(players[0].name, 'Myles')
+        self.assertEqual(players[0].score, 12)
+        self.assertAlmostEqual(players[0].duration, 34.5)
+
+    async def test_challenge_cached_per_server(self):
+        """
+        Tests that a server's challenge is only fetched once
+        """
+        fake, (host, port) = await self.start_fake()
+        await self.client.info(host, port)
+        await self.client.players(host, port)
+        await self.client.info(host, port)
+
+        # One unchallenged request, then every request carries the token
+        self.assertEqual(len(fake.received), 4)
+
+    async def test_query_pipelines_info_and_players(self):
+        """
+        Tests that info and players for one server are fetched together
+        """
+        fake, (host, port) = await self.start_fake(players=[('a', 0, 0.0)])
+        info, players = await self.client.query(host, port)
+
+        self.assertEqual(info['players'], 1)
+        self.assertEqual(players[0].name, 'a')
+        # Both requests go out unchallenged, then once each with the token
+        self.assertEqual(len(fake.received), 4)
+
+    async def test_many_servers_one_round_trip(self):
+        """
+        Tests that queries to many servers overlap instead of queuing
+        """
+        addresses = []
+        for _ in range(50):
+            _, address = await self.start_fake(latency=0.1)
+            addresses.append(address)
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(self.client.info(host, port) for host, port in addresses))
+
+        self.assertEqual(len(results), 50)
+        # Challenge and answer at 0.1s each, rather than 50 times that
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(len(self.client._transports), 1)
+
+    async def test_replies_correlated_by_address(self):
+        """
+        Tests that concurrent queries get their own server's reply
+        """
+        _, first = await self.start_fake(name='First', latency=0.05)
+        _, second = await self.start_fake(name='Second')
+        results = await asyncio.gather(self.client.info(*first), self.client.info(*second))
+
+        self.assertEqual([r['name'] for r in results], ['First', 'Second'])
+
+    async def test_unresponsive_server_raises_connection_error(self):
+        """
+        Tests that a server that never answers raises ConnectionError after the timeout
+        """
+        _, (host, port) = await self.start_fake(loss=1.0)
+
+        with self.assertRaises(ConnectionError):
+            await self.client.info(host, port)
+
+    async def test_concurrent_identical_requests_share_answer(self):
+        """
+        Tests that identical requests sent together on a cold client
+        both get the server's answer
+        """
+        fake, (host, port) = await self.start_fake(name='Shared')
+        results = await asyncio.gather(self.client.info(host, port),
+                                       self.client.info(host, port), return_exceptions=True)
+
+        self.assertEqual([result['name'] for result in results], ['Shared', 'Shared'])
+        # One unchallenged request and its retry with the token
+        self.assertEqual(len(fake.received), 2)
+
+    async def test_shared_request_times_out_with_connection_error(self):
+        """
+        Tests that a request sharing one that times out raises
+        ConnectionError rather than being cancelled
+        """
+        _, (host, port) = await self.start_fake(loss=1.0)
+        first = asyncio.ensure_future(self.client.info(host, port))
+        await asyncio.sleep(0.1)
+        results = await asyncio.gather(first, self.client.info(host, port),
+                                       return_exceptions=True)
+
+        self.assertEqual([type(result) for result in results],
+                         [ConnectionError, ConnectionError])
+
+
+if __name__ == '__main__':
+    unittest.main()
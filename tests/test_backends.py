@@ -0,0 +1,225 @@
+"""
+Tests for backends module
+"""
+import asyncio
+import socket
+import unittest
+
+import backends
+from tests.fakes import FakeBedrockServer, FakeMinecraftJavaServer
+
+
+class RegistryTests(unittest.TestCase):
+    """
+    Class for backend registry tests
+    """
+
+    def test_every_server_type_has_a_backend(self):
+        """
+        Tests that each ServerType dispatches to a backend for that type
+        """
+        for server_type in backends.ServerType:
+            self.assertIs(backends.get_backend(server_type).server_type, server_type)
+
+    def test_unknown_server_type_raises_key_error(self):
+        """
+        Tests that a KeyError is raised for a server type with no backend
+        """
+        with self.assertRaises(KeyError):
+            backends.get_backend('FAIL')
+
+
+class BackendConcurrencyTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for per-backend concurrency limit tests
+    """
+
+    async def test_concurrency_limit(self):
+        """
+        Tests that no more than concurrency queries run at once
+        """
+        backend = backends.Backend()
+        backend.concurrency = 2
+        running = []
+        peak = []
+
+        async def query(server):
+            running.append(server)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(server)
+
+        await asyncio.gather(*(backend.run(query, n) for n in range(6)))
+
+        self.assertEqual(max(peak), 2)
+
+
+class DcsBackendTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for DcsBackend tests
+    """
+
+    async def test_reachable_server(self):
+        """
+        Tests that a server accepting connections answers with its
+        players unknown
+        """
+        listener = await asyncio.start_server(lambda r, w: w.close(), '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        server = {'name': 'DCS', 'ip_address': '127.0.0.1', 'port': port}
+        try:
+            result = await backends.DcsBackend().info(server)
+        finally:
+            listener.close()
+
+        self.assertIsNone(result['players'])
+        self.assertIsNone(result['max_players'])
+
+    async def test_players_not_counted(self):
+        """
+        Tests that asking for a player count raises NotImplementedError
+        rather than answering 0
+        """
+        server = {'name': 'DCS', 'ip_address': '127.0.0.1', 'port': 1}
+
+        with self.assertRaises(NotImplementedError):
+            await backends.DcsBackend().players(server)
+
+    async def test_unreachable_server(self):
+        """
+        Tests that a closed port raises ConnectionError
+        """
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        server = {'name': 'DCS', 'ip_address': '127.0.0.1', 'port': port}
+
+        with self.assertRaises(ConnectionError):
+            await backends.DcsBackend().info(server)
+
+
+class MinecraftJavaBackendTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for MinecraftJavaBackend tests, run against a local fake server
+    """
+
+    async def asyncSetUp(self):
+        self.now = 0.0
+        self.fake = FakeMinecraftJavaServer(motd='Survival', players=['Myles', 'Kharms'])
+        host, port = await self.fake.start()
+        self.server = {'name': 'Minecraft', 'ip_address': host, 'port': port}
+        self.backend = backends.MinecraftJavaBackend(timeout=0.5, endpoint_ttl=60,
+                                                     clock=lambda: self.now)
+
+    async def asyncTearDown(self):
+        self.fake.close()
+
+    async def test_players(self):
+        """
+        Tests that player counts come from the status request
+        """
+        result = await self.backend.players(self.server)
+
+        self.assertEqual(result, {'current_players': 2, 'max_players': 20})
+        self.assertEqual(self.fake.queries, 0)
+
+    async def test_details_combines_status_and_query(self):
+        """
+        Tests that details merge the status response with the query response
+        """
+        details = await self.backend.details(self.server)
+
+        self.assertEqual(details['name'], 'Survival')
+        self.assertEqual(details['map'], 'world')
+        self.assertEqual(details['version'], '1.20.4')
+        self.assertEqual(details['player_names'], ['Myles', 'Kharms'])
+        self.assertIsInstance(details['latency'], float)
+
+    async def test_details_without_query(self):
+        """
+        Tests that details fall back to the status response when query is off,
+        and that the query isn't retried until the endpoint expires
+        """
+        self.fake.query = False
+        first = await self.backend.details(self.server)
+        start = asyncio.get_running_loop().time()
+        second = await self.backend.details(self.server)
+
+        self.assertIsNone(first['map'])
+        self.assertEqual(second['player_names'], ['Myles', 'Kharms'])
+        self.assertLess(asyncio.get_running_loop().time() - start, 0.4)
+
+    async def test_endpoint_cached_until_ttl(self):
+        """
+        Tests that a server's endpoint is reused until it expires
+        """
+        endpoint = self.backend.endpoint(self.server)
+        self.now = 59
+        self.assertIs(self.backend.endpoint(self.server), endpoint)
+        self.now = 61
+        self.assertIsNot(self.backend.endpoint(self.server), endpoint)
+
+    async def test_forget_drops_endpoint(self):
+        """
+        Tests that a changed server gets a new endpoint
+        """
+        endpoint = self.backend.endpoint(self.server)
+        self.backend.forget('Minecraft')
+
+        self.assertIsNot(self.backend.endpoint(self.server), endpoint)
+
+    async def test_unreachable_raises_connection_error(self):
+        """
+        Tests that a server that's down raises ConnectionError
+        """
+        self.fake.close()
+        await asyncio.sleep(0)
+
+        with self.assertRaises(ConnectionError):
+            await self.backend.players(self.server)
+
+
+class MinecraftBedrockBackendTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for MinecraftBedrockBackend tests, run against a local fake server
+    """
+
+    async def asyncSetUp(self):
+        self.fake = FakeBedrockServer(motd='Creative', players=3, max_players=8)
+        host, port = await self.fake.start()
+        self.server = {'name': 'Bedrock', 'ip_address': host, 'port': port}
+        self.backend = backends.MinecraftBedrockBackend(timeout=0.5)
+
+    async def asyncTearDown(self):
+        self.fake.close()
+
+    async def test_players(self):
+        """
+        Tests that player counts come from the RakNet ping
+        """
+        result = await self.backend.players(self.server)
+
+        self.assertEqual(result, {'current_players': 3, 'max_players': 8})
+
+    async def test_info(self):
+        """
+        Tests that details come from the RakNet ping
+        """
+        info = await self.backend.info(self.server)
+
+        self.assertEqual(info['name'], 'Creative')
+        self.assertEqual(info['map'], 'Bedrock level')
+        self.assertEqual(info['version'], '1.20.50')
+
+    async def test_lost_ping_raises_connection_error(self):
+        """
+        Tests that a ping that goes unanswered raises ConnectionError
+        """
+        self.fake.loss = 1.0
+
+        with self.assertRaises(ConnectionError):
+            await self.backend.players(self.server)
+
+
+if __name__ == '__main__':
+    unittest.main()
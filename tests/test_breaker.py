@@ -0,0 +1,157 @@
+"""
+Tests for breaker module
+"""
+import asyncio
+import unittest
+
+import breaker
+from tests.fakes import FakeClock
+
+
+class CircuitBreakersTests(unittest.TestCase):
+    """
+    Class for CircuitBreakers tests
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breakers = breaker.CircuitBreakers(threshold=3, retry_after=10,
+                                                max_retry_after=40, clock=self.clock)
+
+    def _fail(self, times: int, name: str = 'Arma'):
+        for _ in range(times):
+            self.breakers.failure(name)
+
+    def test_opens_after_threshold(self):
+        """
+        Tests that a breaker stays closed until threshold failures in a row
+        """
+        self._fail(2)
+        self.assertTrue(self.breakers.allow('Arma'))
+        self.assertEqual(self.breakers.state('Arma'), breaker.CLOSED)
+
+        self._fail(1)
+
+        self.assertFalse(self.breakers.allow('Arma'))
+        self.assertEqual(self.breakers.state('Arma'), breaker.OPEN)
+        self.assertTrue(self.breakers.allow('Minecraft'))
+
+    def test_success_resets_failures(self):
+        """
+        Tests that only failures in a row count towards opening
+        """
+        self._fail(2)
+        self.breakers.success('Arma')
+        self._fail(2)
+
+        self.assertTrue(self.breakers.allow('Arma'))
+
+    def test_half_open_lets_one_probe_through(self):
+        """
+        Tests that once the wait is over exactly one query is let through
+        """
+        self._fail(3)
+        self.clock.now += 10
+
+        self.assertEqual(self.breakers.state('Arma'), breaker.HALF_OPEN)
+        self.assertTrue(self.breakers.allow('Arma'))
+        self.assertFalse(self.breakers.allow('Arma'))
+
+    def test_probe_success_closes(self):
+        """
+        Tests that a successful probe closes the breaker
+        """
+        self._fail(3)
+        self.clock.now += 10
+        self.breakers.allow('Arma')
+
+        self.breakers.success('Arma')
+
+        self.assertEqual(self.breakers.state('Arma'), breaker.CLOSED)
+        self.assertEqual(self.breakers.unreachable(), {})
+
+    def test_probe_failure_backs_off(self):
+        """
+        Tests that each failed probe doubles the wait, up to the maximum
+        """
+        self._fail(3)
+        waits = []
+        for _ in range(4):
+            waits.append(self.breakers.unreachable()['Arma'])
+            self.clock.now += waits[-1]
+            self.assertTrue(self.breakers.allow('Arma'))
+            self.breakers.failure('Arma')
+
+        self.assertEqual(waits, [10, 20, 40, 40])
+        self.assertFalse(self.breakers.allow('Arma'))
+
+    def test_release_lets_another_probe_through(self):
+        """
+        Tests that a probe ending undecided doesn't leave the breaker stuck
+        """
+        self._fail(3)
+        self.clock.now += 10
+        self.breakers.allow('Arma')
+
+        self.breakers.release('Arma')
+
+        self.assertTrue(self.breakers.allow('Arma'))
+
+    def test_forget(self):
+        """
+        Tests that a forgotten server starts over with a closed breaker
+        """
+        self._fail(3)
+        self._fail(3, 'Minecraft')
+
+        self.breakers.forget('Arma')
+        self.assertTrue(self.breakers.allow('Arma'))
+        self.assertFalse(self.breakers.allow('Minecraft'))
+
+        self.breakers.forget()
+        self.assertTrue(self.breakers.allow('Minecraft'))
+
+
+class BackgroundProbeTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for tests of retrying open servers in the background
+    """
+
+    async def test_probe_runs_after_wait(self):
+        """
+        Tests that an open breaker's server is probed once its wait is over
+        """
+        probed = asyncio.Event()
+
+        async def probe(name):
+            breakers.allow(name)
+            breakers.success(name)
+            probed.set()
+
+        breakers = breaker.CircuitBreakers(threshold=1, retry_after=0.05, probe=probe)
+        breakers.failure('Arma')
+        self.assertFalse(breakers.allow('Arma'))
+
+        await asyncio.wait_for(probed.wait(), 1)
+
+        self.assertEqual(breakers.state('Arma'), breaker.CLOSED)
+
+    async def test_forget_cancels_probe(self):
+        """
+        Tests that a forgotten server isn't probed
+        """
+        probed = []
+
+        async def probe(name):
+            probed.append(name)
+
+        breakers = breaker.CircuitBreakers(threshold=1, retry_after=0.05, probe=probe)
+        breakers.failure('Arma')
+        breakers.forget('Arma')
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(probed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
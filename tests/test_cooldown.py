@@ -0,0 +1,97 @@
+"""
+Tests for cooldown module
+"""
+import os
+import tempfile
+import unittest
+
+import cooldown
+from tests.fakes import FakeClock
+
+
+class CooldownsTests(unittest.TestCase):
+    """
+    Class for Cooldowns tests
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cooldowns.json')
+        self.clock = FakeClock(1_700_000_000.0)
+        self.cooldowns = cooldown.Cooldowns(self.path, clock=self.clock)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cooldown_runs_out(self):
+        """
+        Tests that a cooldown counts down and is over after its duration
+        """
+        self.cooldowns.start('host:rack-1', 300)
+        self.clock.now += 100
+
+        self.assertEqual(self.cooldowns.remaining('host:rack-1'), 200)
+        self.assertEqual(self.cooldowns.remaining('host:rack-2'), 0)
+        self.clock.now += 200
+        self.assertEqual(self.cooldowns.remaining('host:rack-1'), 0)
+
+    def test_reset(self):
+        """
+        Tests that a reset lifts a cooldown
+        """
+        self.cooldowns.start('host:rack-1', 300)
+        self.cooldowns.reset('host:rack-1')
+
+        self.assertEqual(self.cooldowns.remaining('host:rack-1'), 0)
+
+    def test_survives_restart(self):
+        """
+        Tests that cooldowns and rate limits are loaded back after a restart
+        """
+        self.cooldowns.start('host:rack-1', 300)
+        self.cooldowns.start('host:rack-2', 10)
+        self.cooldowns.hit('user:1', 1, 60)
+        self.clock.now += 50
+
+        restarted = cooldown.Cooldowns(self.path, clock=self.clock)
+        restarted.load()
+
+        self.assertEqual(restarted.remaining('host:rack-1'), 250)
+        self.assertEqual(restarted.remaining('host:rack-2'), 0)
+        self.assertEqual(restarted.hit('user:1', 1, 60), 10)
+
+    def test_load_without_file(self):
+        """
+        Tests that loading before anything was saved raises FileNotFoundError
+        """
+        with self.assertRaises(FileNotFoundError):
+            self.cooldowns.load()
+
+    def test_rate_limit(self):
+        """
+        Tests that a user over the limit has to wait for the oldest
+        command to leave the window
+        """
+        self.assertEqual(self.cooldowns.hit('user:1', 2, 60), 0)
+        self.clock.now += 10
+        self.assertEqual(self.cooldowns.hit('user:1', 2, 60), 0)
+        self.clock.now += 10
+
+        self.assertEqual(self.cooldowns.hit('user:1', 2, 60), 40)
+        self.assertEqual(self.cooldowns.hit('user:2', 2, 60), 0)
+        self.clock.now += 40
+        self.assertEqual(self.cooldowns.hit('user:1', 2, 60), 0)
+
+    def test_without_path(self):
+        """
+        Tests that cooldowns work in memory when not given a path
+        """
+        cooldowns = cooldown.Cooldowns(clock=self.clock)
+        cooldowns.start('host:rack-1', 300)
+
+        self.assertEqual(cooldowns.remaining('host:rack-1'), 300)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for dashboard module
+"""
+import asyncio
+import time
+import unittest
+
+import dashboard
+
+
+def _after(delay: float, result):
+    async def check():
+        await asyncio.sleep(delay)
+        return result
+    return check
+
+
+class WatchSweepTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for watch_sweep tests
+    """
+
+    async def _sweep(self, checks, **kwargs):
+        reports = []
+        async for progress in dashboard.watch_sweep(checks, **kwargs):
+            reports.append((time.monotonic(), dict(progress.results), progress.finished))
+        return reports
+
+    async def test_all_within_budget(self):
+        """
+        Tests that a sweep finishing within budget reports once, straight away
+        """
+        start = time.monotonic()
+        reports = await self._sweep({'a': _after(0, 1), 'b': _after(0.05, 2)}, budget=0.5)
+
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[0][1:], ({'a': 1, 'b': 2}, True))
+        self.assertLess(reports[0][0] - start, 0.3)
+
+    async def test_checks_run_concurrently(self):
+        """
+        Tests that the sweep takes about as long as its slowest check
+        """
+        start = time.monotonic()
+        await self._sweep({name: _after(0.2, name) for name in 'abcdef'}, budget=1)
+
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    async def test_pending_reported_at_budget(self):
+        """
+        Tests that slow checks are left pending in the report at the
+        budget and filled in by a later one
+        """
+        start = time.monotonic()
+        reports = await self._sweep({'fast': _after(0, 1), 'slow': _after(0.3, 2)},
+                                    budget=0.1, report_interval=0.05)
+
+        first_at, first, finished = reports[0]
+        self.assertLess(first_at - start, 0.25)
+        self.assertEqual(first, {'fast': 1})
+        self.assertFalse(finished)
+        self.assertEqual(reports[-1][1:], ({'fast': 1, 'slow': 2}, True))
+
+    async def test_reports_coalesced(self):
+        """
+        Tests that checks finishing close together after the budget
+        share a report
+        """
+        checks = {str(index): _after(0.1 + index * 0.01, index) for index in range(10)}
+
+        reports = await self._sweep(checks, budget=0.05, report_interval=1)
+
+        self.assertEqual(len(reports), 2)
+        self.assertEqual(len(reports[-1][1]), 10)
+
+    async def test_timeout_and_errors_fail(self):
+        """
+        Tests that checks still running at the timeout, or that raised,
+        end up as None
+        """
+        async def broken():
+            raise ConnectionError
+
+        reports = await self._sweep({'hung': _after(5, 1), 'broken': broken, 'ok': _after(0, 3)},
+                                    budget=0.05, timeout=0.1)
+
+        self.assertEqual(reports[-1][1:], ({'hung': None, 'broken': None, 'ok': 3}, True))
+
+    async def test_latencies(self):
+        """
+        Tests that each check's time taken is recorded
+        """
+        async for progress in dashboard.watch_sweep({'slow': _after(0.1, 1)}):
+            pass
+
+        self.assertGreaterEqual(progress.latencies['slow'], 0.09)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Tests for debounce module
+"""
+import asyncio
+import unittest
+
+import debounce
+
+
+class DebouncerTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for Debouncer tests
+    """
+
+    async def test_burst_runs_action_once(self):
+        """
+        Tests that triggers in quick succession run the action once, after the last
+        """
+        calls = []
+        debouncer = debounce.Debouncer(lambda: calls.append(True), delay=0.05, max_delay=1)
+
+        for _ in range(5):
+            debouncer.trigger()
+            await asyncio.sleep(0.01)
+        self.assertEqual(calls, [])
+        self.assertTrue(debouncer.pending)
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(calls, [True])
+        self.assertFalse(debouncer.pending)
+
+    async def test_max_delay_caps_wait(self):
+        """
+        Tests that a burst that doesn't let up still runs the action after max_delay
+        """
+        calls = []
+        debouncer = debounce.Debouncer(lambda: calls.append(True), delay=0.05, max_delay=0.1)
+
+        for _ in range(10):
+            debouncer.trigger()
+            await asyncio.sleep(0.02)
+
+        self.assertGreaterEqual(len(calls), 1)
+
+    async def test_flush_runs_pending_action_now(self):
+        """
+        Tests that flush runs a waiting action straight away, and only once
+        """
+        calls = []
+        debouncer = debounce.Debouncer(lambda: calls.append(True), delay=10)
+
+        debouncer.trigger()
+        debouncer.flush()
+        debouncer.flush()
+
+        self.assertEqual(calls, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
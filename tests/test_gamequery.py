@@ -0,0 +1,377 @@
+"""
+Tests for gamequery module
+"""
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import gamequery
+from servers import ServerType
+from tests.fakes import FakeA2SServer, FakeVRageServer
+
+
+def _servers(*names):
+    return {name: {'name': name} for name in names}
+
+
+class IsAnyoneActiveTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for is_anyone_active tests
+    """
+
+    def setUp(self):
+        gamequery.player_cache.invalidate()
+
+    async def _run(self, servers, get_players, **kwargs):
+        with mock.patch.object(gamequery, 'list_servers', return_value=servers), \
+                mock.patch.object(gamequery, 'get_server', side_effect=servers.get), \
+                mock.patch.object(gamequery, 'get_players', side_effect=get_players):
+            return await gamequery.is_anyone_active(**kwargs)
+
+    async def test_servers_queried_concurrently(self):
+        """
+        Tests that the sweep takes about as long as the slowest server
+        rather than the sum of all of them
+        """
+        async def get_players(server):
+            await asyncio.sleep(0.2)
+            return {'current_players': 0, 'max_players': 10}
+
+        start = time.monotonic()
+        result = await self._run(_servers('a', 'b', 'c', 'd', 'e'), get_players)
+
+        self.assertEqual(result, (False, []))
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    async def test_stops_at_first_active_server(self):
+        """
+        Tests that a server with players decides the answer without
+        waiting on the slow ones
+        """
+        async def get_players(server):
+            if server['name'] == 'busy':
+                return {'current_players': 3, 'max_players': 10}
+            await asyncio.sleep(0.5)
+            return {'current_players': 0, 'max_players': 10}
+
+        start = time.monotonic()
+        active, _ = await self._run(_servers('slow', 'busy'), get_players)
+
+        self.assertTrue(active)
+        self.assertLess(time.monotonic() - start, 0.3)
+
+    async def test_per_server_timeout_reported_as_failed(self):
+        """
+        Tests that a server exceeding its deadline is reported as failed
+        """
+        async def get_players(server):
+            if server['name'] == 'dead':
+                await asyncio.sleep(0.5)
+            return {'current_players': 0, 'max_players': 10}
+
+        result = await self._run(_servers('dead', 'alive'), get_players,
+                                 query_timeout=0.1)
+
+        self.assertEqual(result, (False, ['dead']))
+
+    async def test_sweep_timeout_reports_unfinished_servers(self):
+        """
+        Tests that servers still pending at the sweep deadline are reported as failed
+        """
+        async def get_players(server):
+            await asyncio.sleep(0.5)
+            return {'current_players': 0, 'max_players': 10}
+
+        result = await self._run(_servers('a', 'b'), get_players,
+                                 query_timeout=1, sweep_timeout=0.1)
+
+        self.assertEqual(result[0], False)
+        self.assertCountEqual(result[1], ['a', 'b'])
+
+    async def test_no_result_reported_as_failed(self):
+        """
+        Tests that a server returning no result is reported as failed
+        """
+        async def get_players(server):
+            return None
+
+        result = await self._run(_servers('down'), get_players)
+
+        self.assertEqual(result, (False, ['down']))
+
+
+    async def test_only_named_servers_checked(self):
+        """
+        Tests that only the named servers are queried when names are given
+        """
+        queried = []
+
+        async def get_players(server):
+            queried.append(server['name'])
+            return {'current_players': 0, 'max_players': 10}
+
+        result = await self._run(_servers('a', 'b', 'c'), get_players, names=['a', 'c'])
+
+        self.assertEqual(result, (False, []))
+        self.assertCountEqual(queried, ['a', 'c'])
+
+    async def test_unknown_names_reported_as_failed(self):
+        """
+        Tests that a named server that doesn't exist is reported as
+        failed rather than silently counted as empty
+        """
+        async def get_players(server):
+            return {'current_players': 0, 'max_players': 10}
+
+        result = await self._run(_servers('a'), get_players, names=['a', 'gone'])
+
+        self.assertEqual(result, (False, ['gone']))
+
+    async def test_stale_cache_not_trusted(self):
+        """
+        Tests that a stale cached count of 0 is queried again rather than
+        taken as the answer
+        """
+        players = [0, 3]
+
+        async def get_players(server):
+            return {'current_players': players.pop(0), 'max_players': 10}
+
+        servers = _servers('a')
+        with mock.patch.object(gamequery.player_cache, 'ttl', 0), \
+                mock.patch.object(gamequery, 'get_players', side_effect=get_players):
+            await gamequery.fetch_players(servers['a'])
+            result = await self._run(servers, get_players)
+
+        self.assertEqual(result, (True, []))
+
+    async def test_uncountable_players_reported_as_failed(self):
+        """
+        Tests that a server whose backend can't count players is reported
+        as failed rather than as empty
+        """
+        listener = await asyncio.start_server(lambda r, w: w.close(), '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        servers = {'DCS': {'name': 'DCS', 'ip_address': '127.0.0.1', 'port': port,
+                           'server_type': ServerType.DCS}}
+        try:
+            with mock.patch.object(gamequery, 'list_servers', return_value=servers), \
+                    mock.patch.object(gamequery, 'get_server', side_effect=servers.get):
+                result = await gamequery.is_anyone_active(names=['DCS'])
+        finally:
+            listener.close()
+
+        self.assertEqual(result, (False, ['DCS']))
+
+
+class GetAllPlayersTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for get_all_players tests
+    """
+
+    def setUp(self):
+        gamequery.player_cache.invalidate()
+
+    async def test_all_servers_reported(self):
+        """
+        Tests that every server gets a result, None for those that failed or timed out
+        """
+        servers = _servers('up', 'down', 'slow')
+
+        async def get_players(server):
+            if server['name'] == 'down':
+                return None
+            if server['name'] == 'slow':
+                await asyncio.sleep(0.5)
+            return {'current_players': 1, 'max_players': 10}
+
+        with mock.patch.object(gamequery, 'list_servers', return_value=servers), \
+                mock.patch.object(gamequery, 'get_server', side_effect=servers.get), \
+                mock.patch.object(gamequery, 'get_players', side_effect=get_players):
+            result = await gamequery.get_all_players(query_timeout=0.1)
+
+        self.assertEqual(result, {'up': {'current_players': 1, 'max_players': 10},
+                                  'down': None, 'slow': None})
+
+
+class DispatchTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for backend dispatch tests
+    """
+
+    async def test_unrecognised_server_type(self):
+        """
+        Tests that a server of an unknown type gives no result
+        """
+        server = {'name': 'Unknown', 'server_type': 'FAIL'}
+
+        self.assertIsNone(await gamequery.get_players(server))
+
+    async def test_unsupported_query(self):
+        """
+        Tests that a query a backend doesn't support gives no result
+        """
+        server = {'name': 'Bedrock', 'ip_address': '127.0.0.1', 'port': 19132,
+                  'server_type': ServerType.MINECRAFT_BEDROCK}
+
+        self.assertIsNone(await gamequery.get_players_details(server))
+
+
+class SteamQueryTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for Steam server query tests, run against a local fake A2S server
+    """
+
+    async def asyncSetUp(self):
+        self.fake = FakeA2SServer(name='Antistasi', max_players=40,
+                                  players=[('Myles', 3, 60.0), ('Kharms', 5, 120.0)])
+        host, port = await self.fake.start()
+        self.server = {'name': 'Arma', 'ip_address': host, 'port': port,
+                       'server_type': ServerType.STEAM}
+
+    async def asyncTearDown(self):
+        self.fake.close()
+
+    async def test_get_players(self):
+        """
+        Tests that player counts come back from A2S_INFO
+        """
+        result = await gamequery.get_players(self.server)
+
+        self.assertEqual(result, {'current_players': 2, 'max_players': 40})
+
+    async def test_get_players_details(self):
+        """
+        Tests that player details come back from A2S_PLAYER
+        """
+        players = await gamequery.get_players_details(self.server)
+
+        self.assertEqual([player.name for player in players], ['Myles', 'Kharms'])
+
+    async def test_get_server_details(self):
+        """
+        Tests that server details come back from A2S_INFO
+        """
+        details = await gamequery.get_server_details(self.server)
+
+        self.assertEqual(details['name'], 'Antistasi')
+        self.assertEqual(details['map'], 'Altis')
+
+    async def test_get_players_unreachable(self):
+        """
+        Tests that an unreachable server gives no result rather than raising
+        """
+        self.fake.loss = 1.0
+        result = await gamequery.get_players(self.server)
+
+        self.assertIsNone(result)
+
+
+class BreakerTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for tests of skipping servers that keep failing
+    """
+
+    async def asyncSetUp(self):
+        self.fake = FakeA2SServer(loss=1.0)
+        host, port = await self.fake.start()
+        self.server = {'name': 'Unreachable', 'ip_address': host, 'port': port,
+                       'server_type': ServerType.STEAM}
+        backend = gamequery.backends.get_backend(ServerType.STEAM)
+        self.timeout = backend.client.timeout
+        backend.client.timeout = 0.05
+
+    async def asyncTearDown(self):
+        gamequery.backends.get_backend(ServerType.STEAM).client.timeout = self.timeout
+        gamequery.breakers.forget()
+        self.fake.close()
+
+    async def test_open_breaker_fails_fast(self):
+        """
+        Tests that a server which failed enough queries in a row isn't
+        sent any more until its breaker lets a probe through
+        """
+        for _ in range(gamequery.breakers.threshold):
+            self.assertIsNone(await gamequery.get_players(self.server))
+        sent = len(self.fake.received)
+
+        self.assertIsNone(await gamequery.get_players(self.server))
+
+        self.assertEqual(len(self.fake.received), sent)
+        self.assertIn('Unreachable', gamequery.breakers.unreachable())
+
+    async def test_answer_closes_breaker(self):
+        """
+        Tests that a server answering its probe is queried as normal again
+        """
+        breakers = gamequery.CircuitBreakers(threshold=1, retry_after=0)
+        with mock.patch.object(gamequery, 'breakers', breakers):
+            await gamequery.get_players(self.server)
+            self.assertIn('Unreachable', breakers.unreachable())
+            self.fake.loss = 0.0
+
+            self.assertIsNotNone(await gamequery.get_players(self.server))
+            self.assertEqual(breakers.unreachable(), {})
+
+    async def test_bypass_queries_open_breaker(self):
+        """
+        Tests that a query bypassing the breaker is sent while it's open,
+        closes it when answered, and doesn't count against it otherwise
+        """
+        for _ in range(gamequery.breakers.threshold):
+            await gamequery.get_players(self.server)
+        sent = len(self.fake.received)
+
+        self.assertIsNone(await gamequery.get_server_details(self.server, bypass_breaker=True))
+        self.assertGreater(len(self.fake.received), sent)
+        self.assertIn('Unreachable', gamequery.breakers.unreachable())
+
+        self.fake.loss = 0.0
+        self.assertIsNotNone(
+            await gamequery.get_server_details(self.server, bypass_breaker=True))
+        self.assertEqual(gamequery.breakers.unreachable(), {})
+
+
+class SpaceEngineersQueryTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for Space Engineers server query tests, run against a local stub VRage API
+    """
+
+    async def asyncSetUp(self):
+        self.fake = FakeVRageServer(players=['Myles'])
+        await self.fake.start()
+        host, port = self.fake.runner.addresses[0][:2]
+        self.server = {'name': 'Space Engineers', 'ip_address': host, 'port': port,
+                       'password': self.fake.token,
+                       'server_type': ServerType.SPACE_ENGINEERS}
+
+    async def asyncTearDown(self):
+        gamequery.backends.forget(self.server['name'])
+        await self.fake.close()
+
+    async def test_get_players(self):
+        """
+        Tests that the player count comes back without fetching the player list
+        """
+        result = await gamequery.get_players(self.server)
+
+        self.assertEqual(result, {'current_players': 1, 'max_players': 99})
+        self.assertNotIn('/vrageremote/v1/session/players', self.fake.requests)
+
+    async def test_client_kept_between_queries(self):
+        """
+        Tests that a server keeps one client across queries
+        """
+        await gamequery.get_players(self.server)
+        clients = gamequery.backends.get_backend(ServerType.SPACE_ENGINEERS)._clients
+        client = clients[self.server['name']]
+        peers = set(self.fake.peers)
+        await gamequery.get_players(self.server)
+
+        self.assertIs(clients[self.server['name']], client)
+        self.assertEqual(self.fake.peers, peers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Tests for history module
+"""
+import os
+import tempfile
+import unittest
+
+from steam.player import Player
+
+import history
+from tests.fakes import FakeClock
+
+# A Monday, midnight UTC
+START = 1_704_067_200
+
+
+def _players(count):
+    return {'current_players': count, 'max_players': 32}
+
+
+class PlayerNameTests(unittest.TestCase):
+    """
+    Class for player_name tests
+    """
+
+    def test_backend_formats(self):
+        """
+        Tests that names are read from each backend's player details
+        """
+        self.assertEqual(history.player_name(Player(0, 'Alice', 10, 60.0)), 'Alice')
+        self.assertEqual(history.player_name('Bob'), 'Bob')
+        self.assertEqual(history.player_name({'DisplayName': 'Carol'}), 'Carol')
+
+
+class HistoryTests(unittest.TestCase):
+    """
+    Class for History tests
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'history.db')
+        self.clock = FakeClock(float(START))
+        self.history = history.History(self.path, flush_interval=3600, clock=self.clock)
+
+    def tearDown(self):
+        self.history.close()
+        self.directory.cleanup()
+
+    def poll(self, players, sessions=None, minutes=15):
+        self.history.record(players, sessions)
+        self.clock.now += minutes * 60
+
+    def test_stats_from_rollups(self):
+        """
+        Tests that averages, peaks and player hours are summed from the polls
+        """
+        for count in (2, 4, 6, 8):
+            self.poll({'Arma': _players(count), 'DCS': _players(0)})
+        self.history.flush()
+
+        arma, dcs = self.history.stats(days=1)
+
+        self.assertEqual(arma['server'], 'Arma')
+        self.assertEqual(arma['average_players'], 5)
+        self.assertEqual(arma['peak_players'], 8)
+        self.assertEqual(arma['player_hours'], 5)
+        self.assertEqual(dcs['peak_players'], 0)
+
+    def test_busiest_hour(self):
+        """
+        Tests that the hour of the day with the most players on average is found
+        """
+        for hour in range(24):
+            self.poll({'Arma': _players(10 if hour == 20 else 1)}, minutes=60)
+        self.history.flush()
+
+        self.assertEqual(self.history.stats(days=2)[0]['busiest_hour'], 20)
+
+    def test_average_weighted_by_time(self):
+        """
+        Tests that faster polling while players are on doesn't inflate the
+        average, which is over time rather than samples
+        """
+        for _ in range(240):
+            self.poll({'Arma': _players(4)}, minutes=0.25)
+        for _ in range(23 * 60):
+            self.poll({'Arma': _players(0)}, minutes=1)
+        self.history.flush()
+
+        self.assertAlmostEqual(self.history.stats(days=2)[0]['average_players'], 4 / 24)
+
+    def test_failed_polls_not_counted(self):
+        """
+        Tests that a server that couldn't be queried doesn't pull its average down
+        """
+        self.poll({'Arma': _players(4)})
+        self.poll({'Arma': None})
+        self.history.flush()
+
+        self.assertEqual(self.history.stats(days=1)[0]['average_players'], 4)
+
+    def test_sessions(self):
+        """
+        Tests that sessions start when players appear, backdated by how
+        long they've been connected, and end when they leave
+        """
+        self.poll({'Arma': _players(1)}, {'Arma': {'Alice': 600.0}})
+        self.poll({'Arma': _players(2)}, {'Arma': {'Alice': 1500.0, 'Bob': None}})
+        self.poll({'Arma': _players(1)}, {'Arma': {'Bob': None}})
+        self.poll({'Arma': _players(0)})
+        self.history.flush()
+
+        rows = sorted(self.history._connection.execute('SELECT * FROM sessions'))
+        self.assertEqual(rows, [('Arma', 'Alice', START - 600, START + 1800),
+                                ('Arma', 'Bob', START + 900, START + 2700)])
+        usage = self.history.stats(days=1)[0]
+        self.assertEqual((usage['sessions'], usage['players']), (2, 2))
+
+    def test_close_ends_open_sessions(self):
+        """
+        Tests that closing ends the sessions of players still online
+        """
+        self.poll({'Arma': _players(1)}, {'Arma': {'Alice': None}})
+        self.history.close()
+
+        self.history = history.History(self.path, clock=self.clock)
+        self.assertEqual(self.history.stats(days=1)[0]['sessions'], 1)
+
+    def test_batched_until_flush(self):
+        """
+        Tests that polls are buffered and written together
+        """
+        self.poll({'Arma': _players(1)})
+
+        self.assertEqual(self.history.stats(days=1), [])
+        self.history.flush()
+        self.assertEqual(len(self.history.stats(days=1)), 1)
+
+    def test_retention(self):
+        """
+        Tests that raw samples are dropped before the daily rollups they fed
+        """
+        self.poll({'Arma': _players(3)})
+        self.history.flush()
+        self.clock.now += 30 * 86400
+        self.poll({'Arma': _players(1)})
+        self.history.flush()
+
+        samples = self.history._connection.execute('SELECT COUNT(*) FROM samples').fetchone()
+        daily = self.history._connection.execute('SELECT COUNT(*) FROM daily').fetchone()
+        self.assertEqual((samples[0], daily[0]), (1, 2))
+        self.assertEqual(self.history.stats(days=60)[0]['peak_players'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for hosts module
+"""
+import os
+import tempfile
+import unittest
+
+from marshmallow import ValidationError
+
+import hosts
+
+URLS = {
+    'wol_url': 'http://10.0.0.2/wol',
+    'shutdown_url': 'http://10.0.0.3/shutdown',
+    'reboot_url': 'http://10.0.0.3/reboot',
+    'liveness_url': 'http://10.0.0.3/',
+}
+
+
+class AddHostsTests(unittest.TestCase):
+    """
+    Class for add_host tests
+    """
+
+    def setUp(self):
+        hosts.delete_host('*')
+
+    def test_add_host_positive(self):
+        """
+        Tests if Host objects are created with valid values
+        """
+        host = hosts.add_host('rack-1', servers=['Arma Server 1'], **URLS)
+
+        self.assertEqual(host['name'], 'rack-1')
+        self.assertEqual(host['wol_url'], 'http://10.0.0.2/wol')
+        self.assertEqual(host['liveness_url'], 'http://10.0.0.3/')
+        self.assertEqual(host['servers'], ['Arma Server 1'])
+        self.assertIs(hosts.get_host('rack-1'), host)
+
+    def test_add_host_without_servers(self):
+        """
+        Tests that a host runs no game servers unless told otherwise
+        """
+        host = hosts.add_host('rack-1', **URLS)
+
+        self.assertEqual(host['servers'], [])
+
+    def test_add_host_duplicate_name(self):
+        """
+        Tests if a ValueError is thrown if a duplicate host name is specified
+        """
+        hosts.add_host('rack-1', **URLS)
+
+        self.assertRaises(ValueError, hosts.add_host, 'rack-1', **URLS)
+
+    def test_update_host_missing_url(self):
+        """
+        Tests if a marshmallow.exceptions.ValidationError is thrown if a power URL is missing
+        """
+        self.assertRaises(ValidationError, hosts.update_host, 'rack-1',
+                          {'name': 'rack-1', 'wol_url': 'http://10.0.0.2/wol'})
+
+
+class SaveLoadHostsTests(unittest.TestCase):
+    """
+    Class for save_hosts and load_hosts tests
+    """
+
+    def setUp(self):
+        hosts.delete_host('*')
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+        hosts.delete_host('*')
+
+    def test_hosts_round_trip(self):
+        """
+        Tests that saved hosts are loaded back unchanged
+        """
+        hosts.add_host('rack-1', servers=['*'], **URLS)
+        hosts.add_host('rack-2', servers=['DCS Server 1'], **URLS)
+        saved = dict(hosts.list_hosts())
+        hosts.save_hosts()
+        hosts.delete_host('*')
+
+        hosts.load_hosts()
+
+        self.assertEqual(hosts.list_hosts(), saved)
+
+    def test_load_hosts_missing_file(self):
+        """
+        Tests that a FileNotFoundError is raised without a hosts file
+        """
+        self.assertRaises(FileNotFoundError, hosts.load_hosts)
+
+
+if __name__ == '__main__':
+    unittest.main()
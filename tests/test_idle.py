@@ -0,0 +1,146 @@
+"""
+Tests for idle module
+"""
+import asyncio
+import unittest
+
+import idle
+from tests.fakes import FakeClock
+
+
+def _host(name, servers=('*',)):
+    return {'name': name, 'servers': list(servers)}
+
+
+class IdleShutdownTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for IdleShutdown tests
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.hosts = [_host('rack-1')]
+        # Host name -> (anyone active, failed servers)
+        self.activity = {'rack-1': (False, [])}
+        self.shut_down = []
+        self.announced = []
+        self.allow_shutdown = True
+
+        async def is_active(host):
+            result = self.activity[host['name']]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        async def shutdown(host):
+            if self.allow_shutdown:
+                self.shut_down.append(host['name'])
+            return self.allow_shutdown
+
+        async def announce(message):
+            self.announced.append(message)
+
+        self.idle_shutdown = idle.IdleShutdown(
+            hosts=lambda: self.hosts, is_active=is_active, shutdown=shutdown,
+            announce=announce, idle_after=600, clock=self.clock)
+
+    async def test_shuts_down_after_idle_period(self):
+        """
+        Tests that a host is shut down and announced once idle for long enough
+        """
+        self.assertEqual(await self.idle_shutdown.check_once(), [])
+        self.clock.now += 599
+        self.assertEqual(await self.idle_shutdown.check_once(), [])
+        self.clock.now += 1
+
+        self.assertEqual(await self.idle_shutdown.check_once(), ['rack-1'])
+        self.assertEqual(self.shut_down, ['rack-1'])
+        self.assertEqual(self.announced, ['Nobody has played on `rack-1` for 10 minutes, '
+                                          'so it\'s been shut down to save power.'])
+
+    async def test_players_reset_idle_period(self):
+        """
+        Tests that players coming online restart the idle period
+        """
+        await self.idle_shutdown.check_once()
+        self.clock.now += 500
+        self.activity['rack-1'] = (True, [])
+        await self.idle_shutdown.check_once()
+        self.activity['rack-1'] = (False, [])
+        self.clock.now += 200
+        await self.idle_shutdown.check_once()
+        self.clock.now += 200
+
+        self.assertEqual(await self.idle_shutdown.check_once(), [])
+        self.assertEqual(self.shut_down, [])
+
+    async def test_failed_queries_reset_idle_period(self):
+        """
+        Tests that a host whose servers don't all answer is never treated as idle
+        """
+        self.activity['rack-1'] = (False, ['Arma'])
+        for _ in range(3):
+            await self.idle_shutdown.check_once()
+            self.clock.now += 600
+
+        self.assertEqual(self.shut_down, [])
+        self.assertEqual(self.idle_shutdown.idle_since, {})
+
+    async def test_check_error_resets_idle_period(self):
+        """
+        Tests that a host that can't be checked isn't shut down
+        """
+        await self.idle_shutdown.check_once()
+        self.clock.now += 600
+        self.activity['rack-1'] = ConnectionError()
+
+        self.assertEqual(await self.idle_shutdown.check_once(), [])
+        self.assertEqual(self.idle_shutdown.idle_since, {})
+
+    async def test_refused_shutdown_retried(self):
+        """
+        Tests that a shutdown refused, eg. for a cooldown, is tried again on the next check
+        """
+        await self.idle_shutdown.check_once()
+        self.clock.now += 600
+        self.allow_shutdown = False
+        self.assertEqual(await self.idle_shutdown.check_once(), [])
+        self.allow_shutdown = True
+        self.clock.now += 60
+
+        self.assertEqual(await self.idle_shutdown.check_once(), ['rack-1'])
+        self.assertEqual(len(self.announced), 1)
+
+    async def test_hosts_tracked_separately(self):
+        """
+        Tests that one busy host doesn't keep an idle one running
+        """
+        self.hosts.append(_host('rack-2', ['Arma']))
+        self.activity['rack-2'] = (True, [])
+        await self.idle_shutdown.check_once()
+        self.clock.now += 600
+
+        self.assertEqual(await self.idle_shutdown.check_once(), ['rack-1'])
+
+    async def test_runs_on_interval(self):
+        """
+        Tests that the background task checks every interval
+        """
+        sleeps = []
+
+        async def sleep(delay):
+            sleeps.append(delay)
+            if len(sleeps) == 2:
+                raise asyncio.CancelledError
+
+        self.idle_shutdown._sleep = sleep
+        self.idle_shutdown.interval = 30
+        self.idle_shutdown.start()
+        with self.assertRaises(asyncio.CancelledError):
+            await self.idle_shutdown._task
+
+        self.assertEqual(sleeps, [30, 30])
+
+
+if __name__ == '__main__':
+    unittest.main()
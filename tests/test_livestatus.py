@@ -0,0 +1,158 @@
+"""
+Tests for livestatus module
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+import livestatus
+from tests.fakes import FakeClock
+
+
+class LiveStatusTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for LiveStatus tests
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'livestatus.json')
+        self.clock = FakeClock()
+        # (channel, message, content) of each send and edit
+        self.sent = []
+        self.edits = []
+        self.deleted = set()
+
+        async def send(channel, content):
+            self.sent.append((channel, content))
+            return 100 + len(self.sent)
+
+        async def edit(channel, message, content):
+            if message in self.deleted:
+                return False
+            self.edits.append((channel, message, content))
+            return True
+
+        self.send, self.edit = send, edit
+        self.live_status = self._live_status()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _live_status(self, channels=(1,)):
+        return livestatus.LiveStatus(list(channels), send=self.send, edit=self.edit,
+                                     path=self.path, interval=10, clock=self.clock,
+                                     sleep=self.clock.sleep)
+
+    async def _settle(self, live_status=None):
+        live_status = live_status or self.live_status
+        while live_status.pending:
+            await asyncio.sleep(0)
+
+    async def test_first_update_posts(self):
+        """
+        Tests that a channel without a message gets one posted
+        """
+        self.live_status.update('3 players')
+        await self._settle()
+
+        self.assertEqual(self.sent, [(1, '3 players')])
+        self.assertEqual(self.live_status.messages(), {1: 101})
+
+    async def test_unchanged_content_not_edited(self):
+        """
+        Tests that the same content again doesn't cause an edit
+        """
+        self.live_status.update('3 players')
+        await self._settle()
+        self.clock.now += 60
+
+        self.live_status.update('3 players')
+        await self._settle()
+
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.edits, [])
+
+    async def test_changes_edited_in_place(self):
+        """
+        Tests that changed content edits the existing message
+        """
+        self.live_status.update('3 players')
+        await self._settle()
+        self.clock.now += 60
+
+        self.live_status.update('4 players')
+        await self._settle()
+
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.edits, [(1, 101, '4 players')])
+        self.assertEqual(self.clock.slept, [])
+
+    async def test_rapid_changes_coalesced(self):
+        """
+        Tests that changes within the interval wait for it, and only
+        the latest goes out
+        """
+        self.live_status.update('1 player')
+        await self._settle()
+        for players in range(2, 6):
+            self.live_status.update(f'{players} players')
+        await self._settle()
+
+        self.assertEqual(self.edits, [(1, 101, '5 players')])
+        self.assertEqual(self.clock.slept, [10])
+
+    async def test_deleted_message_reposted(self):
+        """
+        Tests that a new message is posted when the old one is gone
+        """
+        self.live_status.update('3 players')
+        await self._settle()
+        self.deleted.add(101)
+        self.clock.now += 60
+
+        self.live_status.update('4 players')
+        await self._settle()
+
+        self.assertEqual(self.sent, [(1, '3 players'), (1, '4 players')])
+        self.assertEqual(self.live_status.messages(), {1: 102})
+
+    async def test_failed_edit_retried_on_next_update(self):
+        """
+        Tests that an edit that raised is tried again with the next update
+        """
+        async def broken(channel, content):
+            raise LookupError(channel)
+
+        self.live_status.send = broken
+        self.live_status.update('3 players')
+        await self._settle()
+        self.live_status.send = self.send
+
+        self.live_status.update('3 players')
+        await self._settle()
+
+        self.assertEqual(self.sent, [(1, '3 players')])
+
+    async def test_message_kept_across_restarts(self):
+        """
+        Tests that a restarted bot edits the message it posted before,
+        and forgets channels no longer configured
+        """
+        live_status = self._live_status(channels=(1, 2))
+        live_status.update('3 players')
+        await self._settle(live_status)
+
+        restarted = self._live_status(channels=(1,))
+        restarted.load()
+        restarted.update('3 players')
+        await self._settle(restarted)
+
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(restarted.messages(), {1: live_status.messages()[1]})
+        self.assertEqual(self.edits, [(1, live_status.messages()[1], '3 players')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Tests for logsetup module
+"""
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+import logsetup
+
+
+class LogSetupTests(unittest.TestCase):
+    """
+    Class for logging setup tests
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'bot.log')
+        root = logging.getLogger()
+        self.root_state = (root.level, root.handlers[:])
+
+    def tearDown(self):
+        logsetup.stop_logging()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.setLevel(self.root_state[0])
+        for handler in self.root_state[1]:
+            root.addHandler(handler)
+        logging.getLogger('test_logsetup.noisy').setLevel(logging.NOTSET)
+        self.directory.cleanup()
+
+    def read_lines(self) -> list:
+        logsetup.stop_logging()
+        with open(self.filename, encoding='utf8') as logfile:
+            return [json.loads(line) for line in logfile]
+
+    def test_records_written_as_json_lines(self):
+        """
+        Tests that records reach the file as JSON with their message
+        formatted and any extra fields alongside
+        """
+        logsetup.setup_logging(filename=self.filename)
+        logging.getLogger('test_logsetup').info("%s has %s players", 'Arma', 3,
+                                                extra={'server': 'Arma'})
+
+        [entry] = self.read_lines()
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'test_logsetup')
+        self.assertEqual(entry['message'], 'Arma has 3 players')
+        self.assertEqual(entry['server'], 'Arma')
+        self.assertIn('time', entry)
+
+    def test_traceback_kept_apart_from_message(self):
+        """
+        Tests that logger.exception puts the traceback in its own field
+        """
+        logsetup.setup_logging(filename=self.filename)
+        try:
+            raise ValueError("bad port")
+        except ValueError:
+            logging.getLogger('test_logsetup').exception("Query failed")
+
+        [entry] = self.read_lines()
+        self.assertEqual(entry['message'], 'Query failed')
+        self.assertIn('ValueError: bad port', entry['exc_info'])
+
+    def test_per_module_levels(self):
+        """
+        Tests that a module's own level overrides the default level
+        """
+        logsetup.setup_logging(level='INFO', levels={'test_logsetup.noisy': 'WARNING'},
+                               filename=self.filename)
+        logging.getLogger('test_logsetup.noisy').info("Dropped")
+        logging.getLogger('test_logsetup.noisy').warning("Kept")
+        logging.getLogger('test_logsetup').debug("Dropped")
+        logging.getLogger('test_logsetup').info("Also kept")
+
+        self.assertEqual([entry['message'] for entry in self.read_lines()],
+                         ['Kept', 'Also kept'])
+
+    def test_parse_levels(self):
+        """
+        Tests parsing of per-module levels from the environment
+        """
+        self.assertEqual(logsetup.parse_levels('gamequery=debug, discord=WARNING'),
+                         {'gamequery': 'DEBUG', 'discord': 'WARNING'})
+        self.assertEqual(logsetup.parse_levels(''), {})
+
+    def test_parse_levels_invalid(self):
+        """
+        Tests that a ValueError is raised for entries without a level
+        """
+        with self.assertRaises(ValueError):
+            logsetup.parse_levels('gamequery')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Tests for metrics module
+"""
+import unittest
+
+import aiohttp
+
+import metrics
+
+
+class MetricTests(unittest.TestCase):
+    """
+    Class for metric type tests
+    """
+
+    def test_counter_renders_total(self):
+        """
+        Tests that counters are rendered with a _total suffix per label set
+        """
+        counter = metrics.Counter('test_requests', "Requests", ['result'])
+        counter.inc(result='hit')
+        counter.inc(2, result='hit')
+        counter.inc(result='miss')
+
+        self.assertEqual(counter.render(), [
+            '# TYPE test_requests counter',
+            '# HELP test_requests Requests',
+            'test_requests_total{result="hit"} 3.0',
+            'test_requests_total{result="miss"} 1.0',
+        ])
+
+    def test_gauge_set_and_remove(self):
+        """
+        Tests that a gauge keeps the last value and can drop a series
+        """
+        gauge = metrics.Gauge('test_players', "Players", ['server'])
+        gauge.set(3, server='a')
+        gauge.set(1, server='a')
+        gauge.set(5, server='b')
+        gauge.remove(server='b')
+
+        self.assertEqual(gauge.render()[2:], ['test_players{server="a"} 1.0'])
+
+    def test_histogram_buckets_cumulative(self):
+        """
+        Tests that histogram buckets, sum and count are rendered cumulatively
+        """
+        histogram = metrics.Histogram('test_seconds', "Latency", buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        self.assertEqual(histogram.render()[2:], [
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1.0"} 2',
+            'test_seconds_bucket{le="+Inf"} 3',
+            'test_seconds_sum 5.55',
+            'test_seconds_count 3',
+        ])
+
+    def test_histogram_timer(self):
+        """
+        Tests that the timer observes once per block
+        """
+        histogram = metrics.Histogram('test_timer_seconds', "Latency", ['command'])
+        with histogram.time(command='status'):
+            pass
+
+        self.assertEqual(histogram.count(command='status'), 1)
+
+    def test_wrong_labels_raise_value_error(self):
+        """
+        Tests that a ValueError is raised for labels the metric doesn't take
+        """
+        counter = metrics.Counter('test_labels', "Labels", ['server'])
+
+        with self.assertRaises(ValueError):
+            counter.inc(host='a')
+
+    def test_label_values_escaped(self):
+        """
+        Tests that quotes in label values are escaped
+        """
+        gauge = metrics.Gauge('test_escape', "Escaping", ['server'])
+        gauge.set(1, server='Arma "Altis"')
+
+        self.assertEqual(gauge.render()[2], r'test_escape{server="Arma \"Altis\""} 1.0')
+
+
+class MetricsServerTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for the metrics HTTP endpoint tests
+    """
+
+    async def test_metrics_served(self):
+        """
+        Tests that /metrics serves every registered metric as OpenMetrics text
+        """
+        metrics.CACHE_REQUESTS.inc(result='hit')
+        runner = await metrics.start_server(0)
+        port = runner.addresses[0][1]
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f'http://127.0.0.1:{port}/metrics') as response:
+                    body = await response.text()
+                    content_type = response.headers['Content-Type']
+        finally:
+            await runner.cleanup()
+
+        self.assertTrue(content_type.startswith('application/openmetrics-text'))
+        self.assertIn('gamequery_cache_requests_total{result="hit"}', body)
+        self.assertTrue(body.endswith('# EOF\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for network module
+"""
+import asyncio
+import unittest
+
+from aiohttp import web
+
+import network
+
+
+class HttpGetTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for http_get tests
+    """
+
+    async def asyncSetUp(self):
+        self.hits = 0
+        self.failures = 0
+        self.delay = 0
+        self.peers = set()
+
+        async def handler(request):
+            self.hits += 1
+            await asyncio.sleep(self.delay)
+            self.peers.add(request.transport.get_extra_info('peername'))
+            if self.failures > 0:
+                self.failures -= 1
+                return web.Response(status=503)
+            return web.json_response({'success': True})
+
+        app = web.Application()
+        app.router.add_get('/', handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f'http://127.0.0.1:{port}/'
+
+    async def asyncTearDown(self):
+        await network.close_session()
+        await self.runner.cleanup()
+
+    async def test_http_get_positive(self):
+        """
+        Tests if the status code and body are returned
+        """
+        status, body = await network.http_get(self.url)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'{"success": true}')
+
+    async def test_http_get_reuses_connection(self):
+        """
+        Tests that sequential requests share one pooled connection
+        """
+        for _ in range(3):
+            await network.http_get(self.url)
+
+        self.assertEqual(self.hits, 3)
+        self.assertEqual(len(self.peers), 1)
+
+    async def test_http_get_retries_server_errors(self):
+        """
+        Tests that 5xx responses are retried until one succeeds
+        """
+        self.failures = 2
+        status, _ = await network.http_get(self.url, retries=2, backoff=0)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(self.hits, 3)
+
+    async def test_http_get_returns_last_server_error(self):
+        """
+        Tests that the last 5xx response is returned once retries run out
+        """
+        self.failures = 5
+        status, _ = await network.http_get(self.url, retries=1, backoff=0)
+
+        self.assertEqual(status, 503)
+        self.assertEqual(self.hits, 2)
+
+    async def test_http_get_raises_connection_error(self):
+        """
+        Tests that ConnectionError is raised when the host can't be reached
+        """
+        await self.runner.cleanup()
+
+        with self.assertRaises(ConnectionError):
+            await network.http_get(self.url, retries=1, backoff=0)
+
+    async def test_not_idempotent_not_resent(self):
+        """
+        Tests that a request that isn't idempotent isn't sent again once it
+        reached the host, whether it timed out or got a 5xx
+        """
+        self.delay = 0.5
+        with self.assertRaises(ConnectionError):
+            await network.http_get(self.url, timeout=0.1, retries=2, backoff=0,
+                                   idempotent=False)
+        self.assertEqual(self.hits, 1)
+
+        self.delay, self.failures = 0, 5
+        status, _ = await network.http_get(self.url, retries=2, backoff=0, idempotent=False)
+
+        self.assertEqual(status, 503)
+        self.assertEqual(self.hits, 2)
+
+    async def test_not_idempotent_retried_when_unsent(self):
+        """
+        Tests that a request that isn't idempotent is retried when it
+        couldn't connect to the host at all
+        """
+        await self.runner.cleanup()
+
+        with self.assertLogs(network.logger, 'WARNING') as logs, \
+                self.assertRaises(ConnectionError):
+            await network.http_get(self.url, retries=2, backoff=0, idempotent=False)
+
+        self.assertEqual(len([line for line in logs.output if 'retrying' in line]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests for periodic module
+"""
+import asyncio
+import unittest
+
+import periodic
+
+
+class Counter(periodic.PeriodicTask):
+    """
+    Ticks through a list of outcomes, raising those that are exceptions
+    """
+
+    interval = 5
+
+    def __init__(self, outcomes):
+        self.sleeps = []
+
+        async def sleep(seconds):
+            self.sleeps.append(seconds)
+            await asyncio.sleep(0)
+
+        super().__init__(sleep)
+        self.outcomes = list(outcomes)
+
+    async def _tick(self) -> float:
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class PeriodicTaskTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for PeriodicTask tests
+    """
+
+    async def test_sleeps_for_each_tick(self):
+        """
+        Tests that each tick decides the wait before the next, and a
+        tick that raised waits for the retry delay without stopping
+        """
+        task = Counter([1, RuntimeError('boom'), 3] + [1] * 10)
+        task.start()
+        while len(task.sleeps) < 3:
+            await asyncio.sleep(0)
+        task.stop()
+
+        self.assertEqual(task.sleeps[:3], [1, 5, 3])
+        self.assertFalse(task.running)
+
+    async def test_start_is_idempotent(self):
+        """
+        Tests that starting a running task doesn't spawn a second one
+        """
+        task = Counter([1] * 10)
+        task.start()
+        running = task._task
+        task.start()
+
+        self.assertIs(task._task, running)
+        task.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
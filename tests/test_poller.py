@@ -0,0 +1,121 @@
+"""
+Tests for poller module
+"""
+import asyncio
+import unittest
+
+import poller
+
+
+def _result(players):
+    return {'current_players': players, 'max_players': 10}
+
+
+class SnapshotTests(unittest.TestCase):
+    """
+    Class for Snapshot tests
+    """
+
+    def test_snapshot_summary(self):
+        """
+        Tests the totals derived from a snapshot
+        """
+        snapshot = poller.Snapshot(players={'a': _result(2), 'b': _result(3), 'c': None})
+
+        self.assertEqual(snapshot.total_players, 5)
+        self.assertEqual(snapshot.failed, ['c'])
+        self.assertTrue(snapshot.host_up)
+
+    def test_snapshot_host_down(self):
+        """
+        Tests that a host is considered down when no server answers
+        """
+        snapshot = poller.Snapshot(players={'a': None, 'b': None})
+
+        self.assertFalse(snapshot.host_up)
+        self.assertEqual(snapshot.total_players, 0)
+
+
+class PollerTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for Poller tests
+    """
+
+    def make_poller(self, results, **kwargs):
+        self.sleeps = []
+        self.updates = []
+        results = iter(results)
+
+        async def query():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        async def on_update(snapshot):
+            self.updates.append(snapshot)
+
+        async def sleep(delay):
+            self.sleeps.append(delay)
+            await asyncio.sleep(0)
+
+        return poller.Poller(query=query, on_update=on_update, sleep=sleep,
+                             active_interval=1, idle_interval=2, down_interval=3,
+                             **kwargs)
+
+    async def test_interval_adapts_to_state(self):
+        """
+        Tests that polls speed up with players online and back off while the host is down
+        """
+        instance = self.make_poller([
+            {'a': _result(1)},
+            {'a': _result(0)},
+            {'a': None},
+            {},
+        ])
+        instance.start()
+        while len(self.sleeps) < 4:
+            await asyncio.sleep(0)
+        instance.stop()
+
+        self.assertEqual(self.sleeps[:4], [1, 2, 3, 2])
+        self.assertEqual(len(self.updates), 4)
+
+    async def test_snapshot_kept_in_memory(self):
+        """
+        Tests that the latest poll is readable without querying
+        """
+        instance = self.make_poller([{'a': _result(4)}])
+        await instance.poll_once()
+
+        self.assertEqual(instance.snapshot.total_players, 4)
+        self.assertIs(self.updates[0], instance.snapshot)
+
+    async def test_failed_poll_keeps_running(self):
+        """
+        Tests that an exception during a poll doesn't stop the poller
+        """
+        instance = self.make_poller([RuntimeError('boom'), {'a': _result(1)}])
+        instance.start()
+        while len(self.sleeps) < 2:
+            await asyncio.sleep(0)
+        instance.stop()
+
+        self.assertEqual(self.sleeps[:2], [2, 1])
+        self.assertEqual(instance.snapshot.total_players, 1)
+
+    async def test_start_is_idempotent(self):
+        """
+        Tests that starting a running poller doesn't spawn a second task
+        """
+        instance = self.make_poller([{}] * 10)
+        instance.start()
+        task = instance._task
+        instance.start()
+
+        self.assertIs(instance._task, task)
+        instance.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Tests for querycache module
+"""
+import asyncio
+import unittest
+
+import querycache
+from tests.fakes import FakeClock
+
+
+class QueryCacheTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for QueryCache tests
+    """
+
+    def setUp(self):
+        self.clock = FakeClock(0.0)
+        self.cache = querycache.QueryCache(ttl=10, stale_ttl=20, clock=self.clock)
+        self.server = {'name': 'Test'}
+        self.calls = 0
+
+    async def fetch(self, server):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {'current_players': self.calls}
+
+    async def test_fresh_result_is_cached(self):
+        """
+        Tests that a result within the TTL is served without querying again
+        """
+        first = await self.cache.get(self.server, self.fetch)
+        self.clock.now = 9
+        second = await self.cache.get(self.server, self.fetch)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+    async def test_burst_costs_one_query(self):
+        """
+        Tests that concurrent callers on a cold cache share one query
+        """
+        results = await asyncio.gather(
+            *(self.cache.get(self.server, self.fetch) for _ in range(10)))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len({r['current_players'] for r in results}), 1)
+
+    async def test_stale_result_served_while_revalidating(self):
+        """
+        Tests that a stale result is returned at once and refreshed in the background
+        """
+        await self.cache.get(self.server, self.fetch)
+        self.clock.now = 15
+        stale = await self.cache.get(self.server, self.fetch)
+        await asyncio.sleep(0.05)
+        fresh = await self.cache.get(self.server, self.fetch)
+
+        self.assertEqual(stale, {'current_players': 1})
+        self.assertEqual(fresh, {'current_players': 2})
+        self.assertEqual(self.calls, 2)
+
+    async def test_expired_result_is_refetched(self):
+        """
+        Tests that a result older than ttl + stale_ttl is not served
+        """
+        await self.cache.get(self.server, self.fetch)
+        self.clock.now = 31
+        result = await self.cache.get(self.server, self.fetch)
+
+        self.assertEqual(result, {'current_players': 2})
+
+    async def test_fresh_only_refetches_stale(self):
+        """
+        Tests that a stale result isn't served to a caller that only
+        takes fresh ones
+        """
+        await self.cache.get(self.server, self.fetch)
+        self.clock.now = 15
+        result = await self.cache.get(self.server, self.fetch, allow_stale=False)
+
+        self.assertEqual(result, {'current_players': 2})
+
+    async def test_changed_entry_misses(self):
+        """
+        Tests that a result is only served for the Server entry it was fetched for
+        """
+        await self.cache.get(self.server, self.fetch)
+        result = await self.cache.get({'name': 'Test'}, self.fetch)
+
+        self.assertEqual(result, {'current_players': 2})
+
+    async def test_invalidate(self):
+        """
+        Tests that an invalidated server is queried again
+        """
+        await self.cache.get(self.server, self.fetch)
+        self.cache.invalidate('Test')
+        await self.cache.get(self.server, self.fetch)
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_failed_query_not_cached(self):
+        """
+        Tests that a failed query is retried by the next caller
+        """
+        async def fetch(server):
+            self.calls += 1
+
+        await self.cache.get(self.server, fetch)
+        await self.cache.get(self.server, fetch)
+
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Tests for readiness module
+"""
+import asyncio
+import unittest
+
+import readiness
+
+
+class FakeTime:
+    """
+    Clock moved along only by its sleep
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+        # Let other checks run, as a real sleep would
+        await asyncio.sleep(0)
+
+
+def _up_at(fake_time, when):
+    async def check():
+        return fake_time.now >= when
+    return check
+
+
+def _up_after(checks):
+    calls = []
+
+    async def check():
+        calls.append(True)
+        return len(calls) > checks
+    return check
+
+
+class BackoffTests(unittest.TestCase):
+    """
+    Class for backoff tests
+    """
+
+    def test_doubles_up_to_maximum(self):
+        """
+        Tests that waits double until they reach the maximum
+        """
+        delays = readiness.backoff(5, 60, jitter=0)
+        self.assertEqual([next(delays) for _ in range(6)], [5, 10, 20, 40, 60, 60])
+
+    def test_jitter_bounds(self):
+        """
+        Tests that jitter moves each wait by at most its share either way
+        """
+        low = readiness.backoff(10, 60, jitter=0.5, rand=lambda: 0.0)
+        high = readiness.backoff(10, 60, jitter=0.5, rand=lambda: 1.0)
+        self.assertEqual(next(low), 5)
+        self.assertEqual(next(high), 15)
+
+
+class WatchBootTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for watch_boot tests
+    """
+
+    def setUp(self):
+        self.time = FakeTime()
+
+    async def watch(self, is_up, probes, timeout=600):
+        return [(progress.host_up, dict(progress.servers), progress.finished)
+                async for progress in readiness.watch_boot(
+                    is_up, probes, timeout=timeout, initial_delay=5, max_delay=60,
+                    clock=self.time.clock, sleep=self.time.sleep, rand=lambda: 0.5)]
+
+    async def test_reports_each_server_coming_up(self):
+        """
+        Tests that progress is yielded as the host and then each server come up
+        """
+        updates = await self.watch(_up_at(self.time, 30), {
+            'Arma': _up_after(1), 'DCS': _up_after(3)})
+
+        self.assertEqual(updates, [
+            (True, {'Arma': False, 'DCS': False}, False),
+            (True, {'Arma': True, 'DCS': False}, False),
+            (True, {'Arma': True, 'DCS': True}, True),
+        ])
+
+    async def test_backs_off_between_checks(self):
+        """
+        Tests that checks of a host that's slow to come up get further apart
+        """
+        await self.watch(_up_at(self.time, 100), {})
+
+        self.assertEqual(self.time.sleeps, [5, 10, 20, 40, 60])
+
+    async def test_gives_up_at_deadline(self):
+        """
+        Tests that a server that never answers is reported once time is up
+        """
+        updates = await self.watch(_up_at(self.time, 0), {
+            'Arma': _up_after(0), 'DCS': _up_after(10000)}, timeout=120)
+
+        self.assertEqual(updates[-1], (True, {'Arma': True, 'DCS': False}, True))
+        self.assertEqual(self.time.now, 120)
+
+    async def test_host_never_up(self):
+        """
+        Tests that servers aren't queried while the host is down
+        """
+        queried = []
+
+        async def probe():
+            queried.append(True)
+            return True
+
+        updates = await self.watch(_up_at(self.time, 10000), {'Arma': probe}, timeout=60)
+
+        self.assertEqual(updates, [(False, {'Arma': False}, True)])
+        self.assertEqual(queried, [])
+
+    async def test_check_errors_count_as_down(self):
+        """
+        Tests that a check raising is retried like one failing
+        """
+        calls = []
+
+        async def flaky():
+            calls.append(True)
+            if len(calls) < 3:
+                raise ConnectionError()
+            return True
+
+        updates = await self.watch(flaky, {})
+
+        self.assertEqual(updates, [(True, {}, True)])
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
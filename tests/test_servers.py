@@ -1,12 +1,16 @@
 """
 Tests for server module
 """
+import json
+import os
+import tempfile
 import unittest
 from ipaddress import IPv4Address, IPv6Address
+from unittest import mock
 
 from marshmallow import ValidationError
 
-from app import servers
+import servers
 
 
 class ListServersTests(unittest.TestCase):
@@ -180,6 +184,120 @@ class UpdateServersTests(unittest.TestCase):
             servers.update_server('Update me', server_info)
 
 
+class ServerListenerTests(unittest.TestCase):
+    """
+    Class for add_listener tests
+    """
+
+    def test_listeners_notified_on_change(self):
+        """
+        Tests that listeners are called with the name of updated and deleted servers
+        """
+        changed = []
+        servers.add_listener(changed.append)
+        servers.add_server('Listen to me', '10.0.0.1', 1000, 'DCS')
+        servers.update_server('Listen to me', {
+            'name': 'Listen to me',
+            'ip_address': '10.0.0.2',
+            'port': 1000,
+            'server_type': 'DCS'
+        })
+        servers.delete_server('Listen to me')
+        servers._listeners.remove(changed.append)
+
+        self.assertEqual(changed, ['Listen to me', 'Listen to me'])
+
+
+class ServerRegistryTests(unittest.TestCase):
+    """
+    Class for ServerRegistry tests
+    """
+
+    def setUp(self):
+        self.registry = servers.ServerRegistry()
+        self.schema = servers.Server()
+
+    def _server(self, name, ip_address='10.0.0.1', server_type='DCS'):
+        server = self.schema.load({'name': name, 'ip_address': ip_address,
+                                   'port': 1000, 'server_type': server_type})
+        self.registry.put(server)
+        return server
+
+    def test_records_read_like_dicts(self):
+        """
+        Tests that records support item access and compare equal to dicts,
+        with unset fields missing
+        """
+        server = self._server('Record')
+
+        self.assertEqual(server['port'], 1000)
+        self.assertEqual(server, {'name': 'Record', 'ip_address': IPv4Address('10.0.0.1'),
+                                  'port': 1000, 'server_type': servers.ServerType.DCS})
+        self.assertNotIn('password', server)
+        with self.assertRaises(KeyError):
+            server['password']
+
+    def test_indexed_by_type_and_host(self):
+        """
+        Tests that servers are found by type and by IP address
+        """
+        dcs = self._server('DCS', '10.0.0.1', 'DCS')
+        arma = self._server('Arma', '10.0.0.1', 'STEAM')
+        other = self._server('Other', '10.0.0.2', 'STEAM')
+
+        self.assertEqual(dict(self.registry.of_type(servers.ServerType.STEAM)),
+                         {'Arma': arma, 'Other': other})
+        self.assertEqual(dict(self.registry.on_host('10.0.0.1')), {'DCS': dcs, 'Arma': arma})
+        self.assertEqual(dict(self.registry.of_type('MINECRAFT_JAVA')), {})
+
+    def test_indexes_follow_updates_and_removals(self):
+        """
+        Tests that replacing or removing a server moves it out of its old indexes
+        """
+        self._server('Moved', '10.0.0.1', 'DCS')
+        moved = self._server('Moved', '10.0.0.2', 'STEAM')
+        self._server('Gone', '10.0.0.2', 'STEAM')
+        self.registry.remove('Gone')
+
+        self.assertEqual(dict(self.registry.on_host('10.0.0.1')), {})
+        self.assertEqual(dict(self.registry.of_type('DCS')), {})
+        self.assertEqual(dict(self.registry.on_host('10.0.0.2')), {'Moved': moved})
+        self.assertRaises(KeyError, self.registry.remove, 'Gone')
+
+    def test_snapshot_unchanged_by_later_updates(self):
+        """
+        Tests that a snapshot keeps showing the servers as they were when
+        it was taken, and can't be changed itself
+        """
+        kept = self._server('Kept')
+        self._server('Removed')
+        snapshot = self.registry.snapshot()
+        by_type = self.registry.of_type('DCS')
+
+        self._server('Added')
+        self.registry.remove('Removed')
+        self._server('Kept', '10.0.0.9')
+
+        self.assertEqual(list(snapshot), ['Kept', 'Removed'])
+        self.assertIs(snapshot['Kept'], kept)
+        self.assertEqual(list(by_type), ['Kept', 'Removed'])
+        self.assertEqual(list(self.registry.snapshot()), ['Kept', 'Added'])
+        with self.assertRaises(TypeError):
+            snapshot['New'] = kept
+
+    def test_snapshot_unchanged_by_clear(self):
+        """
+        Tests that clearing the registry leaves snapshots alone
+        """
+        self._server('Kept')
+        snapshot = self.registry.snapshot()
+
+        self.registry.clear()
+
+        self.assertEqual(list(snapshot), ['Kept'])
+        self.assertEqual(len(self.registry), 0)
+
+
 class SerialiseDeserialiseServersTest(unittest.TestCase):
     """
     Class to test data (de)serialisation
@@ -207,5 +325,219 @@ class SerialiseDeserialiseServersTest(unittest.TestCase):
         self.assertEqual(servers.list_servers(), server_list)
 
 
+class JournalServersTests(unittest.TestCase):
+    """
+    Class for journal_changes tests
+    """
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        servers.delete_server('*')
+        servers.save_servers()
+        servers.journal_changes()
+
+    def tearDown(self):
+        servers.journal_changes(False)
+        servers.delete_server('*')
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_changes_survive_reload(self):
+        """
+        Tests that journaled adds, updates and deletes are restored on load
+        without a full save
+        """
+        servers.add_server('Kept', '10.0.0.1', 1000, 'DCS')
+        servers.add_server('Deleted', '10.0.0.2', 1000, 'DCS')
+        servers.update_server('Kept', {'name': 'Kept', 'ip_address': '10.0.0.3',
+                                       'port': 1000, 'server_type': 'DCS'})
+        servers.delete_server('Deleted')
+        expected = dict(servers.list_servers())
+        servers.server_list.clear()
+
+        servers.load_servers(force=True)
+
+        self.assertEqual(dict(servers.list_servers()), expected)
+        self.assertEqual(servers.settings_file.journal_length, 4)
+
+    def test_changes_survive_restart_without_file(self):
+        """
+        Tests that servers added before servers.json was ever saved are
+        restored from the journal by a restarted bot
+        """
+        os.remove('servers.json')
+        servers.add_server('Added', '10.0.0.1', 1000, 'DCS')
+        expected = dict(servers.list_servers())
+        servers.server_list.clear()
+
+        with mock.patch.object(servers, 'settings_file', servers.SettingsFile('servers.json')):
+            servers.load_servers(force=True)
+
+        self.assertEqual(dict(servers.list_servers()), expected)
+
+    def test_scheduled_changes_saved_together(self):
+        """
+        Tests that with a schedule, changes are journaled as they happen and
+        flush_journal saves them into servers.json in one write
+        """
+        scheduled = []
+        servers.journal_changes(schedule=lambda: scheduled.append(True))
+        servers.add_server('First', '10.0.0.1', 1000, 'DCS')
+        servers.add_server('Second', '10.0.0.2', 1000, 'DCS')
+
+        self.assertEqual(len(scheduled), 2)
+        self.assertEqual(servers.settings_file.journal_length, 2)
+
+        with mock.patch.object(servers.settings_file, 'save',
+                               wraps=servers.settings_file.save) as save:
+            servers.flush_journal()
+            servers.flush_journal()
+
+        save.assert_called_once()
+        self.assertFalse(os.path.exists(servers.settings_file.journal_path))
+        with open('servers.json', encoding='utf8') as settings:
+            self.assertEqual(len(json.load(settings)), 2)
+
+    def test_journal_compacted(self):
+        """
+        Tests that the journal is folded into servers.json once it's long enough
+        """
+        with mock.patch.object(servers, 'COMPACT_AFTER', 3):
+            for index in range(3):
+                servers.add_server(f'Server {index}', '10.0.0.1', 1000 + index, 'DCS')
+
+        self.assertFalse(os.path.exists(servers.settings_file.journal_path))
+        with open('servers.json', encoding='utf8') as settings:
+            self.assertEqual(len(json.load(settings)), 3)
+
+
+class ReloadServersTests(unittest.TestCase):
+    """
+    Class for reload_servers tests
+    """
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        servers.delete_server('*')
+        servers.add_server('Kept', '10.0.0.1', 1000, 'DCS')
+        servers.add_server('Changed', '10.0.0.2', 1000, 'DCS')
+        servers.add_server('Removed', '10.0.0.3', 1000, 'DCS')
+        servers.save_servers()
+
+    def tearDown(self):
+        servers.delete_server('*')
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def _edit(self, entries):
+        with open('servers.json', 'w', encoding='utf8') as settings:
+            json.dump(entries, settings)
+        # Make sure the edit shows even on filesystems with coarse mtimes
+        stat = os.stat('servers.json')
+        os.utime('servers.json', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_only_differences_applied(self):
+        """
+        Tests that edits are applied and only edited servers are replaced and notified
+        """
+        kept = servers.get_server('Kept')
+        notified = []
+        servers.add_listener(notified.append)
+        self._edit([
+            {'name': 'Kept', 'ip_address': '10.0.0.1', 'port': 1000, 'server_type': 'DCS',
+             'password': ''},
+            {'name': 'Changed', 'ip_address': '10.0.0.2', 'port': 2000, 'server_type': 'DCS'},
+            {'name': 'Added', 'ip_address': '10.0.0.4', 'port': 1000, 'server_type': 'STEAM'},
+        ])
+
+        try:
+            result = servers.reload_servers()
+        finally:
+            servers._listeners.remove(notified.append)
+
+        self.assertEqual(result, (['Added'], ['Removed'], ['Changed']))
+        self.assertCountEqual(notified, ['Added', 'Removed', 'Changed'])
+        self.assertIs(servers.get_server('Kept'), kept)
+        self.assertEqual(servers.get_server('Changed')['port'], 2000)
+        self.assertIsNone(servers.get_server('Removed'))
+
+    def test_unchanged_file_not_reloaded(self):
+        """
+        Tests that nothing is applied when the file hasn't changed
+        """
+        self.assertEqual(servers.reload_servers(), ([], [], []))
+
+    def test_invalid_entry_kept_as_it_was(self):
+        """
+        Tests that an entry edited to be invalid keeps its old config
+        """
+        changed = servers.get_server('Changed')
+        self._edit([
+            {'name': 'Kept', 'ip_address': '10.0.0.1', 'port': 1000, 'server_type': 'DCS',
+             'password': ''},
+            {'name': 'Changed', 'ip_address': '10.0.0.2', 'port': 0, 'server_type': 'DCS'},
+            {'name': 'Removed', 'ip_address': '10.0.0.3', 'port': 1000, 'server_type': 'DCS',
+             'password': ''},
+        ])
+
+        self.assertEqual(servers.reload_servers(), ([], [], []))
+        self.assertIs(servers.get_server('Changed'), changed)
+
+    def test_hand_edit_wins_over_journal(self):
+        """
+        Tests that a hand edit of a server changed through the journal
+        since the last full save is applied, and the journal folded in
+        """
+        servers.journal_changes()
+        try:
+            servers.update_server('Changed', {'name': 'Changed', 'ip_address': '10.0.0.2',
+                                              'port': 2000, 'server_type': 'DCS'})
+        finally:
+            servers.journal_changes(False)
+        self._edit([
+            {'name': 'Kept', 'ip_address': '10.0.0.1', 'port': 1000, 'server_type': 'DCS',
+             'password': ''},
+            {'name': 'Changed', 'ip_address': '10.0.0.2', 'port': 3000, 'server_type': 'DCS'},
+            {'name': 'Removed', 'ip_address': '10.0.0.3', 'port': 1000, 'server_type': 'DCS',
+             'password': ''},
+        ])
+
+        self.assertEqual(servers.reload_servers(), ([], [], ['Changed']))
+        self.assertEqual(servers.get_server('Changed')['port'], 3000)
+        self.assertFalse(os.path.exists(servers.settings_file.journal_path))
+        servers.server_list.clear()
+        servers.load_servers(force=True)
+        self.assertEqual(servers.get_server('Changed')['port'], 3000)
+
+
+    def test_journal_kept_for_entries_not_edited(self):
+        """
+        Tests that a server added through the journal survives a hand edit
+        of another server, and ends up in servers.json
+        """
+        servers.journal_changes()
+        try:
+            servers.add_server('ViaDiscord', '10.0.0.4', 1000, 'DCS')
+        finally:
+            servers.journal_changes(False)
+        with open('servers.json', encoding='utf8') as settings:
+            entries = json.load(settings)
+        entries[0]['port'] = 2000
+        self._edit(entries)
+
+        self.assertEqual(servers.reload_servers(), ([], [], ['Kept']))
+        self.assertIsNotNone(servers.get_server('ViaDiscord'))
+        with open('servers.json', encoding='utf8') as settings:
+            self.assertIn('ViaDiscord', [entry['name'] for entry in json.load(settings)])
+        servers.server_list.clear()
+        servers.load_servers(force=True)
+        self.assertIsNotNone(servers.get_server('ViaDiscord'))
+        self.assertEqual(servers.get_server('Kept')['port'], 2000)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,154 @@
+"""
+Tests for settingsfile module
+"""
+import errno
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import settingsfile
+
+
+class SettingsFileTests(unittest.TestCase):
+    """
+    Class for SettingsFile tests
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'servers.json')
+        self.settings = settingsfile.SettingsFile(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_writes_formatted_json(self):
+        """
+        Tests that saves are written in the same format as before and leave
+        no temporary files behind
+        """
+        self.settings.save([{'name': 'a', 'port': 1}])
+
+        with open(self.path, encoding='utf8') as settings:
+            self.assertEqual(settings.read(), json.dumps([{'name': 'a', 'port': 1}],
+                                                         indent=4, sort_keys=True))
+        self.assertEqual(os.listdir(self.directory.name), ['servers.json'])
+
+    def test_save_keeps_file_mode(self):
+        """
+        Tests that replacing the file keeps its permissions
+        """
+        self.settings.save([])
+        os.chmod(self.path, 0o640)
+
+        self.settings.save([{'name': 'a'}])
+
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+
+    def test_journal_replayed_over_file(self):
+        """
+        Tests that journaled changes are applied to the saved entries on load
+        """
+        self.settings.save([{'name': 'a', 'port': 1}, {'name': 'b', 'port': 2}])
+        self.settings.append({'op': 'put', 'entry': {'name': 'a', 'port': 3}})
+        self.settings.append({'op': 'delete', 'name': 'b'})
+        self.settings.append({'op': 'put', 'entry': {'name': 'c', 'port': 4}})
+
+        entries = settingsfile.SettingsFile(self.path).load()
+
+        self.assertEqual(entries, [{'name': 'a', 'port': 3}, {'name': 'c', 'port': 4}])
+
+    def test_save_empties_journal(self):
+        """
+        Tests that a full save folds the journal away
+        """
+        self.settings.save([])
+        self.settings.append({'op': 'put', 'entry': {'name': 'a'}})
+
+        self.settings.save([{'name': 'a'}])
+
+        self.assertFalse(os.path.exists(self.settings.journal_path))
+        self.assertEqual(self.settings.journal_length, 0)
+
+    def test_torn_journal_line_skipped(self):
+        """
+        Tests that a change half written before a crash is skipped
+        """
+        self.settings.save([{'name': 'a'}])
+        self.settings.append({'op': 'delete', 'name': 'a'})
+        with open(self.settings.journal_path, 'ab') as journal:
+            journal.write(b'{"op": "put", "ent')
+
+        entries = settingsfile.SettingsFile(self.path).load()
+
+        self.assertEqual(entries, [])
+
+    def test_load_skipped_when_unchanged(self):
+        """
+        Tests that loading again returns None until someone else changes the file
+        """
+        self.settings.save([{'name': 'a'}])
+        self.settings.append({'op': 'put', 'entry': {'name': 'b'}})
+
+        self.assertIsNone(self.settings.load())
+
+        with open(self.path, 'w', encoding='utf8') as settings:
+            json.dump([{'name': 'c'}], settings)
+
+        # The journal is replayed over what the hand edit left alone, and
+        # folded into the file
+        self.assertEqual(self.settings.load(), [{'name': 'c'}, {'name': 'b'}])
+        self.assertIsNone(self.settings.load())
+        self.assertEqual(self.settings.load(force=True), [{'name': 'c'}, {'name': 'b'}])
+        self.assertFalse(os.path.exists(self.settings.journal_path))
+
+    def test_journal_not_replayed_over_edit(self):
+        """
+        Tests that journaled changes to an entry edited by hand since are dropped
+        """
+        self.settings.save([{'name': 'a', 'port': 1}])
+        self.settings.append({'op': 'put', 'entry': {'name': 'a', 'port': 2}},
+                             {'op': 'delete', 'name': 'a'})
+        self.assertIsNone(self.settings.load())
+
+        with open(self.path, 'w', encoding='utf8') as settings:
+            json.dump([{'name': 'a', 'port': 3}], settings)
+
+        self.assertEqual(self.settings.load(), [{'name': 'a', 'port': 3}])
+        self.assertEqual(self.settings.load(force=True), [{'name': 'a', 'port': 3}])
+
+    def test_load_missing_file(self):
+        """
+        Tests that a FileNotFoundError is raised without a settings file
+        """
+        self.assertRaises(FileNotFoundError, self.settings.load)
+
+    def test_journal_without_file(self):
+        """
+        Tests that a journal written before the file was ever saved is
+        replayed over an empty list
+        """
+        self.settings.append({'op': 'put', 'entry': {'name': 'a'}})
+
+        restarted = settingsfile.SettingsFile(self.settings.path)
+        self.assertEqual(restarted.load(), [{'name': 'a'}])
+
+    def test_bind_mounted_file_overwritten_in_place(self):
+        """
+        Tests that a file that can't be renamed over, like a Docker bind
+        mount, is written in place instead
+        """
+        self.settings.save([{'name': 'a'}, {'name': 'b'}])
+        busy = OSError(errno.EBUSY, "Device or resource busy")
+
+        with mock.patch.object(settingsfile.os, 'replace', side_effect=busy):
+            self.settings.save([{'name': 'c'}])
+
+        self.assertEqual(settingsfile.SettingsFile(self.path).load(), [{'name': 'c'}])
+        self.assertEqual(os.listdir(self.directory.name), ['servers.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
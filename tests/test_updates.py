@@ -0,0 +1,138 @@
+"""
+Tests for updates module
+"""
+import asyncio
+import unittest
+
+import updates
+from tests.fakes import FakeClock
+
+
+class RateLimitTests(unittest.TestCase):
+    """
+    Class for RateLimit tests
+    """
+
+    def test_waits_for_oldest_to_expire(self):
+        """
+        Tests that once the limit is used up, the wait is until the
+        oldest action leaves the window
+        """
+        clock = FakeClock()
+        rate_limit = updates.RateLimit(2, 10, clock=clock)
+        rate_limit.hit()
+        clock.now += 4
+        rate_limit.hit()
+
+        self.assertEqual(rate_limit.wait(), 6)
+        clock.now += 6
+        self.assertEqual(rate_limit.wait(), 0)
+
+
+class UpdateSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for UpdateScheduler tests
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sent = []
+
+        async def send(key, value):
+            self.sent.append((key, value))
+
+        self.scheduler = updates.UpdateScheduler(send, limit=2, window=60, clock=self.clock,
+                                                 sleep=self.clock.sleep)
+
+    async def _settle(self):
+        while self.scheduler.pending:
+            await asyncio.sleep(0)
+
+    async def test_identical_updates_deduped(self):
+        """
+        Tests that a value the same as the last one sent isn't sent again
+        """
+        self.scheduler.update('presence', 'online')
+        await self._settle()
+        self.scheduler.update('presence', 'online')
+        await self._settle()
+
+        self.assertEqual(self.sent, [('presence', 'online')])
+
+    async def test_burst_sends_latest(self):
+        """
+        Tests that values set while one is waiting replace it
+        """
+        self.scheduler.update('presence', 'booting')
+        self.scheduler.update('presence', 'online')
+        self.scheduler.update('presence', 'offline')
+        await self._settle()
+
+        self.assertEqual(self.sent, [('presence', 'offline')])
+
+    async def test_changed_back_while_waiting(self):
+        """
+        Tests that a value changed back to what was sent before it went
+        out isn't sent at all
+        """
+        self.scheduler.update('presence', 'online')
+        await self._settle()
+        self.scheduler.update('presence', 'offline')
+        self.scheduler.update('presence', 'online')
+        await self._settle()
+
+        self.assertEqual(self.sent, [('presence', 'online')])
+
+    async def test_delayed_within_rate_limit(self):
+        """
+        Tests that updates past the limit wait for the window rather than
+        going out at once
+        """
+        for value in ('a', 'b', 'c'):
+            self.scheduler.update('presence', value)
+            await self._settle()
+
+        self.assertEqual(self.sent, [('presence', 'a'), ('presence', 'b'), ('presence', 'c')])
+        self.assertEqual(self.clock.slept, [60])
+
+    async def test_updates_never_block(self):
+        """
+        Tests that scheduling an update returns straight away, even when
+        the rate limit holds it back
+        """
+        gate = asyncio.Event()
+
+        async def slow_send(key, value):
+            await gate.wait()
+
+        self.scheduler.send = slow_send
+        self.scheduler.update('presence', 'online')
+
+        self.assertIsNone(self.scheduler.update('presence', 'offline'))
+        self.assertTrue(self.scheduler.pending)
+        await self.scheduler.stop()
+        self.assertFalse(self.scheduler.pending)
+
+    async def test_failed_send_retried(self):
+        """
+        Tests that a value that failed to send isn't treated as sent
+        """
+        async def broken(key, value):
+            raise ConnectionError
+
+        self.scheduler.send = broken
+        self.scheduler.update('presence', 'online')
+        await self._settle()
+        self.scheduler.send = lambda key, value: self._record(key, value)
+
+        self.scheduler.update('presence', 'online')
+        await self._settle()
+
+        self.assertEqual(self.sent, [('presence', 'online')])
+
+    async def _record(self, key, value):
+        self.sent.append((key, value))
+
+
+if __name__ == '__main__':
+    unittest.main()
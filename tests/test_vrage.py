@@ -0,0 +1,87 @@
+"""
+Tests for vrage module, run against a local stub VRage API
+"""
+import base64
+import time
+import unittest
+
+import vrage
+from tests.fakes import FakeVRageServer
+
+
+class VRageClientTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for VRageClient tests
+    """
+
+    async def asyncSetUp(self):
+        self.fake = FakeVRageServer(players=['Myles', 'Kharms'])
+        url = await self.fake.start()
+        self.client = vrage.VRageClient(url=url, token=self.fake.token)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.fake.close()
+
+    async def test_status_counts_only(self):
+        """
+        Tests that a count-only status skips the player list
+        """
+        status = await self.client.status()
+
+        self.assertTrue(status['live'])
+        self.assertEqual(status['info']['Players'], 2)
+        self.assertNotIn('players', status)
+        self.assertNotIn('/vrageremote/v1/session/players', self.fake.requests)
+
+    async def test_status_details(self):
+        """
+        Tests that a detailed status includes the player list
+        """
+        status = await self.client.status(details=True)
+
+        self.assertEqual([p['DisplayName'] for p in status['players']], ['Myles', 'Kharms'])
+
+    async def test_status_calls_concurrent(self):
+        """
+        Tests that the calls making up a status overlap
+        """
+        self.fake.latency = 0.2
+        start = time.monotonic()
+        await self.client.status(details=True)
+
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    async def test_connections_reused(self):
+        """
+        Tests that sequential queries share pooled connections
+        """
+        for _ in range(5):
+            await self.client.server_info()
+
+        self.assertEqual(len(self.fake.peers), 1)
+
+    async def test_wrong_token_refused(self):
+        """
+        Tests that a bad signature raises ValueError
+        """
+        client = vrage.VRageClient(url=self.fake.url,
+                                   token=base64.b64encode(b'wrong').decode())
+        try:
+            with self.assertRaises(ValueError):
+                await client.ping()
+        finally:
+            await client.close()
+
+    async def test_unreachable_raises_connection_error(self):
+        """
+        Tests that ConnectionError is raised when the server is down
+        """
+        await self.fake.close()
+
+        with self.assertRaises(ConnectionError):
+            await self.client.ping()
+
+
+if __name__ == '__main__':
+    unittest.main()
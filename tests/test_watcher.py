@@ -0,0 +1,78 @@
+"""
+Tests for watcher module
+"""
+import asyncio
+import unittest
+
+import watcher
+
+
+class ConfigWatcherTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Class for ConfigWatcher tests
+    """
+
+    async def test_checks_on_interval(self):
+        """
+        Tests that the watcher checks the file every interval
+        """
+        sleeps = []
+        reloads = []
+
+        def reload():
+            reloads.append(True)
+            return [], [], []
+
+        async def sleep(delay):
+            sleeps.append(delay)
+            if len(sleeps) == 3:
+                raise asyncio.CancelledError
+            await asyncio.sleep(0)
+
+        config_watcher = watcher.ConfigWatcher(reload=reload, interval=2, sleep=sleep)
+        config_watcher.start()
+        with self.assertRaises(asyncio.CancelledError):
+            await config_watcher._task
+
+        self.assertEqual(len(reloads), 3)
+        self.assertEqual(sleeps, [2, 2, 2])
+
+    async def test_keeps_watching_after_failure(self):
+        """
+        Tests that a failed reload, eg. a half written file, doesn't stop the watcher
+        """
+        results = [ValueError("Expecting value"), FileNotFoundError(), (['a'], [], [])]
+
+        def reload():
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        async def sleep(delay):
+            if not results:
+                raise asyncio.CancelledError
+
+        config_watcher = watcher.ConfigWatcher(reload=reload, sleep=sleep)
+        config_watcher.start()
+        with self.assertRaises(asyncio.CancelledError):
+            await config_watcher._task
+
+        self.assertEqual(results, [])
+
+    async def test_start_is_idempotent(self):
+        """
+        Tests that starting twice keeps the one task
+        """
+        config_watcher = watcher.ConfigWatcher(reload=lambda: ([], [], []), interval=60)
+        config_watcher.start()
+        task = config_watcher._task
+        config_watcher.start()
+
+        self.assertIs(config_watcher._task, task)
+        config_watcher.stop()
+        self.assertFalse(config_watcher.running)
+
+
+if __name__ == '__main__':
+    unittest.main()